@@ -0,0 +1,148 @@
+"""
+بنچمارک دریافت تاریخچه چند نماد از API
+مقایسه مسیر قدیمی (حلقه درخواست‌های پشت سر هم) با StockAPI.fetch_many
+روی یک سرور HTTP محلی که تأخیر شبکه و در صورت نیاز محدودسازی سرور
+(پاسخ 429 بیش از capacity درخواست هم‌زمان) را شبیه‌سازی می‌کند
+
+اجرا:
+    python -m benchmarks.bench_bulk_fetch --symbols 300 --latency 50 --concurrency 1 8 32
+    python -m benchmarks.bench_bulk_fetch --capacity 6 --concurrency 32
+"""
+
+import argparse
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from benchmarks.bench_bulk_ingest import make_history
+from core.api_handler import StockAPI
+from core.rate_limiter import get_limiter
+
+
+def make_server(latency: float, days: int, capacity: int = 0) -> ThreadingHTTPServer:
+    """
+    ساخت سرور محلی جایگزین API با پاسخ تاریخچه در قالب TseClient
+    latency: تأخیر هر پاسخ به ثانیه
+    days: تعداد روزهای تاریخچه هر پاسخ
+    capacity: حداکثر درخواست‌های هم‌زمان پیش از پاسخ 429 (0 برای نامحدود)
+    return: سرور در حال اجرا در thread پس‌زمینه (شمارنده 429 در server.throttled)
+    """
+    history = make_history(days, 0)
+    body = ';'.join(
+        f"{row.date},{row.open},{row.high},{row.low},{row.close},{row.volume},{row.close * row.volume}"
+        for row in history.itertuples()
+    ).encode('utf-8')
+    lock = threading.Lock()
+    state = {'active': 0}
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+        disable_nagle_algorithm = True
+
+        def do_GET(self):
+            with lock:
+                state['active'] += 1
+                rejected = capacity and state['active'] > capacity
+                if rejected:
+                    server.throttled += 1
+            try:
+                if rejected:
+                    self.send_response(429)
+                    self.send_header('Content-Length', '0')
+                    self.end_headers()
+                    return
+                time.sleep(latency)
+                self.send_response(200)
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+            finally:
+                with lock:
+                    state['active'] -= 1
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    server.daemon_threads = True
+    server.throttled = 0
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def make_api(server: ThreadingHTTPServer, limit: int, rate: float) -> StockAPI:
+    """
+    ساخت کلاینت متصل به سرور محلی با محدودکننده جداگانه (هر سرور پورت و میزبان خود را دارد)
+    server: سرور محلی
+    limit: سقف هم‌زمانی
+    rate: سقف نرخ درخواست در ثانیه (0 برای نامحدود)
+    return: نمونه StockAPI
+    """
+    api = StockAPI()
+    api.base_url = f"http://127.0.0.1:{server.server_port}/"
+    limiter = get_limiter(api.base_url)
+    limiter.bucket.rate = rate
+    limiter.concurrency.maximum = limit
+    limiter.concurrency.limit = float(limit)
+    return api
+
+
+def run(symbol_count: int, latency_ms: float, days: int, concurrency: list,
+        capacity: int, rate: float):
+    """
+    اجرای بنچمارک و چاپ نتایج
+    symbol_count: تعداد نمادها
+    latency_ms: تأخیر هر پاسخ به میلی‌ثانیه
+    days: تعداد روزهای تاریخچه هر پاسخ
+    concurrency: لیست سقف‌های هم‌زمانی برای اندازه‌گیری
+    capacity: سقف درخواست‌های هم‌زمان سرور (0 برای نامحدود)
+    rate: سقف نرخ درخواست در ثانیه (0 برای نامحدود)
+    """
+    symbols = [f'SYM{i:04d}' for i in range(symbol_count)]
+    print(f"symbols: {symbol_count}  latency: {latency_ms:.0f} ms  rows/response: {days:,}"
+          f"  server capacity: {capacity or '-'}  rate limit: {rate or '-'}")
+
+    server = make_server(latency_ms / 1000, days, capacity)
+    try:
+        api = make_api(server, 1, rate)
+        start = time.perf_counter()
+        for symbol in symbols:
+            rows = api.get_stock_history(symbol)
+            assert rows is not None and len(rows) == days
+        sequential = time.perf_counter() - start
+        print(f"sequential loop             : {sequential:8.2f} s")
+    finally:
+        server.shutdown()
+
+    for limit in concurrency:
+        server = make_server(latency_ms / 1000, days, capacity)
+        try:
+            api = make_api(server, limit, rate)
+            start = time.perf_counter()
+            first = None
+            failed = 0
+            for symbol, rows, error in api.fetch_many(symbols, max_concurrency=limit):
+                if error is not None:
+                    failed += 1
+                if first is None:
+                    first = time.perf_counter() - start
+            elapsed = time.perf_counter() - start
+            stats = get_limiter(api.base_url).get_stats()
+            print(f"fetch_many (limit {limit:>3})      : {elapsed:8.2f} s"
+                  f"  first {first * 1000:6.1f} ms  speedup {sequential / elapsed:5.1f}x"
+                  f"  failed {failed:>3}  429s {server.throttled:>3}"
+                  f"  final limit {stats['concurrency_limit']}")
+        finally:
+            server.shutdown()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--symbols', type=int, default=300)
+    parser.add_argument('--latency', type=float, default=50)
+    parser.add_argument('--days', type=int, default=250)
+    parser.add_argument('--concurrency', type=int, nargs='+', default=[1, 8, 32])
+    parser.add_argument('--capacity', type=int, default=0)
+    parser.add_argument('--rate', type=float, default=0)
+    args = parser.parse_args()
+    run(args.symbols, args.latency, args.days, args.concurrency, args.capacity, args.rate)
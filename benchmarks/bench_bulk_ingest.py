@@ -0,0 +1,73 @@
+"""
+بنچمارک درج حجیم قیمت‌ها در پایگاه داده
+مقایسه مسیر قدیمی (درج ردیف به ردیف برای هر نماد) با bulk_save_stock_data
+
+اجرا:
+    python -m benchmarks.bench_bulk_ingest --symbols 100 --days 2500
+"""
+
+import argparse
+import os
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+from core.database_manager import DatabaseManager
+
+
+def make_history(days: int, seed: int) -> pd.DataFrame:
+    """
+    ساخت تاریخچه قیمت مصنوعی برای یک نماد
+    days: تعداد روزهای معاملاتی
+    seed: بذر تولید اعداد تصادفی
+    return: دیتافریم OHLCV
+    """
+    rng = np.random.default_rng(seed)
+    close = np.cumprod(1 + rng.normal(0, 0.02, days)) * 10000
+    return pd.DataFrame({
+        'date': pd.bdate_range('2015-01-01', periods=days).strftime('%Y-%m-%d'),
+        'open': np.round(close * 0.99),
+        'high': np.round(close * 1.02),
+        'low': np.round(close * 0.97),
+        'close': np.round(close),
+        'volume': rng.integers(1_000, 5_000_000, days)
+    })
+
+
+def run(symbol_count: int, days: int):
+    """
+    اجرای بنچمارک و چاپ نتایج
+    symbol_count: تعداد نمادها
+    days: تعداد روزهای هر نماد
+    """
+    histories = {f'SYM{i:04d}': make_history(days, i) for i in range(symbol_count)}
+    total_rows = symbol_count * days
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        # مسیر قدیمی: یک اتصال و درج ردیف به ردیف برای هر نماد
+        legacy_db = DatabaseManager(os.path.join(tmp, 'legacy.db'))
+        legacy_db._disconnect()
+        start = time.perf_counter()
+        for symbol, df in histories.items():
+            legacy_db.save_stock_data(symbol, df)
+        legacy_seconds = time.perf_counter() - start
+        
+        # مسیر جدید: یک تراکنش با executemany
+        bulk_db = DatabaseManager(os.path.join(tmp, 'bulk.db'))
+        bulk_db._disconnect()
+        stats = bulk_db.bulk_save_stock_data(histories)
+        
+    print(f"rows: {total_rows:,}")
+    print(f"per-row : {legacy_seconds:8.2f}s  {total_rows / legacy_seconds:12,.0f} rows/s")
+    print(f"bulk    : {stats['seconds']:8.2f}s  {stats['rows_per_sec']:12,.0f} rows/s")
+    print(f"speedup : {legacy_seconds / stats['seconds']:8.1f}x")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--symbols', type=int, default=100)
+    parser.add_argument('--days', type=int, default=2500)
+    args = parser.parse_args()
+    run(args.symbols, args.days)
@@ -0,0 +1,89 @@
+"""
+بنچمارک برخورد کش تاریخچه قیمت
+مقایسه مسیر قدیمی (to_dict و JSON، بازسازی با pd.DataFrame) با کدگذاری
+دودویی ستونی در جدول کش و فایل memmap جداگانه
+
+اجرا:
+    python -m benchmarks.bench_frame_cache --days 2500 --hits 500
+"""
+
+import argparse
+import json
+import os
+import tempfile
+import time
+
+import pandas as pd
+
+from benchmarks.bench_bulk_ingest import make_history
+from core.cache_store import CacheStore
+from core.frame_codec import deserialize, serialize
+
+
+def timed(func, repeats: int) -> float:
+    """
+    اندازه‌گیری میانگین زمان اجرای یک تابع
+    func: تابع بدون ورودی
+    repeats: تعداد تکرار
+    return: میانگین زمان به میکروثانیه
+    """
+    start = time.perf_counter()
+    for _ in range(repeats):
+        func()
+    return (time.perf_counter() - start) / repeats * 1e6
+
+
+def run(days: int, hits: int):
+    """
+    اجرای بنچمارک و چاپ نتایج
+    days: تعداد روزهای تاریخچه
+    hits: تعداد برخوردهای کش
+    """
+    frame = make_history(days, 0)
+    frame['date'] = pd.to_datetime(frame['date'])
+    frame = frame.set_index('date')
+
+    # مسیر قدیمی: کلیدهای Timestamp در JSON به متن تبدیل می‌شوند
+    legacy_dict = frame.to_dict()
+    legacy_text = json.dumps({
+        column: {str(key): value for key, value in values.items()}
+        for column, values in legacy_dict.items()
+    })
+    binary = serialize(frame)
+
+    restored = deserialize(binary)
+    pd.testing.assert_frame_equal(frame, restored)
+
+    legacy_memory = timed(lambda: pd.DataFrame(legacy_dict), hits)
+    legacy_json = timed(lambda: pd.DataFrame(json.loads(legacy_text)), max(1, hits // 10))
+    encode = timed(lambda: serialize(frame), hits)
+    decode = timed(lambda: deserialize(binary), hits)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        inline = CacheStore(os.path.join(tmp, 'inline.db'))
+        inline.put('history', frame, time.time() + 3600).result()
+        inline_hit = timed(lambda: inline.get('history'), hits)
+        inline.service.close()
+
+        blobs = CacheStore(os.path.join(tmp, 'blobs.db'), blob_dir=os.path.join(tmp, 'blobs'),
+                           blob_threshold=0)
+        blobs.put('history', frame, time.time() + 3600).result()
+        blob_hit = timed(lambda: blobs.get('history'), hits)
+        blobs.service.close()
+
+    print(f"rows: {days:,}  json size: {len(legacy_text):,} B  binary size: {len(binary):,} B")
+    print(f"legacy pd.DataFrame(dict)   : {legacy_memory:10.1f} us/hit")
+    print(f"legacy JSON + DataFrame     : {legacy_json:10.1f} us/hit")
+    print(f"binary encode               : {encode:10.1f} us")
+    print(f"binary decode               : {decode:10.1f} us/hit")
+    print(f"store hit (inline BLOB)     : {inline_hit:10.1f} us/hit")
+    print(f"store hit (memmap file)     : {blob_hit:10.1f} us/hit")
+    print(f"speedup vs legacy JSON      : {legacy_json / inline_hit:10.1f}x")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--days', type=int, default=2500)
+    parser.add_argument('--hits', type=int, default=500)
+    args = parser.parse_args()
+    run(args.days, args.hits)
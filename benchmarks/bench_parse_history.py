@@ -0,0 +1,125 @@
+"""
+بنچمارک تبدیل پاسخ متنی تاریخچه TSETMC
+مقایسه مسیر قدیمی (split ردیف به ردیف و ساخت دیکشنری برای هر ردیف و سپس دیتافریم)
+با parse_table روی پاسخ‌های چندساله ضبط شده یا مصنوعی
+
+اجرا:
+    python -m benchmarks.bench_parse_history --days 2500 --payloads 50
+    python -m benchmarks.bench_parse_history --malformed 0.01
+    python -m benchmarks.bench_parse_history --files data/payloads/*.txt
+"""
+
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+from benchmarks.bench_bulk_ingest import make_history
+from core.tsetmc_parser import HISTORY_COLUMNS, parse_table
+
+
+def make_payload(days: int, seed: int, malformed: float = 0.0) -> str:
+    """
+    ساخت پاسخ تاریخچه مصنوعی در قالب TseClient
+    days: تعداد روزهای معاملاتی
+    seed: بذر تولید اعداد تصادفی
+    malformed: سهم ردیف‌های خراب (ستون کم یا مقدار غیرعددی)
+    return: متن پاسخ
+    """
+    history = make_history(days, seed)
+    rows = [
+        f"{row.date},{row.open},{row.high},{row.low},{row.close},{row.volume},{row.close * row.volume}"
+        for row in history.itertuples()
+    ]
+    if malformed:
+        rng = np.random.default_rng(seed)
+        for i in rng.choice(days, int(days * malformed), replace=False):
+            rows[i] = rows[i].rsplit(',', 2)[0] if i % 2 else rows[i].replace(',', ',-,', 1)
+    return ';'.join(rows) + ';'
+
+
+def legacy_parse(text: str) -> pd.DataFrame:
+    """
+    مسیر قدیمی StockAPI.get_stock_history و ساخت دیتافریم در Prefetcher
+    (ردیف‌های ناقص کنار گذاشته می‌شوند؛ مقدار غیرعددی کل پاسخ را نامعتبر می‌کند)
+    text: متن پاسخ
+    return: دیتافریم تاریخچه
+    """
+    history = []
+    for row in text.split(";"):
+        if row:
+            items = row.split(",")
+            if len(items) >= 7:
+                history.append({
+                    "date": items[0],
+                    "open": float(items[1]),
+                    "high": float(items[2]),
+                    "low": float(items[3]),
+                    "close": float(items[4]),
+                    "volume": int(items[5]),
+                    "value": float(items[6])
+                })
+    return pd.DataFrame(history, columns=[name for name, _ in HISTORY_COLUMNS])
+
+
+def measure(parse, payloads: list) -> tuple:
+    """
+    اجرای یک تابع تبدیل روی تمام پاسخ‌ها
+    parse: تابع تبدیل
+    payloads: لیست متن پاسخ‌ها
+    return: (زمان به ثانیه، تعداد ردیف‌ها، تعداد پاسخ‌های ناموفق)
+    """
+    rows = 0
+    failed = 0
+    start = time.perf_counter()
+    for text in payloads:
+        try:
+            rows += len(parse(text))
+        except ValueError:
+            failed += 1
+    return time.perf_counter() - start, rows, failed
+
+
+def run(payloads: list, label: str):
+    """
+    اجرای بنچمارک و چاپ نتایج
+    payloads: لیست متن پاسخ‌ها
+    label: توضیح پاسخ‌ها برای چاپ
+    """
+    size = sum(len(text) for text in payloads)
+    print(f"{label}  payloads: {len(payloads)}  size: {size / 1e6:.1f} MB")
+
+    legacy_seconds, legacy_rows, legacy_failed = measure(legacy_parse, payloads)
+    print(f"legacy split + dicts + DataFrame : {legacy_seconds:8.3f} s"
+          f"  {legacy_rows / legacy_seconds:>12,.0f} rows/s  rows {legacy_rows:,}"
+          f"  failed payloads {legacy_failed}")
+
+    vector_seconds, vector_rows, vector_failed = measure(
+        lambda text: parse_table(text, HISTORY_COLUMNS), payloads
+    )
+    print(f"parse_table                      : {vector_seconds:8.3f} s"
+          f"  {vector_rows / vector_seconds:>12,.0f} rows/s  rows {vector_rows:,}"
+          f"  failed payloads {vector_failed}")
+    if legacy_failed:
+        print("speedup: - (legacy path rejected payloads with malformed rows)")
+    else:
+        print(f"speedup: {legacy_seconds / vector_seconds:.1f}x")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--payloads', type=int, default=50)
+    parser.add_argument('--days', type=int, default=2500)
+    parser.add_argument('--malformed', type=float, default=0.0)
+    parser.add_argument('--files', nargs='*', help='پاسخ‌های ضبط شده (متن خام هر پاسخ در یک فایل)')
+    args = parser.parse_args()
+    if args.files:
+        texts = []
+        for path in args.files:
+            with open(path, encoding='utf-8') as f:
+                texts.append(f.read())
+        run(texts, "recorded")
+    else:
+        texts = [make_payload(args.days, i, args.malformed) for i in range(args.payloads)]
+        run(texts, f"synthetic ({args.days:,} days, malformed {args.malformed:.1%})")
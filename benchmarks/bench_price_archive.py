@@ -0,0 +1,77 @@
+"""
+بنچمارک خواندن بازه‌ای تاریخچه قیمت
+مقایسه get_stock_data روی SQLite (read_sql_query) با آرشیو ستونی memmap
+
+اجرا:
+    python -m benchmarks.bench_price_archive --symbols 50 --days 2500 --reads 2000
+"""
+
+import argparse
+import os
+import tempfile
+import time
+
+import numpy as np
+
+from benchmarks.bench_bulk_ingest import make_history
+from core.database_manager import DatabaseManager
+from core.price_archive import PriceArchive
+
+
+def run(symbol_count: int, days: int, reads: int):
+    """
+    اجرای بنچمارک و چاپ نتایج
+    symbol_count: تعداد نمادها
+    days: تعداد روزهای هر نماد
+    reads: تعداد خواندن‌های بازه‌ای
+    """
+    histories = {f'SYM{i:04d}': make_history(days, i) for i in range(symbol_count)}
+    symbols = list(histories)
+    rng = np.random.default_rng(0)
+    dates = histories[symbols[0]]['date'].tolist()
+    
+    # بازه‌های تصادفی حدود یک ساله
+    requests = []
+    for _ in range(reads):
+        start = int(rng.integers(0, days - 250))
+        requests.append((symbols[int(rng.integers(0, symbol_count))], dates[start], dates[start + 250]))
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        db = DatabaseManager(os.path.join(tmp, 'market.db'))
+        db._disconnect()
+        db.bulk_save_stock_data(histories)
+        
+        start = time.perf_counter()
+        for symbol, first, last in requests:
+            db.get_stock_data(symbol, first, last)
+        sqlite_seconds = time.perf_counter() - start
+        
+        archive = PriceArchive(os.path.join(tmp, 'archive'))
+        start = time.perf_counter()
+        stats = archive.import_from_sqlite(db.db_path, 'daily_prices')
+        import_seconds = time.perf_counter() - start
+        
+        start = time.perf_counter()
+        for symbol, first, last in requests:
+            archive.read(symbol, first, last)
+        read_seconds = time.perf_counter() - start
+        
+        start = time.perf_counter()
+        for symbol, first, last in requests:
+            archive.read_frame(symbol, first, last)
+        frame_seconds = time.perf_counter() - start
+        
+    print(f"rows imported: {stats['rows']:,} in {import_seconds:.2f}s")
+    print(f"sqlite read_sql_query : {sqlite_seconds / reads * 1e6:10.1f} us/read")
+    print(f"archive read (arrays) : {read_seconds / reads * 1e6:10.1f} us/read")
+    print(f"archive read_frame    : {frame_seconds / reads * 1e6:10.1f} us/read")
+    print(f"speedup (arrays)      : {sqlite_seconds / read_seconds:10.1f}x")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--symbols', type=int, default=50)
+    parser.add_argument('--days', type=int, default=2500)
+    parser.add_argument('--reads', type=int, default=2000)
+    args = parser.parse_args()
+    run(args.symbols, args.days, args.reads)
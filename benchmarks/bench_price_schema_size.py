@@ -0,0 +1,159 @@
+"""
+گزارش کاهش حجم جدول قیمت‌ها پس از مهاجرت نسخه 6
+مقایسه طرح قبلی (نماد متنی و قیمت REAL) با symbol_ids و price_history
+(شناسه عددی، قیمت INTEGER به ریال، WITHOUT ROWID روی (symbol_id, date))
+
+نمادها و کدهای ابزار از stocknames در unused/tsemodule5.py خوانده می‌شوند
+
+اجرا:
+    python -m benchmarks.bench_price_schema_size --symbols 300 --days 1000
+"""
+
+import argparse
+import ast
+import os
+import sqlite3
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+from core.migrations import apply_migrations
+
+STOCKNAMES_PATH = os.path.join(os.path.dirname(__file__), '..', 'unused', 'tsemodule5.py')
+
+
+def load_stocknames() -> dict:
+    """
+    خواندن دیکشنری stocknames بدون import کردن ماژول
+    return: دیکشنری نماد به کد ابزار
+    """
+    with open(STOCKNAMES_PATH, encoding='utf-8') as f:
+        tree = ast.parse(f.read())
+    for node in tree.body:
+        if isinstance(node, ast.Assign) and getattr(node.targets[0], 'id', None) == 'stocknames':
+            return ast.literal_eval(node.value)
+    return {}
+
+
+def object_sizes(conn: sqlite3.Connection) -> dict:
+    """
+    حجم هر جدول و ایندکس بر اساس جدول مجازی dbstat
+    conn: اتصال پایگاه داده
+    return: دیکشنری نام به بایت (خالی اگر dbstat در دسترس نباشد)
+    """
+    try:
+        rows = conn.execute("SELECT name, SUM(pgsize) FROM dbstat GROUP BY name").fetchall()
+    except sqlite3.Error:
+        return {}
+    return dict(rows)
+
+
+def file_size(conn: sqlite3.Connection) -> int:
+    """
+    حجم کل پایگاه داده پس از VACUUM
+    conn: اتصال پایگاه داده
+    return: حجم به بایت
+    """
+    conn.execute("VACUUM")
+    page_count = conn.execute("PRAGMA page_count").fetchone()[0]
+    page_size = conn.execute("PRAGMA page_size").fetchone()[0]
+    return page_count * page_size
+
+
+# خواندن یک سال قیمت در طرح قبلی
+OLD_RANGE_QUERY = """
+    SELECT date, open, high, low, close, volume FROM stock_prices
+    WHERE symbol = ? AND date >= '2016-01-01' AND date <= '2016-12-31'
+    ORDER BY date
+"""
+
+# همان خواندن روی price_history (مانند DatabaseManager.get_stock_prices)
+NEW_RANGE_QUERY = """
+    SELECT h.date, h.open, h.high, h.low, h.close, h.volume
+    FROM symbol_ids s
+    JOIN price_history h ON h.symbol_id = s.id
+    WHERE s.symbol = ? AND h.date >= 20160101 AND h.date <= 20161231
+    ORDER BY h.date
+"""
+
+
+def range_read_ms(conn: sqlite3.Connection, query: str, symbols: list, reads: int = 200) -> float:
+    """
+    میانگین زمان خواندن یک سال قیمت یک نماد
+    conn: اتصال پایگاه داده
+    query: دستور خواندن
+    symbols: لیست نمادها
+    reads: تعداد خواندن‌ها
+    return: میلی‌ثانیه برای هر خواندن
+    """
+    start = time.perf_counter()
+    for i in range(reads):
+        conn.execute(query, (symbols[i % len(symbols)],)).fetchall()
+    return (time.perf_counter() - start) / reads * 1000
+
+
+def run(symbol_count: int, days: int):
+    """
+    ساخت پایگاه داده نمونه، اجرای مهاجرت و چاپ گزارش
+    symbol_count: تعداد نمادها
+    days: تعداد روزهای هر نماد
+    """
+    stocknames = load_stocknames()
+    symbols = list(stocknames)[:symbol_count]
+    dates = pd.bdate_range('2015-01-01', periods=days).strftime('%Y-%m-%d').tolist()
+    rng = np.random.default_rng(0)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        conn = sqlite3.connect(os.path.join(tmp, 'stock_app.db'))
+        apply_migrations(conn, target=5)
+        conn.executemany(
+            "INSERT INTO stock_list (symbol, name, code) VALUES (?, ?, ?)",
+            [(symbol, symbol, stocknames[symbol]) for symbol in symbols]
+        )
+        for symbol in symbols:
+            close = np.round(np.cumprod(1 + rng.normal(0, 0.02, days)) * 10000)
+            conn.executemany("""
+                INSERT INTO stock_prices (symbol, date, open, high, low, close, volume)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+            """, zip([symbol] * days, dates, (close * 0.99).round().tolist(),
+                     (close * 1.02).round().tolist(), (close * 0.97).round().tolist(),
+                     close.tolist(), rng.integers(1_000, 5_000_000, days).tolist()))
+        conn.commit()
+
+        before_total = file_size(conn)
+        before = object_sizes(conn)
+        before_read = range_read_ms(conn, OLD_RANGE_QUERY, symbols)
+
+        start = time.perf_counter()
+        apply_migrations(conn)
+        conn.commit()
+        migrate_seconds = time.perf_counter() - start
+
+        after_total = file_size(conn)
+        after = object_sizes(conn)
+        after_read = range_read_ms(conn, NEW_RANGE_QUERY, symbols)
+        conn.close()
+
+    rows = symbol_count * days
+    print(f"rows: {rows:,}  symbols: {symbol_count}  migration: {migrate_seconds:.2f}s")
+    if before:
+        old_prices = before.get('stock_prices', 0) + before.get('sqlite_autoindex_stock_prices_1', 0) \
+            + before.get('idx_stock_prices_symbol_date', 0)
+        new_prices = after.get('price_history', 0) + after.get('symbol_ids', 0) \
+            + after.get('sqlite_autoindex_symbol_ids_1', 0) + after.get('idx_symbol_ids_inscode', 0)
+        print(f"price storage : {old_prices / 1e6:10.2f} MB -> {new_prices / 1e6:10.2f} MB "
+              f"({(1 - new_prices / old_prices) * 100:5.1f}% smaller)")
+        print(f"bytes per row : {old_prices / rows:10.1f}    -> {new_prices / rows:10.1f}")
+    print(f"database file : {before_total / 1e6:10.2f} MB -> {after_total / 1e6:10.2f} MB "
+          f"({(1 - after_total / before_total) * 100:5.1f}% smaller)")
+    print(f"1y range read : {before_read:10.3f} ms -> {after_read:10.3f} ms")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--symbols', type=int, default=300)
+    parser.add_argument('--days', type=int, default=1000)
+    args = parser.parse_args()
+    run(args.symbols, args.days)
@@ -0,0 +1,87 @@
+"""
+بررسی حذف گروهی کلیدهای کش یک نماد
+invalidate(symbol=X) باید دقیقاً price_X، history_X، history_X_<شروع>_<پایان>، history_ranges_X
+و indicator_*_X را (در حافظه و ذخیره‌ساز) حذف کند و کلیدهای نمادهای دیگر بمانند
+
+اجرا:
+    python -m benchmarks.check_invalidate --symbols 500
+"""
+
+import argparse
+import tempfile
+import time
+
+from core.cache_manager import CacheManager
+
+
+def symbol_keys(symbol: str) -> list:
+    """
+    کلیدهای کش یک نماد در قالب‌های مختلف
+    symbol: نماد
+    return: لیست کلیدها
+    """
+    return [
+        f'price_{symbol}',
+        f'history_{symbol}',
+        f'history_ranges_{symbol}',
+        f'history_{symbol}_2024-01-01_2024-02-01',
+        f'history_{symbol}_20240201_20240301',
+        f'indicator_rsi_{symbol}',
+        f'indicator_sma_20_{symbol}',
+    ]
+
+
+def fill(cache: CacheManager, symbols: list):
+    """
+    پر کردن کش با کلیدهای نمادها و چند کلید عمومی
+    cache: کش
+    symbols: لیست نمادها
+    """
+    for symbol in symbols:
+        for key in symbol_keys(symbol):
+            cache.set(key, 1.0)
+    for key in ('market_watch', 'market_status', 'symbols', 'calendar_2024_1'):
+        cache.set(key, 1.0)
+    cache.save_cache()
+
+
+def check(cache: CacheManager, symbols: list):
+    """
+    بررسی حذف کلیدهای یک نماد بدون اثر بر نمادهای دیگر
+    (نام نمادها پیشوند یکدیگر هستند، مانند S1 و S10)
+    cache: کش
+    symbols: لیست نمادها
+    """
+    target, other = symbols[1], symbols[10]
+    cache.invalidate(symbol=target).result()
+    for key in symbol_keys(target):
+        assert cache.get(key) is None, key
+        assert cache.store.get(key) is None, key
+    for key in symbol_keys(other):
+        assert cache.get(key) == 1.0, key
+    assert cache.get('market_watch') == 1.0
+
+
+def run(symbols: int):
+    """
+    اجرای بررسی و چاپ نتیجه
+    symbols: تعداد نمادها
+    """
+    names = [f'S{i}' for i in range(max(symbols, 11))]
+    with tempfile.TemporaryDirectory() as tmp:
+        cache = CacheManager(tmp)
+        fill(cache, names)
+        start = time.perf_counter()
+        check(cache, names)
+        elapsed = time.perf_counter() - start
+        cache.close()
+
+    print(f"symbols: {len(names):,}  keys: {len(names) * len(symbol_keys('X')) + 4:,}")
+    print(f"invalidate(symbol): ok  ({elapsed * 1e3:.2f} ms)")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--symbols', type=int, default=500)
+    args = parser.parse_args()
+    run(args.symbols)
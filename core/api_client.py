@@ -12,7 +12,8 @@ import json
 from typing import Dict, List, Optional
 from datetime import datetime, timedelta
 from .exceptions import APIError
-from .config import API_CONFIG
+from .config import API_CONFIG, Config
+from . import resilience
 import pandas as pd
 
 class APIClient:
@@ -23,6 +24,7 @@ class APIClient:
         """
         self.api_key = api_key or API_CONFIG['api_key']
         self.base_url = API_CONFIG['base_url']
+        self.retry_count = Config().get("api", "retry_count") or 3
         self.session = requests.Session()
         self.session.headers.update({
             'Authorization': f'Bearer {self.api_key}',
@@ -39,11 +41,17 @@ class APIClient:
         """
         try:
             url = f"{self.base_url}/{endpoint}"
-            response = self.session.request(
-                method=method,
-                url=url,
-                params=params,
-                timeout=10
+            # قطع‌کننده مدار برای هر گروه نقطه پایانی (مثلاً market یا stock)
+            response = resilience.call(
+                url,
+                endpoint.split('/', 1)[0],
+                lambda: self.session.request(
+                    method=method,
+                    url=url,
+                    params=params,
+                    timeout=10
+                ),
+                attempts=self.retry_count
             )
             
             response.raise_for_status()
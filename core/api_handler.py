@@ -3,10 +3,16 @@
 """
 
 import requests
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime
 import json
-import time
+from requests.adapters import HTTPAdapter
 from core.config import Config
+from core.exceptions import APIError
+from core.market_watch import MarketWatchFeed, MarketWatchSnapshot
+from core.tsetmc_parser import (HISTORY_COLUMNS, MARKET_WATCH_COLUMNS, STOCK_LIST_COLUMNS,
+                                parse_table)
+from core import resilience
 
 class StockAPI:
     """کلاس مدیریت ارتباط با API بازار بورس"""
@@ -17,119 +23,232 @@ class StockAPI:
         self.base_url = self.config.get("api", "base_url")
         self.timeout = self.config.get("api", "timeout")
         self.retry_count = self.config.get("api", "retry_count")
+        self.max_concurrency = self.config.get("api", "max_concurrency") or 8
         self.session = requests.Session()
+        self._pool_size = 0
+        self._ensure_pool(self.max_concurrency)
+        # نمای دیده‌بان بازار در حافظه که با هر دریافت فقط ردیف‌های تغییر کرده را می‌گیرد
+        self.market_watch = MarketWatchFeed(
+            self.get_market_watch_delta,
+            MarketWatchSnapshot([column for column in MARKET_WATCH_COLUMNS if column[0] != 'symbol'])
+        )
         
-    def get_stock_info(self, symbol):
+    def _ensure_pool(self, size):
+        """
+        تنظیم اندازه مخزن اتصال‌های session برای درخواست‌های هم‌زمان
+        (مخزن پیش‌فرض 10 اتصال دارد و اتصال‌های اضافه پس از هر درخواست بسته می‌شوند)
+        size: حداقل تعداد اتصال‌های قابل نگهداری
+        """
+        if size <= self._pool_size:
+            return
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=size)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self._pool_size = size
+        
+    def get_stock_info(self, symbol, timeout=None):
         """
         دریافت اطلاعات سهم
         symbol: نماد سهم
+        timeout: مهلت درخواست به ثانیه (پیش‌فرض: تنظیمات api.timeout)
         return: دیکشنری اطلاعات سهم
         """
         try:
-            # ارسال درخواست به API
-            params = {
-                "i": symbol,
-                "t": "stock"
-            }
-            response = self.send_request("GET", params=params)
-            
-            if response.status_code == 200:
-                # پردازش پاسخ
-                data = response.text.split(";")
-                if len(data) >= 5:
-                    return {
-                        "symbol": symbol,
-                        "name": data[0],
-                        "last_price": float(data[1]),
-                        "change": float(data[2]),
-                        "volume": int(data[3]),
-                        "value": float(data[4])
-                    }
-            return None
+            return self.fetch_stock_info(symbol, timeout)
             
         except Exception as e:
             print(f"Error getting stock info: {str(e)}")
             return None
             
-    def get_stock_history(self, symbol, start_date=None, end_date=None):
+    def fetch_stock_info(self, symbol, timeout=None):
+        """
+        دریافت اطلاعات سهم با گزارش خطا به صورت استثنا (برای دریافت گروهی)
+        symbol: نماد سهم
+        timeout: مهلت درخواست به ثانیه (پیش‌فرض: تنظیمات api.timeout)
+        return: دیکشنری اطلاعات سهم یا None اگر پاسخ داده‌ای نداشته باشد
+        raises: APIError یا CircuitOpenError در صورت خطای ارتباط یا پاسخ نامعتبر
+        """
+        # ارسال درخواست به API
+        params = {
+            "i": symbol,
+            "t": "stock"
+        }
+        response = self.send_request("GET", params=params, timeout=timeout)
+        if response.status_code != 200:
+            raise APIError(f"دریافت اطلاعات {symbol} ناموفق بود: HTTP {response.status_code}")
+            
+        # پردازش پاسخ
+        data = response.text.split(";")
+        if len(data) < 5:
+            return None
+        try:
+            return {
+                "symbol": symbol,
+                "name": data[0],
+                "last_price": float(data[1]),
+                "change": float(data[2]),
+                "volume": int(data[3]),
+                "value": float(data[4])
+            }
+        except ValueError as e:
+            raise APIError(f"پاسخ نامعتبر برای {symbol}: {str(e)}")
+            
+    def get_stock_history(self, symbol, start_date=None, end_date=None, timeout=None):
         """
         دریافت تاریخچه قیمت سهم
         symbol: نماد سهم
         start_date: تاریخ شروع (اختیاری)
         end_date: تاریخ پایان (اختیاری)
-        return: لیست تاریخچه قیمت
+        timeout: مهلت درخواست به ثانیه (پیش‌فرض: تنظیمات api.timeout)
+        return: دیتافریم تاریخچه قیمت (date، open، high، low، close، volume، value)
         """
         try:
-            # ارسال درخواست به API
-            params = {
-                "i": symbol,
-                "t": "history"
-            }
-            if start_date:
-                params["start"] = start_date
-            if end_date:
-                params["end"] = end_date
-                
-            response = self.send_request("GET", params=params)
-            
-            if response.status_code == 200:
-                # پردازش پاسخ
-                data = response.text.split(";")
-                history = []
-                for row in data:
-                    if row:
-                        items = row.split(",")
-                        if len(items) >= 7:
-                            history.append({
-                                "date": items[0],
-                                "open": float(items[1]),
-                                "high": float(items[2]),
-                                "low": float(items[3]),
-                                "close": float(items[4]),
-                                "volume": int(items[5]),
-                                "value": float(items[6])
-                            })
-                return history
-            return None
+            return self.fetch_stock_history(symbol, start_date, end_date, timeout)
             
         except Exception as e:
             print(f"Error getting stock history: {str(e)}")
             return None
             
+    def fetch_stock_history(self, symbol, start_date=None, end_date=None, timeout=None):
+        """
+        دریافت تاریخچه قیمت سهم با گزارش خطا به صورت استثنا (برای دریافت گروهی)
+        symbol: نماد سهم
+        start_date: تاریخ شروع (اختیاری)
+        end_date: تاریخ پایان (اختیاری)
+        timeout: مهلت درخواست به ثانیه (پیش‌فرض: تنظیمات api.timeout)
+        return: دیتافریم تاریخچه قیمت (date، open، high، low، close، volume، value)
+        raises: APIError یا CircuitOpenError در صورت خطای ارتباط یا پاسخ نامعتبر
+        """
+        # ارسال درخواست به API
+        params = {
+            "i": symbol,
+            "t": "history"
+        }
+        if start_date:
+            params["start"] = start_date
+        if end_date:
+            params["end"] = end_date
+            
+        response = self.send_request("GET", params=params, timeout=timeout)
+        if response.status_code != 200:
+            raise APIError(f"دریافت تاریخچه {symbol} ناموفق بود: HTTP {response.status_code}")
+            
+        # پردازش یکجای پاسخ به ستون‌های نوع‌دار
+        history = parse_table(response.text, HISTORY_COLUMNS)
+        if history.attrs['malformed']:
+            print(f"Skipped {history.attrs['malformed']} malformed history rows for {symbol}")
+        return history
+            
+    def fetch_many(self, symbols, fetch=None, max_concurrency=None, timeout=None):
+        """
+        دریافت هم‌زمان داده‌های چند نماد با سقف تعداد درخواست‌های موازی
+        نتایج به ترتیب اتمام (نه ترتیب ورودی) برگردانده می‌شوند تا پیشرفت قابل نمایش باشد؛
+        با توقف پیمایش، درخواست‌های شروع نشده لغو می‌شوند
+        symbols: لیست نمادها
+        fetch: تابع دریافت با ورودی (نماد، timeout) که خطا را به صورت استثنا گزارش کند
+               تا علت خطا به نتیجه برسد (پیش‌فرض: fetch_stock_history)
+        max_concurrency: حداکثر درخواست‌های هم‌زمان (پیش‌فرض: تنظیمات api.max_concurrency)
+        timeout: مهلت هر درخواست به ثانیه (پیش‌فرض: تنظیمات api.timeout)
+        return: مولد (نماد، داده، پیام خطا)
+        """
+        symbols = list(symbols)
+        if not symbols:
+            return
+        fetch = fetch or (lambda symbol, timeout: self.fetch_stock_history(symbol, timeout=timeout))
+        workers = min(max_concurrency or self.max_concurrency, len(symbols))
+        self._ensure_pool(workers)
+        
+        executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="api-fetch")
+        try:
+            futures = {executor.submit(fetch, symbol, timeout): symbol for symbol in symbols}
+            for future in as_completed(futures):
+                symbol = futures[future]
+                try:
+                    data = future.result()
+                except Exception as e:
+                    yield symbol, None, str(e)
+                    continue
+                if data is None:
+                    yield symbol, None, "داده‌ای دریافت نشد"
+                else:
+                    yield symbol, data, None
+        finally:
+            executor.shutdown(wait=False, cancel_futures=True)
+            
+    def get_stocks_history(self, symbols, start_date=None, end_date=None,
+                           max_concurrency=None, timeout=None):
+        """
+        دریافت هم‌زمان تاریخچه قیمت چند سهم
+        symbols: لیست نمادها
+        start_date: تاریخ شروع (اختیاری)
+        end_date: تاریخ پایان (اختیاری)
+        max_concurrency: حداکثر درخواست‌های هم‌زمان
+        timeout: مهلت هر درخواست به ثانیه
+        return: مولد (نماد، دیتافریم تاریخچه، پیام خطا) به ترتیب اتمام
+        """
+        return self.fetch_many(
+            symbols,
+            lambda symbol, timeout: self.fetch_stock_history(symbol, start_date, end_date, timeout),
+            max_concurrency, timeout
+        )
+        
+    def get_stocks_info(self, symbols, max_concurrency=None, timeout=None):
+        """
+        دریافت هم‌زمان اطلاعات چند سهم
+        symbols: لیست نمادها
+        max_concurrency: حداکثر درخواست‌های هم‌زمان
+        timeout: مهلت هر درخواست به ثانیه
+        return: مولد (نماد، دیکشنری اطلاعات، پیام خطا) به ترتیب اتمام
+        """
+        return self.fetch_many(symbols, self.fetch_stock_info, max_concurrency, timeout)
+            
     def get_market_watch(self):
         """
         دریافت دیده‌بان بازار
-        return: لیست اطلاعات سهام
+        فقط تغییرات پس از دریافت قبلی گرفته و روی نمای حافظه (market_watch) اعمال می‌شوند
+        return: دیتافریم اطلاعات سهام (symbol، name، last_price، change، volume)
         """
         try:
-            # ارسال درخواست به API
-            params = {
-                "t": "market"
-            }
-            response = self.send_request("GET", params=params)
-            
-            if response.status_code == 200:
-                # پردازش پاسخ
-                data = response.text.split(";")
-                stocks = []
-                for row in data:
-                    if row:
-                        items = row.split(",")
-                        if len(items) >= 5:
-                            stocks.append({
-                                "symbol": items[0],
-                                "name": items[1],
-                                "last_price": float(items[2]),
-                                "change": float(items[3]),
-                                "volume": int(items[4])
-                            })
-                return stocks
-            return None
+            self.market_watch.poll()
+            frame = self.market_watch.snapshot.to_frame().reset_index()
+            return frame.astype({name: 'int64' for name, kind in MARKET_WATCH_COLUMNS if kind is int})
             
         except Exception as e:
             print(f"Error getting market watch: {str(e)}")
             return None
             
+    def get_market_watch_delta(self, ref_id=0, timeout=None):
+        """
+        دریافت تغییرات دیده‌بان بازار پس از یک شناسه مرجع
+        پاسخ به شکل "refid@ردیف‌ها" است؛ پاسخ بدون شناسه مرجع دیده‌بان کامل حساب می‌شود
+        ref_id: شناسه مرجع آخرین دریافت (0 برای دیده‌بان کامل)
+        timeout: مهلت درخواست به ثانیه (پیش‌فرض: تنظیمات api.timeout)
+        return: (شناسه مرجع جدید، لیست ردیف‌های تغییر کرده، کامل بودن پاسخ)
+        raises: APIError در صورت خطای ارتباط یا پاسخ نامعتبر
+        """
+        params = {
+            "t": "market",
+            "refid": ref_id
+        }
+        response = self.send_request("GET", params=params, timeout=timeout)
+        if response.status_code != 200:
+            raise APIError(f"دریافت دیده‌بان بازار ناموفق بود: HTTP {response.status_code}")
+            
+        header, separator, body = response.text.partition("@")
+        if not separator:
+            # سرور بدون پشتیبانی از دریافت تدریجی
+            return 0, self._parse_market_watch(response.text).to_dict("records"), True
+        new_ref_id = int(header) if header.strip().isdigit() else 0
+        return new_ref_id, self._parse_market_watch(body).to_dict("records"), not ref_id
+        
+    def _parse_market_watch(self, text):
+        """
+        تبدیل متن دیده‌بان بازار به دیتافریم
+        text: متن پاسخ (ردیف‌ها با ';' و ستون‌ها با ',' جدا شده‌اند)
+        return: دیتافریم اطلاعات سهام
+        """
+        return parse_table(text, MARKET_WATCH_COLUMNS)
+            
     def get_index_info(self):
         """
         دریافت اطلاعات شاخص‌ها
@@ -161,7 +280,7 @@ class StockAPI:
     def get_stocks_list(self):
         """
         دریافت لیست کامل سهام
-        return: لیست دیکشنری‌های اطلاعات سهام
+        return: دیتافریم اطلاعات سهام (symbol، name، code، category)
         """
         try:
             # ارسال درخواست به API
@@ -171,20 +290,8 @@ class StockAPI:
             response = self.send_request("GET", params=params)
             
             if response.status_code == 200:
-                # پردازش پاسخ
-                data = response.text.split(";")
-                stocks = []
-                for row in data:
-                    if row:
-                        items = row.split(",")
-                        if len(items) >= 4:
-                            stocks.append({
-                                "symbol": items[0],
-                                "name": items[1],
-                                "code": items[2],
-                                "category": items[3]
-                            })
-                return stocks
+                # پردازش یکجای پاسخ
+                return parse_table(response.text, STOCK_LIST_COLUMNS)
             return None
             
         except Exception as e:
@@ -223,26 +330,25 @@ class StockAPI:
             print(f"Error getting important news: {str(e)}")
             return None
             
-    def send_request(self, method, params=None):
+    def send_request(self, method, params=None, timeout=None):
         """
         ارسال درخواست به API
+        نرخ و هم‌زمانی درخواست‌ها با محدودکننده مشترک میزبان کنترل و خطاهای موقت
+        با تأخیر نمایی تلاش مجدد می‌شوند؛ هر نوع داده (پارامتر t) قطع‌کننده مدار خود را دارد
         method: متد درخواست (GET/POST)
         params: پارامترهای درخواست
+        timeout: مهلت درخواست به ثانیه (پیش‌فرض: تنظیمات api.timeout)
         return: پاسخ درخواست
+        raises: APIError پس از آخرین تلاش ناموفق یا CircuitOpenError در زمان قطع بودن مدار
         """
-        for i in range(self.retry_count):
-            try:
-                response = self.session.request(
-                    method,
-                    self.base_url,
-                    params=params,
-                    timeout=self.timeout
-                )
-                return response
-                
-            except requests.exceptions.RequestException as e:
-                print(f"Request failed (attempt {i+1}/{self.retry_count}): {str(e)}")
-                if i < self.retry_count - 1:
-                    time.sleep(1)  # تاخیر قبل از تلاش مجدد
-                    
-        return None
\ No newline at end of file
+        return resilience.call(
+            self.base_url,
+            (params or {}).get("t", "default"),
+            lambda: self.session.request(
+                method,
+                self.base_url,
+                params=params,
+                timeout=timeout or self.timeout
+            ),
+            attempts=self.retry_count
+        )
\ No newline at end of file
@@ -9,20 +9,42 @@
 
 import os
 import json
+import threading
 import time
 from datetime import datetime, timedelta
+from .config import Config
 from .constants import FILE_PATHS
 from .exceptions import FileError
+from .expiry_index import ExpiryIndex, ExpirySweeper
+from .memory_cache import MemoryCache
 
 class Cache:
-    def __init__(self):
+    def __init__(self, memory_limit=None, max_items=None):
         """
         سازنده کلاس Cache
         راه‌اندازی سیستم کش با تنظیمات پایه
-        """
+        memory_limit: سقف حجم داده‌ها به بایت (پیش‌فرض: تنظیمات cache.memory_limit_mb)
+        max_items: سقف تعداد داده‌ها (پیش‌فرض: تنظیمات cache.max_items)
+        """
+        config = Config()
+        if memory_limit is None:
+            memory_limit = int((config.get("cache", "memory_limit_mb") or 0) * 1024 * 1024)
+        if max_items is None:
+            max_items = config.get("cache", "max_items") or 0
+            
         self.cache_dir = FILE_PATHS['cache']
-        self.cache = {}
         self.expiry_times = {}
+        # expiry_times در thread پاکسازی هم تغییر می‌کند؛ قفل جداگانه برای نوشتن فایل
+        # (قفل‌ها هنگام دسترسی به لایه حافظه نگه داشته نمی‌شوند تا با on_evict بن‌بست نشود)
+        self._lock = threading.RLock()
+        self._file_lock = threading.Lock()
+        self.expiry = ExpiryIndex()
+        self.sweeper = ExpirySweeper(self.cleanup_expired)
+        # داده‌های حذف شده به دلیل سقف حافظه زمان انقضای خود را هم از دست می‌دهند
+        self.cache = MemoryCache(
+            max_bytes=memory_limit, max_items=max_items,
+            on_evict=lambda key, value: self._forget(key)
+        )
         
         # ایجاد دایرکتوری کش اگر وجود نداشته باشد
         os.makedirs(self.cache_dir, exist_ok=True)
@@ -40,8 +62,13 @@ class Cache:
             if os.path.exists(cache_file):
                 with open(cache_file, 'r', encoding='utf-8') as f:
                     data = json.load(f)
-                    self.cache = data.get('data', {})
-                    self.expiry_times = data.get('expiry', {})
+                    expiry_times = data.get('expiry', {})
+                    with self._lock:
+                        self.expiry_times = dict(expiry_times)
+                    for key, expires_at in expiry_times.items():
+                        self.expiry.push(key, expires_at)
+                    for key, value in data.get('data', {}).items():
+                        self.cache[key] = value
                     
                 # حذف داده‌های منقضی شده
                 self.cleanup_expired()
@@ -55,11 +82,14 @@ class Cache:
         """
         try:
             cache_file = os.path.join(self.cache_dir, 'cache.json')
+            items = dict(self.cache.items())
+            with self._lock:
+                expiry_times = dict(self.expiry_times)
             data = {
-                'data': self.cache,
-                'expiry': self.expiry_times
+                'data': items,
+                'expiry': expiry_times
             }
-            with open(cache_file, 'w', encoding='utf-8') as f:
+            with self._file_lock, open(cache_file, 'w', encoding='utf-8') as f:
                 json.dump(data, f, ensure_ascii=False, indent=4)
                 
         except Exception as e:
@@ -73,9 +103,10 @@ class Cache:
         expire_minutes: زمان انقضا به دقیقه
         """
         self.cache[key] = value
-        self.expiry_times[key] = (
-            datetime.now() + timedelta(minutes=expire_minutes)
-        ).timestamp()
+        expires_at = (datetime.now() + timedelta(minutes=expire_minutes)).timestamp()
+        with self._lock:
+            self.expiry_times[key] = expires_at
+        self.expiry.push(key, expires_at)
         self.save_cache()
     
     def get(self, key, default=None):
@@ -96,15 +127,26 @@ class Cache:
         """
         if key in self.cache:
             del self.cache[key]
-            del self.expiry_times[key]
+            self._forget(key)
             self.save_cache()
     
+    def _forget(self, key):
+        """
+        حذف زمان انقضای یک کلید
+        key: کلید داده
+        """
+        with self._lock:
+            self.expiry_times.pop(key, None)
+        self.expiry.discard(key)
+    
     def clear(self):
         """
         پاک کردن تمام داده‌های کش
         """
         self.cache.clear()
-        self.expiry_times.clear()
+        with self._lock:
+            self.expiry_times.clear()
+        self.expiry.clear()
         self.save_cache()
     
     def is_expired(self, key):
@@ -113,21 +155,37 @@ class Cache:
         key: کلید داده
         return: True اگر منقضی شده باشد
         """
-        if key in self.expiry_times:
-            return datetime.now().timestamp() > self.expiry_times[key]
-        return True
+        with self._lock:
+            expires_at = self.expiry_times.get(key)
+        if expires_at is None:
+            return True
+        return datetime.now().timestamp() > expires_at
     
     def cleanup_expired(self):
         """
         پاکسازی داده‌های منقضی شده
+        فقط کلیدهای منقضی از نمایه انقضا استخراج و فایل کش یک‌بار ذخیره می‌شود
+        return: تعداد داده‌های حذف شده
         """
-        expired_keys = [
-            key for key in self.cache.keys()
-            if self.is_expired(key)
-        ]
-        
+        expired_keys = self.expiry.pop_expired()
         for key in expired_keys:
-            self.delete(key)
+            self.cache.pop(key)
+        with self._lock:
+            for key in expired_keys:
+                self.expiry_times.pop(key, None)
+            
+        self.last_cleanup = datetime.now()
+        if expired_keys:
+            self.save_cache()
+        return len(expired_keys)
+    
+    def start_sweeper(self, interval=30):
+        """
+        شروع پاکسازی دوره‌ای داده‌های منقضی در پس‌زمینه
+        interval: فاصله پاکسازی (ثانیه)
+        """
+        self.sweeper.interval = interval
+        self.sweeper.start()
     
     def get_cache_size(self):
         """
@@ -149,5 +207,6 @@ class Cache:
             'total_items': len(self.cache),
             'expired_items': len([k for k in self.cache if self.is_expired(k)]),
             'cache_size': self.get_cache_size(),
-            'last_cleanup': getattr(self, 'last_cleanup', None)
+            'last_cleanup': getattr(self, 'last_cleanup', None),
+            'memory': self.cache.get_stats()
         } 
\ No newline at end of file
@@ -4,55 +4,154 @@
 - ذخیره موقت داده‌های پرکاربرد
 - مدیریت زمان انقضای کش
 - پاکسازی خودکار کش
+- حذف گروهی کلیدهای یک نماد یا یک فضای نام
+- ذخیره پایدار هر کلید به صورت جداگانه و خواندن تنبل از SQLite
 - بهینه‌سازی عملکرد برنامه
 """
 
-import json
+import logging
+import threading
 import time
-from datetime import datetime, timedelta
-from typing import Any, Dict, Optional
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional
 from .exceptions import CacheError
-from .config import FILE_PATHS
+from .constants import FILE_PATHS
+from .cache_store import CacheStore
+from .expiry_index import ExpiryIndex, ExpirySweeper
+from .config import Config
+from .cache_metrics import CacheMetrics
+from .key_index import KeyIndex, namespace_of
+from .memory_cache import MemoryCache
+from .single_flight import SingleFlight
 
 class CacheManager:
-    def __init__(self, cache_dir=FILE_PATHS['cache']):
+    def __init__(self, cache_dir=FILE_PATHS['cache'], memory_limit: Optional[int] = None,
+                 max_items: Optional[int] = None):
         """
         سازنده کلاس CacheManager
+        داده‌ها در جدول کلید-مقدار SQLite ذخیره و هنگام اولین دسترسی خوانده می‌شوند
+        (دیتافریم‌ها و آرایه‌ها با کدگذاری دودویی ستونی)؛
+        داده‌های پرکاربرد در لایه حافظه LRU با سقف حجم نگهداری می‌شوند
         cache_dir: مسیر پوشه کش
+        memory_limit: سقف حجم لایه حافظه به بایت (پیش‌فرض: تنظیمات cache.memory_limit_mb)
+        max_items: سقف تعداد داده‌های لایه حافظه (پیش‌فرض: تنظیمات cache.max_items)
         """
-        self.cache_dir = cache_dir
-        self.cache = {}
+        config = Config()
+        if memory_limit is None:
+            memory_limit = int((config.get("cache", "memory_limit_mb") or 0) * 1024 * 1024)
+        if max_items is None:
+            max_items = config.get("cache", "max_items") or 0
+            
+        self.cache_dir = Path(cache_dir)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.metrics = CacheMetrics()
+        # نمایه نماد و فضای نام کلیدهای موجود در حافظه
+        self.index = KeyIndex()
+        self.cache = MemoryCache(
+            max_bytes=memory_limit, max_items=max_items, namespace=namespace_of,
+            on_evict=self._on_evict
+        )
+        # داده‌های دودویی بزرگ‌تر از آستانه در فایل‌های جداگانه (0 برای غیرفعال)
+        blob_threshold = int((config.get("cache", "blob_threshold_kb") or 0) * 1024)
+        self.store = CacheStore(
+            str(self.cache_dir / 'cache.db'),
+            blob_dir=str(self.cache_dir / 'blobs') if blob_threshold else None,
+            blob_threshold=blob_threshold
+        )
+        self.flights = SingleFlight()
+        
+        # نمایه انقضا و پاکسازی دوره‌ای در پس‌زمینه (0 برای غیرفعال)
+        self.expiry = ExpiryIndex()
+        self.sweeper = ExpirySweeper(self._cleanup_expired,
+                                     interval=config.get("cache", "sweep_interval") or 0)
+        if self.sweeper.interval:
+            self.sweeper.start()
         self.load_cache()
         
     def load_cache(self):
         """
-        بارگذاری داده‌های کش از فایل
-        در صورت خطا، کش خالی ایجاد می‌شود
+        آماده‌سازی کش در شروع برنامه
+        داده‌ها به صورت تنبل از ذخیره‌ساز خوانده می‌شوند؛ فقط فایل قدیمی
+        cache.json (در صورت وجود) یک‌بار به ذخیره‌ساز منتقل می‌شود
         """
         try:
             cache_file = self.cache_dir / 'cache.json'
             if cache_file.exists():
-                with open(cache_file, 'r', encoding='utf-8') as f:
-                    self.cache = json.load(f)
-                    
-            # حذف داده‌های منقضی شده
-            self._cleanup_expired()
-            
+                self.store.import_json(str(cache_file))
         except Exception as e:
-            self.cache = {}
             logging.error(f"خطا در بارگذاری کش: {str(e)}")
             
     def save_cache(self):
         """
-        ذخیره داده‌های کش در فایل
+        انتظار برای ثبت نوشتن‌های در صف کش
+        هر کلید هنگام set به صورت جداگانه نوشته می‌شود
         """
         try:
-            cache_file = self.cache_dir / 'cache.json'
-            with open(cache_file, 'w', encoding='utf-8') as f:
-                json.dump(self.cache, f, ensure_ascii=False, indent=4)
+            self.store.flush()
         except Exception as e:
             logging.error(f"خطا در ذخیره کش: {str(e)}")
             
+    def _on_evict(self, key: str, item: Dict):
+        """
+        ثبت خروج یک کلید از لایه حافظه
+        key: کلید داده
+        item: آیتم کش
+        """
+        self.index.discard(key)
+        self.metrics.record(key, 'evictions')
+
+    def _remember(self, key: str, item: Dict, symbol: Optional[str] = None):
+        """
+        قرار دادن آیتم در لایه حافظه و ثبت آن در نمایه‌ها
+        key: کلید داده
+        item: آیتم کش
+        symbol: نماد مربوط (پیش‌فرض: از روی کلید)
+        """
+        self.index.add(key, symbol)
+        self.cache[key] = item
+        self.expiry.push(key, item['expires_at'])
+
+    def _forget(self, key: str):
+        """
+        حذف یک کلید از لایه حافظه و نمایه‌ها
+        key: کلید داده
+        """
+        self.cache.pop(key, None)
+        self.index.discard(key)
+        self.expiry.discard(key)
+
+    def _get_item(self, key: str) -> Optional[Dict]:
+        """
+        دریافت آیتم منقضی نشده از حافظه یا ذخیره‌ساز
+        key: کلید داده
+        return: آیتم کش یا None
+        """
+        started = time.perf_counter()
+        item = self.cache.get(key)
+        counter = 'hits'
+        if item is not None and self._is_expired(item):
+            self._forget(key)
+            self.metrics.record(key, 'expirations')
+            item = None
+            
+        if item is None:
+            counter = 'store_hits'
+            try:
+                row = self.store.get(key)
+            except Exception as e:
+                logging.error(f"خطا در خواندن کش: {str(e)}")
+                row = None
+            if row is None:
+                counter = 'misses'
+            else:
+                # زمان تازگی فقط در حافظه نگهداری می‌شود
+                item = {'data': row[0], 'expires_at': row[1]}
+                self._remember(key, item, row[2])
+                
+        self.metrics.record_get(key, counter, time.perf_counter() - started)
+        return item
+        
     def get(self, key: str, default: Any = None) -> Any:
         """
         دریافت داده از کش
@@ -60,44 +159,117 @@ class CacheManager:
         default: مقدار پیش‌فرض در صورت عدم وجود
         return: داده کش شده یا مقدار پیش‌فرض
         """
-        if key not in self.cache:
-            return default
-            
-        item = self.cache[key]
-        if self._is_expired(item):
-            del self.cache[key]
+        item = self._get_item(key)
+        if item is None:
             return default
-            
         return item['data']
         
-    def set(self, key: str, value: Any, ttl: int = 3600):
+    def set(self, key: str, value: Any, ttl: int = 3600, stale_ttl: int = 0,
+            symbol: Optional[str] = None):
         """
         ذخیره داده در کش
+        فقط ردیف همین کلید در ذخیره‌ساز نوشته می‌شود
         key: کلید داده
         value: مقدار داده
-        ttl: زمان انقضا به ثانیه (پیش‌فرض: 1 ساعت)
+        ttl: زمان تازگی به ثانیه (پیش‌فرض: 1 ساعت)
+        stale_ttl: مدت مجاز استفاده از داده کهنه پس از ttl (انقضای قطعی پس از ttl + stale_ttl)
+        symbol: نماد مربوط برای حذف گروهی (پیش‌فرض: از روی کلیدهایی مانند price_X)
         """
-        self.cache[key] = {
+        started = time.perf_counter()
+        now = time.time()
+        expires_at = now + ttl + stale_ttl
+        self._remember(key, {
             'data': value,
-            'expires_at': time.time() + ttl
-        }
-        self.save_cache()
+            'expires_at': expires_at,
+            'fresh_until': now + ttl
+        }, symbol)
+        self.store.put(key, value, expires_at, symbol)
+        self.metrics.record_set(key, time.perf_counter() - started)
+        
+    def get_or_set(self, key: str, loader: Callable[[], Any], ttl: int = 3600,
+                   stale_ttl: int = 0, symbol: Optional[str] = None) -> Any:
+        """
+        دریافت داده از کش یا بارگذاری آن در صورت نبود
+        فراخواننده‌های هم‌زمان یک کلید منتظر همان یک بارگذاری می‌مانند (single-flight)
+        با stale_ttl (stale-while-revalidate) پس از گذشت ttl داده قبلی فوراً برگردانده
+        و بارگذاری در پس‌زمینه انجام می‌شود؛ فقط پس از انقضای قطعی فراخواننده منتظر می‌ماند
+        key: کلید داده
+        loader: تابع بارگذاری داده (مثلاً درخواست API)
+        ttl: زمان تازگی به ثانیه
+        stale_ttl: مدت مجاز استفاده از داده کهنه پس از ttl
+        symbol: نماد مربوط برای حذف گروهی
+        return: داده کش شده یا بارگذاری شده
+        """
+        item = self._get_item(key)
+        if item is not None and self._is_fresh(item, stale_ttl):
+            return item['data']
+            
+        def load():
+            # ممکن است بارگذاری قبلی درست پیش از این فراخوانی تمام شده باشد
+            current = self._get_item(key)
+            if current is not None and self._is_fresh(current, stale_ttl):
+                return current['data']
+            value = loader()
+            if value is not None:
+                self.set(key, value, ttl, stale_ttl, symbol)
+            return value
+            
+        if item is not None and stale_ttl:
+            self._revalidate(key, load)
+            return item['data']
+            
+        return self.flights.do(key, load)
+        
+    def _revalidate(self, key: str, load: Callable[[], Any]):
+        """
+        بارگذاری مجدد یک کلید در thread پس‌زمینه (در صورت نبود بارگذاری در جریان)
+        key: کلید داده
+        load: تابع بارگذاری و ذخیره
+        """
+        if self.flights.in_flight(key):
+            return
+            
+        def worker():
+            try:
+                self.flights.do(key, load)
+            except Exception as e:
+                logging.error(f"خطا در به‌روزرسانی پس‌زمینه کش {key}: {str(e)}")
+                
+        threading.Thread(target=worker, name=f'cache-refresh-{key}', daemon=True).start()
         
     def delete(self, key: str):
         """
         حذف داده از کش
         key: کلید داده
         """
-        if key in self.cache:
-            del self.cache[key]
-            self.save_cache()
+        self._forget(key)
+        self.store.delete(key)
+        self.metrics.record(key, 'deletes')
             
+    def invalidate(self, symbol: Optional[str] = None, namespace: Optional[str] = None):
+        """
+        حذف تمام داده‌های یک نماد و/یا یک فضای نام (شامل زیرشاخه‌ها)
+        مثلاً پس از اصلاح داده‌ها یا افزایش سرمایه یک نماد؛ کلیدهای حافظه از نمایه
+        و ردیف‌های ذخیره‌ساز با یک دستور روی نمایه‌های جدول حذف می‌شوند
+        symbol: نماد (None برای همه نمادها)
+        namespace: فضای نام مانند history یا market/watch (None برای همه فضاها)
+        return: Future حذف از ذخیره‌ساز
+        """
+        if symbol is None and namespace is None:
+            raise CacheError("نماد یا فضای نام برای حذف گروهی مشخص نشده است")
+        for key in self.index.keys_for(symbol, namespace):
+            self._forget(key)
+            self.metrics.record(key, 'deletes')
+        return self.store.invalidate(symbol, namespace)
+
     def clear(self):
         """
         پاک کردن کل کش
         """
-        self.cache = {}
-        self.save_cache()
+        self.cache.clear()
+        self.index.clear()
+        self.expiry.clear()
+        self.store.clear()
         
     def _is_expired(self, item: Dict) -> bool:
         """
@@ -107,71 +279,132 @@ class CacheManager:
         """
         return time.time() > item['expires_at']
         
-    def _cleanup_expired(self):
+    @staticmethod
+    def _is_fresh(item: Dict, stale_ttl: int = 0) -> bool:
+        """
+        بررسی تازه بودن یک آیتم کش (پیش از پایان ttl)
+        برای آیتم‌های خوانده شده از ذخیره‌ساز زمان تازگی معلوم نیست: بدون stale_ttl
+        تا انقضا تازه و با stale_ttl کهنه (با بارگذاری پس‌زمینه) فرض می‌شوند
+        item: آیتم کش
+        stale_ttl: مدت مجاز استفاده از داده کهنه
+        return: True اگر نیازی به بارگذاری مجدد نباشد
+        """
+        fresh_until = item.get('fresh_until')
+        if fresh_until is None:
+            return not stale_ttl
+        return time.time() <= fresh_until
+        
+    def _cleanup_expired(self) -> int:
         """
-        پاکسازی داده‌های منقضی شده از کش
+        پاکسازی داده‌های منقضی شده
+        فقط کلیدهای منقضی از نمایه انقضا استخراج می‌شوند (O(k log n)) و حذف آن‌ها
+        از ذخیره‌ساز در یک دستور دسته‌ای ثبت می‌شود
+        return: تعداد کلیدهای منقضی شده
         """
-        expired_keys = [
-            key for key, item in self.cache.items()
-            if self._is_expired(item)
-        ]
+        now = time.time()
+        expired_keys = self.expiry.pop_expired(now)
         for key in expired_keys:
-            del self.cache[key] 
+            # کلیدی که هم‌زمان دوباره ذخیره شده حذف نمی‌شود
+            if self.cache.pop_if(key, lambda item: item['expires_at'] <= now):
+                self.index.discard(key)
+            self.metrics.record(key, 'expirations')
+        if expired_keys:
+            self.store.expire(now)
+        return len(expired_keys)
 
     def get_many(self, keys: list) -> Dict:
         """
         دریافت چندین داده از کش به صورت همزمان
+        کلیدهای موجود در حافظه مستقیم و بقیه با یک پرس‌وجو خوانده می‌شوند
         keys: لیست کلیدهای مورد نظر
         return: دیکشنری داده‌های یافت شده
         """
         result = {}
+        missing = []
         for key in keys:
-            value = self.get(key)
-            if value is not None:
-                result[key] = value
+            if key in self.cache:
+                value = self.get(key)
+                if value is not None:
+                    result[key] = value
+            else:
+                missing.append(key)
+                
+        if missing:
+            try:
+                rows = self.store.get_many(missing)
+            except Exception as e:
+                logging.error(f"خطا در خواندن کش: {str(e)}")
+                rows = {}
+            for key, (value, expires_at, symbol) in rows.items():
+                self._remember(key, {'data': value, 'expires_at': expires_at}, symbol)
+                self.metrics.record(key, 'store_hits')
+                if value is not None:
+                    result[key] = value
+            for key in missing:
+                if key not in rows:
+                    self.metrics.record(key, 'misses')
         return result
 
     def set_many(self, items: Dict, ttl: int = 3600):
         """
         ذخیره چندین داده در کش به صورت همزمان
+        تمام کلیدها در یک تراکنش نوشته می‌شوند
         items: دیکشنری داده‌ها (کلید: مقدار)
         ttl: زمان انقضا به ثانیه
         """
+        started = time.perf_counter()
+        expires_at = time.time() + ttl
         for key, value in items.items():
-            self.set(key, value, ttl)
+            self._remember(key, {'data': value, 'expires_at': expires_at})
+        self.store.put_many({key: (value, expires_at) for key, value in items.items()})
+        elapsed = (time.perf_counter() - started) / max(len(items), 1)
+        for key in items:
+            self.metrics.record_set(key, elapsed)
 
     def get_stats(self) -> Dict:
         """
-        دریافت آمار کش
-        return: دیکشنری شامل آمار کش
+        دریافت آمار کش با هزینه ثابت (بدون پیمایش داده‌ها یا پرس‌وجوی ذخیره‌ساز)
+        return: دیکشنری شامل آمار لایه حافظه، شمارنده‌های هر فضای نام و تأخیرها
         """
-        total_items = len(self.cache)
-        expired_items = len([
-            item for item in self.cache.values()
-            if self._is_expired(item)
-        ])
-        
+        memory = self.cache.get_stats()
+        stats = self.metrics.snapshot()
+        for namespace, sizes in memory.pop('namespaces').items():
+            stats['namespaces'].setdefault(namespace, {}).update(
+                memory_items=sizes['items'], memory_bytes=sizes['bytes']
+            )
+        stats.update({
+            'memory': memory,
+            'fetches': self.flights.executed,
+            'coalesced_fetches': self.flights.shared
+        })
+        return stats
+
+    def get_store_stats(self) -> Dict:
+        """
+        دریافت آمار ذخیره‌ساز پایدار (نیازمند پیمایش جدول کش)
+        return: دیکشنری تعداد کل، فعال و منقضی و حجم داده‌ها
+        """
+        stats = self.store.stats()
         return {
-            'total_items': total_items,
-            'active_items': total_items - expired_items,
-            'expired_items': expired_items,
-            'cache_size': len(json.dumps(self.cache).encode('utf-8'))
+            'total_items': stats['total_items'],
+            'active_items': stats['total_items'] - stats['expired_items'],
+            'expired_items': stats['expired_items'],
+            'cache_size': stats['cache_size']
         }
 
     def optimize(self):
         """
         بهینه‌سازی کش
-        - حذف داده‌های منقضی
-        - فشرده‌سازی حافظه
+        - حذف داده‌های منقضی از حافظه و ذخیره‌ساز
+        - فشرده‌سازی فایل ذخیره‌ساز
         return: تعداد آیتم‌های حذف شده
         """
-        initial_count = len(self.cache)
         self._cleanup_expired()
-        final_count = len(self.cache)
-        
-        # ذخیره مجدد برای فشرده‌سازی
-        self.save_cache()
-        return initial_count - final_count
+        try:
+            return self.store.compact()
+        except Exception as e:
+            logging.error(f"خطا در بهینه‌سازی کش: {str(e)}")
+            return 0
 
     def create_backup(self):
         """
@@ -180,12 +413,8 @@ class CacheManager:
         """
         try:
             timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-            backup_file = self.cache_dir / f'cache_backup_{timestamp}.json'
-            
-            with open(backup_file, 'w', encoding='utf-8') as f:
-                json.dump(self.cache, f, ensure_ascii=False, indent=4)
-            
-            return str(backup_file)
+            backup_file = self.cache_dir / f'cache_backup_{timestamp}.db'
+            return self.store.backup(str(backup_file))
         except Exception as e:
             logging.error(f"خطا در ایجاد پشتیبان: {str(e)}")
             return None
@@ -193,14 +422,22 @@ class CacheManager:
     def restore_backup(self, backup_file: str) -> bool:
         """
         بازیابی کش از نسخه پشتیبان
-        backup_file: مسیر فایل پشتیبان
+        backup_file: مسیر فایل پشتیبان (.db یا .json قدیمی)
         return: True در صورت موفقیت
         """
         try:
-            with open(backup_file, 'r', encoding='utf-8') as f:
-                self.cache = json.load(f)
-            self.save_cache()
+            self.store.restore(str(backup_file))
+            self.cache.clear()
+            self.index.clear()
+            self.expiry.clear()
             return True
         except Exception as e:
             logging.error(f"خطا در بازیابی پشتیبان: {str(e)}")
-            return False 
\ No newline at end of file
+            return False
+
+    def close(self):
+        """
+        توقف پاکسازی پس‌زمینه و ثبت نوشتن‌های در صف
+        """
+        self.sweeper.stop()
+        self.save_cache()
@@ -0,0 +1,161 @@
+"""
+این ماژول آمار عملکرد کش را جمع‌آوری می‌کند.
+این ماژول امکانات زیر را فراهم می‌کند:
+- تشخیص فضای نام سلسله‌مراتبی هر کلید (price، history، history/ranges، market/watch و ...)
+- شمارنده‌های برخورد، عدم برخورد، حذف و انقضا برای هر فضای نام
+- هیستوگرام تأخیر با سطل‌های لگاریتمی ثابت برای get و set
+- خواندن آمار با هزینه ثابت (مستقل از تعداد داده‌های کش)
+"""
+
+import threading
+from typing import Dict, List
+from .key_index import namespace_of
+
+# مرزهای بالای سطل‌های هیستوگرام به میکروثانیه (1us تا حدود 4s)
+LATENCY_BUCKETS = tuple(2 ** i for i in range(23))
+
+COUNTERS = ('hits', 'store_hits', 'misses', 'sets', 'deletes', 'evictions', 'expirations')
+
+
+class LatencyHistogram:
+    """کلاس هیستوگرام تأخیر با سطل‌های توان دو"""
+
+    def __init__(self):
+        """
+        سازنده کلاس LatencyHistogram
+        """
+        self.counts: List[int] = [0] * (len(LATENCY_BUCKETS) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def record(self, seconds: float):
+        """
+        ثبت یک اندازه‌گیری
+        seconds: مدت زمان به ثانیه
+        """
+        micros = seconds * 1e6
+        # اندیس سطل از روی تعداد بیت‌ها بدون جستجو
+        index = min(int(micros).bit_length(), len(LATENCY_BUCKETS))
+        self.counts[index] += 1
+        self.count += 1
+        self.total += micros
+        if micros > self.max:
+            self.max = micros
+
+    def percentile(self, q: float) -> float:
+        """
+        تخمین صدک از روی سطل‌ها (مرز بالای سطل)
+        q: صدک بین 0 و 100
+        return: تأخیر به میکروثانیه
+        """
+        if not self.count:
+            return 0.0
+        target = self.count * q / 100
+        seen = 0
+        for index, count in enumerate(self.counts):
+            seen += count
+            if seen >= target and count:
+                return float(LATENCY_BUCKETS[index]) if index < len(LATENCY_BUCKETS) else self.max
+        return self.max
+
+    def summary(self) -> Dict:
+        """
+        خلاصه هیستوگرام
+        return: دیکشنری تعداد، میانگین، صدک‌ها و بیشینه به میکروثانیه
+        """
+        return {
+            'count': self.count,
+            'mean_us': self.total / self.count if self.count else 0.0,
+            'p50_us': self.percentile(50),
+            'p90_us': self.percentile(90),
+            'p99_us': self.percentile(99),
+            'max_us': self.max,
+            'buckets': {
+                f'<={bound}us': count
+                for bound, count in zip(LATENCY_BUCKETS, self.counts) if count
+            }
+        }
+
+
+class CacheMetrics:
+    """کلاس جمع‌آوری آمار کش برای هر فضای نام"""
+
+    def __init__(self):
+        """
+        سازنده کلاس CacheMetrics
+        """
+        self._lock = threading.Lock()
+        self._namespaces: Dict[str, Dict[str, int]] = {}
+        self.get_latency = LatencyHistogram()
+        self.set_latency = LatencyHistogram()
+
+    def _counters(self, key: str) -> Dict[str, int]:
+        """
+        شمارنده‌های فضای نام یک کلید (باید درون قفل فراخوانی شود)
+        key: کلید کش
+        return: دیکشنری شمارنده‌ها
+        """
+        namespace = namespace_of(key)
+        counters = self._namespaces.get(namespace)
+        if counters is None:
+            counters = self._namespaces[namespace] = dict.fromkeys(COUNTERS, 0)
+        return counters
+
+    def record(self, key: str, counter: str, count: int = 1):
+        """
+        افزایش یک شمارنده
+        key: کلید کش
+        counter: نام شمارنده (یکی از COUNTERS)
+        count: مقدار افزایش
+        """
+        with self._lock:
+            self._counters(key)[counter] += count
+
+    def record_get(self, key: str, counter: str, seconds: float):
+        """
+        ثبت نتیجه و تأخیر یک خواندن
+        key: کلید کش
+        counter: hits، store_hits یا misses
+        seconds: مدت خواندن به ثانیه
+        """
+        with self._lock:
+            self._counters(key)[counter] += 1
+            self.get_latency.record(seconds)
+
+    def record_set(self, key: str, seconds: float):
+        """
+        ثبت تأخیر یک نوشتن
+        key: کلید کش
+        seconds: مدت نوشتن به ثانیه
+        """
+        with self._lock:
+            self._counters(key)['sets'] += 1
+            self.set_latency.record(seconds)
+
+    def snapshot(self) -> Dict:
+        """
+        دریافت آمار فعلی
+        return: دیکشنری آمار هر فضای نام و هیستوگرام‌های تأخیر
+        """
+        with self._lock:
+            namespaces = {}
+            for namespace, counters in self._namespaces.items():
+                stats = dict(counters)
+                reads = stats['hits'] + stats['store_hits'] + stats['misses']
+                stats['hit_rate'] = (stats['hits'] + stats['store_hits']) / reads if reads else 0.0
+                namespaces[namespace] = stats
+            return {
+                'namespaces': namespaces,
+                'get_latency': self.get_latency.summary(),
+                'set_latency': self.set_latency.summary()
+            }
+
+    def reset(self):
+        """
+        صفر کردن تمام آمار
+        """
+        with self._lock:
+            self._namespaces.clear()
+            self.get_latency = LatencyHistogram()
+            self.set_latency = LatencyHistogram()
@@ -15,11 +15,30 @@ class Config:
             "api": {
                 "base_url": "http://www.tsetmc.com/tsev2/data/TseClient2.aspx",
                 "timeout": 30,
-                "retry_count": 3
+                "retry_count": 3,
+                "max_concurrency": 8,
+                "rate_limit": 10,
+                "rate_burst": 20,
+                "latency_tolerance": 2.0,
+                "backoff_base": 0.5,
+                "backoff_cap": 30,
+                "retry_budget_ratio": 0.2,
+                "breaker_threshold": 5,
+                "breaker_reset": 30
             },
             "database": {
                 "path": "data/stock_app.db",
-                "backup_path": "data/backup"
+                "backup_path": "data/backup",
+                "backup_count": 5
+            },
+            "cache": {
+                "memory_limit_mb": 128,
+                "max_items": 0,
+                "blob_threshold_kb": 1024,
+                "sweep_interval": 30,
+                "prefetch_workers": 4,
+                "prefetch_history_days": 365,
+                "recent_charts": 20
             },
             "ui": {
                 "theme": "clam",
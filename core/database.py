@@ -7,10 +7,27 @@
 - ذخیره تنظیمات برنامه
 """
 
-import sqlite3
 import os
+import threading
 from datetime import datetime
 from core.config import Config
+from core.db_service import DatabaseService, report_errors
+from core.db_backup import DatabaseBackup
+from core.migrations import apply_migrations
+
+_shared_manager = None
+_shared_manager_lock = threading.Lock()
+
+def get_database():
+    """
+    دریافت نمونه مشترک DatabaseManager برای کل برنامه
+    return: نمونه DatabaseManager
+    """
+    global _shared_manager
+    with _shared_manager_lock:
+        if _shared_manager is None:
+            _shared_manager = DatabaseManager()
+        return _shared_manager
 
 class DatabaseManager:
     """کلاس مدیریت پایگاه داده"""
@@ -25,115 +42,101 @@ class DatabaseManager:
         os.makedirs(os.path.dirname(self.db_path), exist_ok=True)
         os.makedirs(self.backup_path, exist_ok=True)
         
-        # اتصال به پایگاه داده
-        self.conn = sqlite3.connect(self.db_path, check_same_thread=False)
-        self.cursor = self.conn.cursor()
+        # اتصال به سرویس مشترک پایگاه داده
+        self.service = DatabaseService.get_instance(self.db_path)
+        self.backup = DatabaseBackup(
+            self.service,
+            self.backup_path,
+            keep=self.config.get("database", "backup_count") or 5
+        )
         
-        # ایجاد جداول
-        self.create_tables()
+        # ایجاد جداول و داده‌های اولیه فقط یک بار در هر فرایند
+        self.service.run_once("schema", self._initialize_schema)
         
-        # Insert sample data if tables are empty
-        self.insert_sample_data()
+    def _initialize_schema(self, conn):
+        """
+        ایجاد جداول و درج داده‌های اولیه
+        conn: اتصال نویسنده
+        """
+        self.create_tables(conn)
+        self.insert_sample_data(conn)
         
-    def create_tables(self):
-        """ایجاد جداول پایگاه داده"""
-        try:
-            # جدول لیست سهام
-            self.cursor.execute("""
-                CREATE TABLE IF NOT EXISTS stock_list (
-                    id INTEGER PRIMARY KEY,
-                    symbol TEXT UNIQUE,
-                    name TEXT,
-                    code TEXT,
-                    sector TEXT,
-                    market TEXT,
-                    last_update TIMESTAMP
-                )
-            """)
-            
-            # جدول قیمت‌ها
-            self.cursor.execute("""
-                CREATE TABLE IF NOT EXISTS stock_prices (
-                    symbol TEXT,
-                    date TEXT,
-                    open REAL,
-                    high REAL,
-                    low REAL,
-                    close REAL,
-                    volume INTEGER,
-                    PRIMARY KEY (symbol, date)
-                )
-            """)
-            
-            # جدول پرتفوی
-            self.cursor.execute("""
-                CREATE TABLE IF NOT EXISTS portfolio (
-                    id INTEGER PRIMARY KEY,
-                    symbol TEXT,
-                    quantity INTEGER,
-                    avg_price REAL,
-                    total_value REAL,
-                    status TEXT DEFAULT 'open',
-                    last_update TIMESTAMP,
-                    FOREIGN KEY (symbol) REFERENCES stock_list(symbol)
-                )
-            """)
-            
-            # جدول دیده‌بان
-            self.cursor.execute("""
-                CREATE TABLE IF NOT EXISTS watchlist (
-                    id INTEGER PRIMARY KEY,
-                    symbol TEXT,
-                    alert_price REAL,
-                    alert_type TEXT,
-                    last_update TIMESTAMP,
-                    FOREIGN KEY (symbol) REFERENCES stock_list(symbol)
-                )
-            """)
-            
-            # جدول هشدارها
-            self.cursor.execute("""
-                CREATE TABLE IF NOT EXISTS alerts (
-                    id INTEGER PRIMARY KEY,
-                    symbol TEXT,
-                    alert_type TEXT,
-                    price REAL,
-                    status TEXT,
-                    created_at TIMESTAMP,
-                    triggered_at TIMESTAMP,
-                    FOREIGN KEY (symbol) REFERENCES stock_list(symbol)
-                )
-            """)
-            
-            # جدول تنظیمات
-            self.cursor.execute("""
-                DROP TABLE IF EXISTS settings
-            """)
-            self.cursor.execute("""
-                CREATE TABLE settings (
-                    id INTEGER PRIMARY KEY,
-                    basic_info_url TEXT,
-                    ratios_url TEXT,
-                    statements_url TEXT,
-                    profitability_url TEXT
-                )
-            """)
-            
-            # ذخیره تغییرات
-            self.conn.commit()
+    def query(self, sql, params=()):
+        """
+        اجرای پرس‌وجوی خواندنی
+        sql: دستور SQL
+        params: پارامترهای دستور
+        return: لیست ردیف‌ها
+        """
+        return self.service.query(sql, params)
+        
+    def query_one(self, sql, params=()):
+        """
+        اجرای پرس‌وجوی خواندنی و دریافت اولین ردیف
+        sql: دستور SQL
+        params: پارامترهای دستور
+        return: اولین ردیف یا None
+        """
+        return self.service.query_one(sql, params)
+        
+    def execute(self, sql, params=()):
+        """
+        اجرای دستور نوشتنی در thread نویسنده
+        sql: دستور SQL
+        params: پارامترهای دستور
+        return: شناسه آخرین ردیف درج شده
+        """
+        return self.service.execute(sql, params)
+        
+    def transaction(self, func):
+        """
+        اجرای چند دستور نوشتنی در یک تراکنش
+        func: تابعی که اتصال نویسنده را می‌گیرد
+        return: مقدار بازگشتی func
+        """
+        return self.service.write(func)
+        
+    def transaction_deferred(self, func, description="writing to database"):
+        """
+        اجرای چند دستور نوشتنی بدون انتظار در تراکنش گروهی (write-behind)
+        برای نوشتن‌های پس‌زمینه و گروهی؛ عملیات تکی کاربر با transaction اجرا می‌شود
+        تا نتیجه واقعی گزارش شود
+        func: تابعی که اتصال نویسنده را می‌گیرد
+        description: شرح عملیات برای گزارش خطا
+        return: Future مقدار بازگشتی func
+        """
+        return report_errors(self.service.defer(func), description)
+        
+    def flush(self):
+        """
+        انتظار برای commit تمام نوشتن‌های در صف
+        """
+        self.service.flush()
+        
+    def create_tables(self, conn):
+        """
+        ایجاد یا به‌روزرسانی جداول پایگاه داده از طریق مهاجرت‌های نسخه‌دار
+        conn: اتصال نویسنده
+        """
+        try:
+            applied = apply_migrations(conn)
+            if applied:
+                print(f"Applied schema migrations: {applied}")
             
             # مقداردهی اولیه داده‌های سهام
-            self.initialize_stock_data()
+            self.initialize_stock_data(conn)
             
         except Exception as e:
             print(f"Error creating tables: {str(e)}")
             
-    def initialize_stock_data(self):
-        """مقداردهی اولیه داده‌های سهام"""
+    def initialize_stock_data(self, conn):
+        """
+        مقداردهی اولیه داده‌های سهام
+        conn: اتصال نویسنده
+        """
         try:
             # بررسی وجود داده در جدول
-            self.cursor.execute("SELECT COUNT(*) FROM stock_list")
-            count = self.cursor.fetchone()[0]
+            count = conn.execute("SELECT COUNT(*) FROM stock_list").fetchone()[0]
             
             if count == 0:
                 # داده‌های اولیه سهام
@@ -151,13 +154,12 @@ class DatabaseManager:
                 }
                 
                 # درج داده‌ها در جدول
-                for symbol, code in initial_stocks.items():
-                    self.cursor.execute('''
-                        INSERT INTO stock_list (symbol, name, code, sector, market, last_update) 
-                        VALUES (?, ?, ?, ?, ?, ?)
-                    ''', (symbol, symbol, code, 'default', 'default', datetime.now()))
+                conn.executemany('''
+                    INSERT INTO stock_list (symbol, name, code, sector, market, last_update) 
+                    VALUES (?, ?, ?, ?, ?, ?)
+                ''', [(symbol, symbol, code, 'default', 'default', datetime.now())
+                      for symbol, code in initial_stocks.items()])
                 
-                self.conn.commit()
                 print("Stock data initialized successfully")
                 
         except Exception as e:
@@ -169,8 +171,7 @@ class DatabaseManager:
         return: لیست دیکشنری‌های اطلاعات سهام
         """
         try:
-            self.cursor.execute("SELECT * FROM stock_list")
-            rows = self.cursor.fetchall()
+            rows = self.query("SELECT * FROM stock_list")
             
             return [{
                 "symbol": row[1],
@@ -191,8 +192,7 @@ class DatabaseManager:
         return: دیکشنری اطلاعات سهم
         """
         try:
-            self.cursor.execute("SELECT * FROM stock_list WHERE symbol=?", (symbol,))
-            row = self.cursor.fetchone()
+            row = self.query_one("SELECT * FROM stock_list WHERE symbol=?", (symbol,))
             
             if row:
                 return {
@@ -215,7 +215,7 @@ class DatabaseManager:
         return: True در صورت موفقیت
         """
         try:
-            self.cursor.execute("""
+            self.execute("""
                 INSERT INTO stock_list (symbol, name, code, sector, market, last_update)
                 VALUES (?, ?, ?, ?, ?, ?)
             """, (
@@ -226,7 +226,6 @@ class DatabaseManager:
                 stock["market"],
                 datetime.now()
             ))
-            self.conn.commit()
             return True
             
         except Exception as e:
@@ -241,7 +240,7 @@ class DatabaseManager:
         return: True در صورت موفقیت
         """
         try:
-            self.cursor.execute("""
+            self.execute("""
                 UPDATE stock_list
                 SET name=?, code=?, sector=?, market=?
                 WHERE symbol=?
@@ -252,7 +251,6 @@ class DatabaseManager:
                 data["market"],
                 symbol
             ))
-            self.conn.commit()
             return True
             
         except Exception as e:
@@ -266,8 +264,7 @@ class DatabaseManager:
         return: True در صورت موفقیت
         """
         try:
-            self.cursor.execute("DELETE FROM stock_list WHERE symbol=?", (symbol,))
-            self.conn.commit()
+            self.execute("DELETE FROM stock_list WHERE symbol=?", (symbol,))
             return True
             
         except Exception as e:
@@ -280,8 +277,7 @@ class DatabaseManager:
         return: لیست دیکشنری‌های اطلاعات پرتفوی
         """
         try:
-            self.cursor.execute("SELECT * FROM portfolio")
-            rows = self.cursor.fetchall()
+            rows = self.query("SELECT * FROM portfolio")
             
             return [{
                 "id": row[0],
@@ -305,7 +301,7 @@ class DatabaseManager:
         return: True در صورت موفقیت
         """
         try:
-            self.cursor.execute("""
+            self.execute("""
                 INSERT INTO portfolio (symbol, quantity, avg_price, total_value, last_update)
                 VALUES (?, ?, ?, ?, ?)
             """, (
@@ -315,7 +311,6 @@ class DatabaseManager:
                 item["buy_price"] * item["quantity"],
                 datetime.now()
             ))
-            self.conn.commit()
             return True
             
         except Exception as e:
@@ -330,7 +325,7 @@ class DatabaseManager:
         return: True در صورت موفقیت
         """
         try:
-            self.cursor.execute("""
+            self.execute("""
                 UPDATE portfolio
                 SET quantity=?, avg_price=?, total_value=?, last_update=?
                 WHERE id=?
@@ -341,7 +336,6 @@ class DatabaseManager:
                 datetime.now(),
                 id
             ))
-            self.conn.commit()
             return True
             
         except Exception as e:
@@ -355,8 +349,7 @@ class DatabaseManager:
         return: True در صورت موفقیت
         """
         try:
-            self.cursor.execute("DELETE FROM portfolio WHERE id=?", (id,))
-            self.conn.commit()
+            self.execute("DELETE FROM portfolio WHERE id=?", (id,))
             return True
             
         except Exception as e:
@@ -365,18 +358,37 @@ class DatabaseManager:
             
     def get_watchlist(self):
         """
-        دریافت لیست دیده‌بان
+        دریافت لیست دیده‌بان همراه با آخرین قیمت هر نماد
         return: لیست دیکشنری‌های اطلاعات دیده‌بان
         """
         try:
-            self.cursor.execute("SELECT * FROM watchlist")
-            rows = self.cursor.fetchall()
+            rows = self.query("""
+                SELECT 
+                    w.symbol,
+                    s.name,
+                    w.alert_price,
+                    w.alert_type,
+                    q.last_close,
+                    q.prev_close,
+                    q.volume,
+                    q.last_date
+                FROM watchlist w
+                LEFT JOIN stock_list s ON s.symbol = w.symbol
+                LEFT JOIN latest_quote q ON q.symbol = w.symbol
+            """)
             
             return [{
-                "symbol": row[2],
-                "alert_price": row[3],
-                "alert_type": row[4],
-                "status": row[5]
+                "symbol": row[0],
+                "name": row[1] or row[0],
+                "alert_price": row[2],
+                "alert_type": row[3],
+                "last_price": row[4] or 0,
+                "close_price": row[4] or 0,
+                "prev_close": row[5],
+                "change": ((row[4] - row[5]) / row[5] * 100) if row[4] and row[5] else 0,
+                "volume": row[6] or 0,
+                "value": (row[4] or 0) * (row[6] or 0),
+                "date": row[7]
             } for row in rows]
             
         except Exception as e:
@@ -390,7 +402,7 @@ class DatabaseManager:
         return: True در صورت موفقیت
         """
         try:
-            self.cursor.execute("""
+            self.execute("""
                 INSERT INTO watchlist (symbol, alert_price, alert_type, status)
                 VALUES (?, ?, ?, ?)
             """, (
@@ -399,7 +411,6 @@ class DatabaseManager:
                 item["alert_type"],
                 "active"
             ))
-            self.conn.commit()
             return True
             
         except Exception as e:
@@ -414,7 +425,7 @@ class DatabaseManager:
         return: True در صورت موفقیت
         """
         try:
-            self.cursor.execute("""
+            self.execute("""
                 UPDATE watchlist
                 SET alert_price=?, alert_type=?, status=?
                 WHERE symbol=?
@@ -424,7 +435,6 @@ class DatabaseManager:
                 data["status"],
                 symbol
             ))
-            self.conn.commit()
             return True
             
         except Exception as e:
@@ -438,22 +448,43 @@ class DatabaseManager:
         return: True در صورت موفقیت
         """
         try:
-            self.cursor.execute("DELETE FROM watchlist WHERE symbol=?", (symbol,))
-            self.conn.commit()
+            self.execute("DELETE FROM watchlist WHERE symbol=?", (symbol,))
             return True
             
         except Exception as e:
             print(f"Error removing from watchlist: {str(e)}")
             return False
             
+    def get_prefetch_symbols(self):
+        """
+        دریافت نمادهای دیده‌بان و پرتفوی باز برای پیش‌بارگذاری کش
+        return: لیست نمادها بدون تکرار (ابتدا دیده‌بان)
+        """
+        try:
+            rows = self.query("""
+                SELECT symbol, MIN(source) AS priority
+                FROM (
+                    SELECT symbol, 0 AS source FROM watchlist
+                    UNION ALL
+                    SELECT symbol, 1 AS source FROM portfolio WHERE status = 'open'
+                )
+                WHERE symbol IS NOT NULL
+                GROUP BY symbol
+                ORDER BY priority, symbol
+            """)
+            return [row[0] for row in rows]
+            
+        except Exception as e:
+            print(f"Error getting prefetch symbols: {str(e)}")
+            return []
+            
     def get_alerts(self):
         """
         دریافت لیست هشدارها
         return: لیست دیکشنری‌های اطلاعات هشدارها
         """
         try:
-            self.cursor.execute("SELECT * FROM alerts")
-            rows = self.cursor.fetchall()
+            rows = self.query("SELECT * FROM alerts")
             
             return [{
                 "id": row[0],
@@ -475,7 +506,7 @@ class DatabaseManager:
         return: True در صورت موفقیت
         """
         try:
-            self.cursor.execute("""
+            self.execute("""
                 INSERT INTO alerts (symbol, type, price, status, time)
                 VALUES (?, ?, ?, ?, ?)
             """, (
@@ -485,7 +516,6 @@ class DatabaseManager:
                 alert["status"],
                 alert["time"]
             ))
-            self.conn.commit()
             return True
             
         except Exception as e:
@@ -500,7 +530,7 @@ class DatabaseManager:
         return: True در صورت موفقیت
         """
         try:
-            self.cursor.execute("""
+            self.execute("""
                 UPDATE alerts
                 SET symbol=?, type=?, price=?, status=?, time=?
                 WHERE id=?
@@ -512,7 +542,6 @@ class DatabaseManager:
                 data["time"],
                 id
             ))
-            self.conn.commit()
             return True
             
         except Exception as e:
@@ -525,19 +554,20 @@ class DatabaseManager:
         id: شناسه هشدار
         return: True در صورت موفقیت
         """
-        try:
+        def move_to_history(conn):
             # انتقال به تاریخچه
-            self.cursor.execute("SELECT * FROM alerts WHERE id=?", (id,))
-            row = self.cursor.fetchone()
+            row = conn.execute("SELECT * FROM alerts WHERE id=?", (id,)).fetchone()
             if row:
-                self.cursor.execute("""
+                conn.execute("""
                     INSERT INTO alert_history (symbol, type, price, status, time)
                     VALUES (?, ?, ?, ?, ?)
                 """, (row[1], row[2], row[3], row[4], row[5]))
                 
             # حذف از جدول هشدارها
-            self.cursor.execute("DELETE FROM alerts WHERE id=?", (id,))
-            self.conn.commit()
+            conn.execute("DELETE FROM alerts WHERE id=?", (id,))
+            
+        try:
+            self.transaction(move_to_history)
             return True
             
         except Exception as e:
@@ -549,92 +579,66 @@ class DatabaseManager:
         پاک کردن همه هشدارها
         return: True در صورت موفقیت
         """
-        try:
+        def move_all_to_history(conn):
             # انتقال به تاریخچه
-            self.cursor.execute("""
+            conn.execute("""
                 INSERT INTO alert_history (symbol, type, price, status, time)
                 SELECT symbol, type, price, status, time FROM alerts
             """)
             
             # پاک کردن جدول هشدارها
-            self.cursor.execute("DELETE FROM alerts")
-            self.conn.commit()
+            conn.execute("DELETE FROM alerts")
+            
+        try:
+            self.transaction(move_all_to_history)
             return True
             
         except Exception as e:
             print(f"Error clearing alerts: {str(e)}")
             return False
             
-    def backup_database(self):
+    def backup_database(self, incremental=False, progress=None):
         """
-        تهیه نسخه پشتیبان از پایگاه داده
-        return: True در صورت موفقیت
+        تهیه نسخه پشتیبان از پایگاه داده در پس‌زمینه
+        incremental: فقط بخش‌های تغییر یافته قیمت‌ها (نیازمند پشتیبان کامل قبلی)
+        progress: تابع گزارش پیشرفت (صفحات باقیمانده، کل صفحات) که در thread پشتیبان اجرا می‌شود
+        return: Future مسیر فایل پشتیبان یا None در صورت خطا
         """
         try:
-            # ایجاد نام فایل پشتیبان
-            backup_file = os.path.join(
-                self.backup_path,
-                f"backup_{datetime.now().strftime('%Y%m%d_%H%M%S')}.db"
-            )
-            
-            # کپی فایل پایگاه داده
-            import shutil
-            shutil.copy2(self.db_path, backup_file)
-            return True
+            return self.backup.start(incremental, progress)
             
         except Exception as e:
             print(f"Error backing up database: {str(e)}")
-            return False
+            return None
             
     def get_portfolio_summary(self):
         """
         دریافت خلاصه اطلاعات پرتفوی
+        ارزش فعلی از جدول latest_quote و در یک پرس‌وجو محاسبه می‌شود
         return: دیکشنری شامل اطلاعات خلاصه پرتفوی
         """
         try:
-            # دریافت اطلاعات پرتفوی
-            self.cursor.execute("""
+            row = self.query_one("""
                 SELECT 
-                    symbol,
-                    SUM(quantity) as total_quantity,
-                    AVG(avg_price) as avg_buy_price,
-                    SUM(quantity * avg_price) as total_investment
-                FROM portfolio
-                WHERE status = 'open'
-                GROUP BY symbol
+                    COALESCE(SUM(p.quantity * q.last_close), 0) as total_value,
+                    COALESCE(SUM(p.quantity * p.avg_price), 0) as total_investment,
+                    COUNT(DISTINCT p.symbol) as stocks_count
+                FROM portfolio p
+                JOIN latest_quote q ON q.symbol = p.symbol
+                WHERE p.status = 'open'
             """)
             
-            portfolio = self.cursor.fetchall()
-            
-            # محاسبه ارزش فعلی
-            total_value = 0
-            total_investment = 0
-            total_profit = 0
-            
-            for item in portfolio:
-                symbol, quantity, avg_price, investment = item
-                
-                # دریافت آخرین قیمت
-                self.cursor.execute("""
-                    SELECT close
-                    FROM prices
-                    WHERE symbol = ?
-                    ORDER BY date DESC
-                    LIMIT 1
-                """, (symbol,))
-                
-                last_price = self.cursor.fetchone()
-                if last_price:
-                    current_value = quantity * last_price[0]
-                    total_value += current_value
-                    total_investment += investment
-                    total_profit += current_value - investment
+            total_value, total_investment, stocks_count = row
+            total_profit = total_value - total_investment
+            profit_percentage = (total_profit / total_investment * 100) if total_investment > 0 else 0
             
             return {
                 "total_value": total_value,
                 "total_investment": total_investment,
                 "total_profit": total_profit,
-                "profit_percentage": (total_profit / total_investment * 100) if total_investment > 0 else 0
+                "profit_percentage": profit_percentage,
+                "total_return": profit_percentage,
+                "stocks_count": stocks_count
             }
             
         except Exception as e:
@@ -647,7 +651,7 @@ class DatabaseManager:
         return: لیست دیکشنری‌های اطلاعات معاملات
         """
         try:
-            self.cursor.execute("""
+            rows = self.query("""
                 SELECT 
                     p.id,
                     p.symbol,
@@ -678,8 +682,6 @@ class DatabaseManager:
                 WHERE p.status = 'open'
                 ORDER BY p.last_update DESC
             """)
-            
-            rows = self.cursor.fetchall()
             return [{
                 "id": row[0],
                 "symbol": row[1],
@@ -696,27 +698,32 @@ class DatabaseManager:
             print(f"Error getting trades report: {str(e)}")
             return []
             
-    def get_portfolio_stocks(self):
+    def get_portfolio_stocks(self, limit=None):
         """
         دریافت لیست سهام پرتفوی
+        limit: حداکثر تعداد سهام به ترتیب ارزش فعلی (اختیاری)
         return: لیست دیکشنری‌های اطلاعات سهام
         """
         try:
-            self.cursor.execute("""
+            query = """
                 SELECT 
                     p.symbol,
                     SUM(p.quantity) as total_quantity,
                     AVG(p.avg_price) as avg_buy_price,
-                    MAX(pr.close) as current_price,
+                    q.last_close as current_price,
                     SUM(p.quantity * p.avg_price) as total_cost,
-                    SUM(p.quantity * COALESCE(pr.close, p.avg_price)) as current_value
+                    SUM(p.quantity * COALESCE(q.last_close, p.avg_price)) as current_value
                 FROM portfolio p
-                LEFT JOIN prices pr ON p.symbol = pr.symbol
+                LEFT JOIN latest_quote q ON q.symbol = p.symbol
                 WHERE p.status = 'open'
                 GROUP BY p.symbol
-            """)
-            
-            rows = self.cursor.fetchall()
+            """
+            params = ()
+            if limit is not None:
+                query += " ORDER BY current_value DESC LIMIT ?"
+                params = (limit,)
+                
+            rows = self.query(query, params)
             return [{
                 "symbol": row[0],
                 "quantity": row[1],
@@ -750,24 +757,20 @@ class DatabaseManager:
             print(f"Error getting portfolio allocation: {str(e)}")
             return []
             
-    def get_portfolio_history(self):
+    def get_portfolio_history(self, start_date=None, end_date=None):
         """
-        دریافت تاریخچه ارزش پرتفوی
+        دریافت تاریخچه ارزش پرتفوی از جدول portfolio_nav
+        start_date: تاریخ شروع (اختیاری)
+        end_date: تاریخ پایان (اختیاری)
         return: لیست دیکشنری‌های اطلاعات تاریخچه
         """
         try:
-            self.cursor.execute("""
-                SELECT 
-                    pr.date,
-                    SUM(p.quantity * pr.close) as total_value
-                FROM portfolio p
-                JOIN prices pr ON p.symbol = pr.symbol
-                WHERE p.status = 'open'
-                GROUP BY pr.date
-                ORDER BY pr.date
-            """)
-            
-            rows = self.cursor.fetchall()
+            rows = self.query("""
+                SELECT date, total_value
+                FROM portfolio_nav
+                WHERE date >= COALESCE(?, date) AND date <= COALESCE(?, date)
+                ORDER BY date
+            """, (start_date, end_date))
             return [{
                 "date": row[0],
                 "value": row[1]
@@ -777,24 +780,215 @@ class DatabaseManager:
             print(f"Error getting portfolio history: {str(e)}")
             return []
             
+    def _write_portfolio_nav(self, conn, start_date, end_date):
+        """
+        محاسبه و ثبت ارزش پرتفوی برای روزهای معاملاتی یک بازه
+        برای هر روز آخرین قیمت بسته شدن تا آن روز در نظر گرفته می‌شود
+        conn: اتصال نویسنده
+        start_date: تاریخ شروع (None برای ابتدای تاریخچه)
+        end_date: تاریخ پایان (None برای آخرین روز)
+        return: تعداد روزهای ثبت شده
+        """
+        return conn.execute("""
+            INSERT OR REPLACE INTO portfolio_nav
+            (date, total_value, total_cost, positions, created_at)
+            SELECT 
+                printf('%04d-%02d-%02d', d.date / 10000, d.date / 100 % 100, d.date % 100),
+                COALESCE(SUM(p.quantity * (
+                    SELECT h.close FROM price_history h
+                    WHERE h.symbol_id = s.id AND h.date <= d.date
+                    ORDER BY h.date DESC
+                    LIMIT 1
+                )), 0),
+                SUM(p.quantity * p.avg_price),
+                COUNT(DISTINCT p.symbol),
+                ?
+            FROM (
+                SELECT DISTINCT date FROM price_history
+                WHERE date >= COALESCE(CAST(replace(substr(?, 1, 10), '-', '') AS INTEGER), date)
+                AND date <= COALESCE(CAST(replace(substr(?, 1, 10), '-', '') AS INTEGER), date)
+            ) d
+            JOIN portfolio p ON p.status = 'open'
+            LEFT JOIN symbol_ids s ON s.symbol = p.symbol
+            GROUP BY d.date
+        """, (datetime.now(), start_date, end_date)).rowcount
+        
+    def update_portfolio_nav(self):
+        """
+        افزودن ارزش پرتفوی روزهای معاملاتی بعد از آخرین snapshot
+        روز آخر دوباره محاسبه می‌شود تا قیمت‌های پایانی روز اعمال شوند؛ در هر بازآوری
+        داشبورد اجرا می‌شود و بدون انتظار در صف نوشتن قرار می‌گیرد
+        (خواندن بعدی همین thread ابتدا صف را commit می‌کند)
+        return: Future تعداد روزهای ثبت شده
+        """
+        def append_missing(conn):
+            last = conn.execute("SELECT MAX(date) FROM portfolio_nav").fetchone()[0]
+            return self._write_portfolio_nav(conn, last, None)
+            
+        return self.transaction_deferred(append_missing, "updating portfolio NAV")
+            
+    def rebuild_portfolio_nav(self, start_date=None, end_date=None):
+        """
+        بازسازی ارزش پرتفوی در یک بازه زمانی (backfill)
+        start_date: تاریخ شروع (None برای ابتدای تاریخچه)
+        end_date: تاریخ پایان (None برای آخرین روز)
+        return: تعداد روزهای ثبت شده
+        """
+        def rebuild(conn):
+            conn.execute("""
+                DELETE FROM portfolio_nav
+                WHERE date >= COALESCE(?, date) AND date <= COALESCE(?, date)
+            """, (start_date, end_date))
+            return self._write_portfolio_nav(conn, start_date, end_date)
+            
+        try:
+            return self.transaction(rebuild)
+            
+        except Exception as e:
+            print(f"Error rebuilding portfolio NAV: {str(e)}")
+            return 0
+            
     def get_top_stocks(self):
         """
         دریافت سهام برتر پرتفوی
         return: لیست دیکشنری‌های اطلاعات سهام برتر
         """
         try:
-            stocks = self.get_portfolio_stocks()
-            return sorted(stocks, key=lambda x: x["value"], reverse=True)[:5]
+            return self.get_portfolio_stocks(limit=5)
             
         except Exception as e:
             print(f"Error getting top stocks: {str(e)}")
             return []
             
-    def insert_sample_data(self):
-        """Insert sample data into tables"""
+    def get_last_price(self, symbol):
+        """
+        دریافت آخرین قیمت یک سهم از جدول latest_quote
+        symbol: نماد سهم
+        return: آخرین قیمت یا None
+        """
+        try:
+            row = self.query_one("SELECT last_close FROM latest_quote WHERE symbol=?", (symbol,))
+            return row[0] if row else None
+            
+        except Exception as e:
+            print(f"Error getting last price: {str(e)}")
+            return None
+            
+    def get_stock_prices(self, symbol, start_date=None, end_date=None):
+        """
+        دریافت قیمت‌های روزانه یک سهم در یک بازه
+        مستقیماً از price_history و با کلید (symbol_id, date) خوانده می‌شود
+        symbol: نماد سهم
+        start_date: تاریخ شروع YYYY-MM-DD (اختیاری)
+        end_date: تاریخ پایان YYYY-MM-DD (اختیاری)
+        return: لیست دیکشنری‌های قیمت روزانه
+        """
+        try:
+            query = """
+                SELECT 
+                    printf('%04d-%02d-%02d', h.date / 10000, h.date / 100 % 100, h.date % 100),
+                    h.open, h.high, h.low, h.close, h.volume
+                FROM symbol_ids s
+                JOIN price_history h ON h.symbol_id = s.id
+                WHERE s.symbol = ?
+            """
+            params = [symbol]
+            
+            # شرط بازه روی کلید عددی تا جستجو از ایندکس اصلی استفاده کند
+            if start_date:
+                query += " AND h.date >= ?"
+                params.append(int(str(start_date)[:10].replace('-', '')))
+            if end_date:
+                query += " AND h.date <= ?"
+                params.append(int(str(end_date)[:10].replace('-', '')))
+                
+            rows = self.query(query + " ORDER BY h.date", params)
+            
+            return [{
+                "date": row[0],
+                "open": row[1],
+                "high": row[2],
+                "low": row[3],
+                "close": row[4],
+                "volume": row[5]
+            } for row in rows]
+            
+        except Exception as e:
+            print(f"Error getting stock prices: {str(e)}")
+            return []
+            
+    def save_stock_prices(self, rows):
+        """
+        ذخیره قیمت‌های روزانه در یک تراکنش بدون انتظار (دریافت گروهی در پس‌زمینه)
+        نمادهای جدید در symbol_ids ثبت و قیمت‌ها به ریال صحیح گرد می‌شوند؛
+        جدول latest_quote توسط trigger در همین تراکنش به‌روز می‌شود
+        rows: لیست (symbol, date, open, high, low, close, volume)
+        return: Future عملیات (نتیجه پس از commit)
+        """
+        def write_prices(conn):
+            conn.executemany(
+                "INSERT OR IGNORE INTO symbol_ids (symbol) VALUES (?)",
+                {(row[0],) for row in rows}
+            )
+            conn.executemany("""
+                INSERT OR REPLACE INTO price_history
+                (symbol_id, date, open, high, low, close, volume)
+                VALUES (
+                    (SELECT id FROM symbol_ids WHERE symbol = ?),
+                    CAST(replace(substr(?, 1, 10), '-', '') AS INTEGER),
+                    CAST(ROUND(?) AS INTEGER), CAST(ROUND(?) AS INTEGER),
+                    CAST(ROUND(?) AS INTEGER), CAST(ROUND(?) AS INTEGER),
+                    CAST(ROUND(?) AS INTEGER)
+                )
+            """, rows)
+            
+        return self.transaction_deferred(write_prices, "saving stock prices")
+            
+    def register_symbols(self, codes):
+        """
+        ثبت نمادها و کدهای ابزار TSETMC در فرهنگ نمادها
+        codes: دیکشنری نماد به کد ابزار (مانند stocknames در tsemodule5)
+        return: True در صورت موفقیت
+        """
+        def upsert(conn):
+            conn.executemany("""
+                INSERT INTO symbol_ids (symbol, inscode) VALUES (?, ?)
+                ON CONFLICT (symbol) DO UPDATE SET inscode = excluded.inscode
+            """, list(codes.items()))
+            
+        try:
+            self.transaction(upsert)
+            return True
+            
+        except Exception as e:
+            print(f"Error registering symbols: {str(e)}")
+            return False
+            
+    def get_symbol_id(self, symbol=None, inscode=None):
+        """
+        دریافت شناسه عددی یک نماد یا کد ابزار
+        symbol: نماد سهم
+        inscode: کد ابزار TSETMC
+        return: شناسه عددی یا None
+        """
+        try:
+            if symbol is not None:
+                row = self.query_one("SELECT id FROM symbol_ids WHERE symbol=?", (symbol,))
+            else:
+                row = self.query_one("SELECT id FROM symbol_ids WHERE inscode=?", (inscode,))
+            return row[0] if row else None
+            
+        except Exception as e:
+            print(f"Error getting symbol id: {str(e)}")
+            return None
+            
+    def insert_sample_data(self, conn):
+        """
+        Insert sample data into tables
+        conn: writer connection
+        """
         # Check if stock_list is empty
-        self.cursor.execute('SELECT COUNT(*) FROM stock_list')
-        if self.cursor.fetchone()[0] == 0:
+        if conn.execute('SELECT COUNT(*) FROM stock_list').fetchone()[0] == 0:
             # Insert sample stocks
             sample_stocks = [
                 ('خودرو', 'ایران خودرو', 'IRAN1', 'خودرو', 'بورس', datetime.now()),
@@ -804,25 +998,19 @@ class DatabaseManager:
                 ('شپنا', 'پالایش نفت', 'SHGN1', 'نفت', 'بورس', datetime.now())
             ]
             
-            self.cursor.executemany('''
+            conn.executemany('''
                 INSERT INTO stock_list (symbol, name, code, sector, market, last_update)
                 VALUES (?, ?, ?, ?, ?, ?)
             ''', sample_stocks)
             
         # Check if settings is empty
-        self.cursor.execute('SELECT COUNT(*) FROM settings')
-        if self.cursor.fetchone()[0] == 0:
+        if conn.execute('SELECT COUNT(*) FROM settings').fetchone()[0] == 0:
             # Insert default settings
-            self.cursor.execute('''
+            conn.execute('''
                 INSERT INTO settings (id, basic_info_url, ratios_url, statements_url, profitability_url)
                 VALUES (1, '', '', '', '')
             ''')
             
-        self.conn.commit()
-            
-    def __del__(self):
-        """تخریب‌گر کلاس"""
-        try:
-            self.conn.close()
-        except:
-            pass
\ No newline at end of file
+    def close(self):
+        """بستن سرویس پایگاه داده و اجرای نوشتن‌های در صف"""
+        self.service.close()
\ No newline at end of file
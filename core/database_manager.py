@@ -7,21 +7,34 @@
 - بهینه‌سازی عملکرد
 """
 
+import logging
 import sqlite3
-from typing import Dict, List, Optional
+import time
+from typing import Dict, List, Optional, Union
+import numpy as np
 import pandas as pd
 from datetime import datetime, timedelta
 from .exceptions import DatabaseError
+from .price_archive import PriceArchive, date_to_int
+from .price_panel import PricePanel, normalize_fields
+
+# ستون‌های قیمت به ترتیب درج در جدول daily_prices
+PRICE_COLUMNS = ('open', 'high', 'low', 'close', 'volume')
+
+# حداکثر تعداد نماد در هر پرس‌وجوی پنل (محدودیت پارامترهای SQLite)
+PANEL_CHUNK_SIZE = 500
 
 class DatabaseManager:
-    def __init__(self, db_path: str = 'data/market.db'):
+    def __init__(self, db_path: str = 'data/market.db', archive_dir: Optional[str] = None):
         """
         سازنده کلاس DatabaseManager
         db_path: مسیر فایل پایگاه داده
+        archive_dir: مسیر آرشیو ستونی قیمت‌ها (اختیاری)
         """
         self.db_path = db_path
         self.connection = None
         self.cursor = None
+        self.archive = PriceArchive(archive_dir) if archive_dir else None
         self._connect()
         self._create_tables()
         
@@ -32,9 +45,20 @@ class DatabaseManager:
         try:
             self.connection = sqlite3.connect(self.db_path)
             self.cursor = self.connection.cursor()
+            self._apply_pragmas()
         except Exception as e:
             raise DatabaseError(f"خطا در اتصال به پایگاه داده: {str(e)}")
             
+    def _apply_pragmas(self):
+        """
+        اعمال تنظیمات کارایی SQLite
+        حالت WAL اجازه می‌دهد خواندن‌ها هم‌زمان با نوشتن انجام شوند
+        """
+        self.cursor.execute("PRAGMA journal_mode=WAL")
+        self.cursor.execute("PRAGMA synchronous=NORMAL")
+        self.cursor.execute("PRAGMA temp_store=MEMORY")
+        self.cursor.execute("PRAGMA cache_size=-65536")  # حدود 64 مگابایت
+            
     def _create_tables(self):
         """
         ایجاد جداول مورد نیاز
@@ -78,10 +102,10 @@ class DatabaseManager:
         """
         self._connect()
         try:
-            # بروزرسانی جدول سهام
+            # بروزرسانی زمان آخرین تغییر سهم
             self.cursor.execute("""
-                INSERT OR REPLACE INTO stocks 
-                (symbol, last_update) VALUES (?, ?)
+                INSERT INTO stock_info (symbol, last_update) VALUES (?, ?)
+                ON CONFLICT(symbol) DO UPDATE SET last_update = excluded.last_update
             """, (symbol, datetime.now()))
             
             # تبدیل دیتافریم به رکوردهای قابل درج
@@ -99,9 +123,178 @@ class DatabaseManager:
         except Exception as e:
             self.connection.rollback()
             raise DatabaseError(f"خطا در ذخیره اطلاعات سهم: {str(e)}")
+        else:
+            # هم‌گام نگه داشتن آرشیو ستونی پس از commit
+            if self.archive is not None:
+                self._sync_archive(symbol, data)
         finally:
             self._disconnect()
     
+    def bulk_save_stock_data(self, data: Union[pd.DataFrame, Dict], symbol: str = None) -> Dict:
+        """
+        ذخیره حجیم اطلاعات قیمت یک یا چند سهم در یک تراکنش
+        data: یکی از حالت‌های زیر
+            - دیتافریم با ستون‌های date و OHLCV (و ستون symbol برای چند سهم)
+            - دیکشنری ستونی از آرایه‌های NumPy یا لیست‌ها با همان کلیدها
+            - دیکشنری نماد به دیتافریم یا دیکشنری ستونی
+        symbol: نماد سهم وقتی داده فاقد ستون symbol است
+        return: دیکشنری آمار درج (rows, symbols, seconds, rows_per_sec)
+        """
+        start_time = time.perf_counter()
+        
+        # تبدیل ورودی به لیستی از (نماد، ستون‌ها)
+        if isinstance(data, pd.DataFrame) or self._is_column_dict(data):
+            batches = [(symbol, data)]
+        else:
+            batches = list(data.items())
+            
+        self._connect()
+        try:
+            total_rows = 0
+            symbols = set()
+            
+            self.cursor.execute("BEGIN")
+            for batch_symbol, columns in batches:
+                rows = self._price_rows(batch_symbol, columns)
+                self.cursor.executemany("""
+                    INSERT OR REPLACE INTO daily_prices 
+                    (symbol, date, open, high, low, close, volume)
+                    VALUES (?, ?, ?, ?, ?, ?, ?)
+                """, rows)
+                total_rows += len(rows)
+                symbols.update(row[0] for row in rows)
+                
+            # بروزرسانی زمان آخرین تغییر نمادها
+            now = datetime.now()
+            self.cursor.executemany("""
+                INSERT INTO stock_info (symbol, last_update) VALUES (?, ?)
+                ON CONFLICT(symbol) DO UPDATE SET last_update = excluded.last_update
+            """, [(s, now) for s in symbols])
+            
+            self.connection.commit()
+        except Exception as e:
+            self.connection.rollback()
+            raise DatabaseError(f"خطا در ذخیره حجیم اطلاعات سهام: {str(e)}")
+        else:
+            # هم‌گام نگه داشتن آرشیو ستونی پس از commit؛ خطای آرشیو ذخیره را ناموفق نمی‌کند
+            if self.archive is not None:
+                for batch_symbol, columns in batches:
+                    self._sync_archive(batch_symbol, columns)
+            
+            elapsed = time.perf_counter() - start_time
+            return {
+                'rows': total_rows,
+                'symbols': len(symbols),
+                'seconds': elapsed,
+                'rows_per_sec': total_rows / elapsed if elapsed > 0 else 0
+            }
+        finally:
+            self._disconnect()
+            
+    def _sync_archive(self, symbol: Optional[str], columns):
+        """
+        هم‌گام کردن آرشیو ستونی با ردیف‌های commit شده یک دسته
+        (باید پس از commit و پیش از قطع اتصال فراخوانی شود)
+        خطاها فقط ثبت می‌شوند چون داده‌ها در پایگاه داده ذخیره شده‌اند
+        symbol: نماد سهم (در صورت نبود ستون symbol)
+        columns: دیتافریم یا دیکشنری ستونی
+        """
+        frame = pd.DataFrame(columns)
+        if 'date' not in frame:
+            frame = frame.reset_index()
+        groups = [(symbol, frame)] if symbol is not None else frame.groupby('symbol', sort=False)
+        for group_symbol, group in groups:
+            try:
+                self._append_to_archive(group_symbol, group)
+            except Exception as e:
+                logging.error(f"خطا در هم‌گام‌سازی آرشیو قیمت {group_symbol}: {str(e)}")
+            
+    def _append_to_archive(self, symbol: str, frame: pd.DataFrame):
+        """
+        افزودن ردیف‌های یک نماد به آرشیو ستونی
+        آرشیو انتهای تاریخچه را از اولین تاریخ جدید بازنویسی می‌کند؛ اگر این تاریخ
+        پیش از آخرین تاریخ آرشیو باشد، ردیف‌ها از همان تاریخ از SQL خوانده می‌شوند
+        تا ردیف‌های بعدی موجود حذف نشوند
+        symbol: نماد سهم
+        frame: دیتافریم date و OHLCV
+        """
+        if frame.empty:
+            return
+        first = min(self._normalize_dates(frame['date']))
+        last = self.archive.last_date(symbol)
+        if last is not None and int(date_to_int([first])[0]) <= last:
+            frame = pd.read_sql_query("""
+                SELECT date, open, high, low, close, volume
+                FROM daily_prices
+                WHERE symbol = ? AND date >= ?
+                ORDER BY date
+            """, self.connection, params=[symbol, first])
+        self.archive.append(symbol, frame)
+            
+    @staticmethod
+    def _is_column_dict(data) -> bool:
+        """
+        بررسی ستونی بودن دیکشنری ورودی
+        data: داده ورودی
+        return: True اگر دیکشنری شامل ستون date باشد
+        """
+        return isinstance(data, dict) and 'date' in data
+        
+    def _price_rows(self, symbol: Optional[str], columns) -> List[tuple]:
+        """
+        تبدیل داده‌های ستونی به ردیف‌های قابل درج
+        symbol: نماد سهم (در صورت نبود ستون symbol)
+        columns: دیتافریم یا دیکشنری ستونی
+        return: لیست ردیف‌ها به ترتیب ستون‌های daily_prices
+        """
+        if isinstance(columns, pd.DataFrame) and 'date' not in columns:
+            columns = columns.reset_index()
+            
+        dates = self._normalize_dates(columns['date'])
+        count = len(dates)
+        
+        if symbol is None:
+            if 'symbol' not in columns:
+                raise DatabaseError("نماد سهم مشخص نشده است")
+            symbols = self._to_list(columns['symbol'])
+        else:
+            symbols = [symbol] * count
+            
+        values = [self._to_list(columns[name]) for name in PRICE_COLUMNS]
+        for name, column in zip(PRICE_COLUMNS, values):
+            if len(column) != count:
+                raise DatabaseError(f"طول ستون {name} با ستون date برابر نیست")
+                
+        return list(zip(symbols, dates, *values))
+        
+    @staticmethod
+    def _to_list(column) -> list:
+        """
+        تبدیل یک ستون به لیست مقادیر پایتونی
+        column: سری پانداس، آرایه NumPy یا لیست
+        return: لیست مقادیر قابل ذخیره در SQLite
+        """
+        if isinstance(column, (pd.Series, pd.Index)):
+            column = column.to_numpy()
+        if isinstance(column, np.ndarray):
+            return column.tolist()
+        return list(column)
+        
+    def _normalize_dates(self, column) -> List[str]:
+        """
+        تبدیل ستون تاریخ به رشته‌های YYYY-MM-DD
+        column: ستون تاریخ (رشته، datetime یا datetime64)
+        return: لیست تاریخ‌ها
+        """
+        if isinstance(column, (pd.Series, pd.Index)):
+            column = column.to_numpy()
+        array = np.asarray(column)
+        if np.issubdtype(array.dtype, np.datetime64):
+            return np.datetime_as_string(array, unit='D').tolist()
+        if array.dtype == object and len(array) and isinstance(array[0], datetime):
+            return [d.strftime('%Y-%m-%d') for d in array]
+        return self._to_list(array)
+    
     def get_stock_data(self, symbol, start_date=None, end_date=None):
         """
         بازیابی اطلاعات یک سهم از پایگاه داده
@@ -110,6 +303,10 @@ class DatabaseManager:
         end_date: تاریخ پایان
         return: دیتافریم اطلاعات سهم
         """
+        # خواندن از آرشیو ستونی در صورت وجود نماد در آن
+        if self.archive is not None and self.archive.has(symbol):
+            return self.archive.read_frame(symbol, start_date, end_date)
+            
         self._connect()
         try:
             query = """
@@ -136,6 +333,64 @@ class DatabaseManager:
         finally:
             self._disconnect()
     
+    def get_price_panel(self, symbols: List[str], start_date=None, end_date=None,
+                        fields: Union[str, List[str]] = 'close', calendar=None,
+                        fill: Optional[str] = 'ffill') -> PricePanel:
+        """
+        بازیابی قیمت‌های چند سهم به صورت ماتریس هم‌تراز تاریخ × نماد
+        symbols: لیست نمادها
+        start_date: تاریخ شروع
+        end_date: تاریخ پایان
+        fields: نام یک فیلد یا لیست فیلدهای OHLCV
+        calendar: لیست روزهای معاملاتی سطرها (پیش‌فرض: اجتماع تاریخ‌های موجود)
+        fill: 'ffill' برای پر کردن روزهای بدون معامله یا None برای NaN
+        return: نمونه PricePanel
+        """
+        fields = normalize_fields(fields)
+        symbols = list(dict.fromkeys(symbols))
+        
+        # خواندن از آرشیو ستونی اگر همه نمادها در آن موجود باشند
+        if self.archive is not None and all(self.archive.has(s) for s in symbols):
+            return PricePanel.from_archive(self.archive, symbols, start_date, end_date,
+                                           fields, calendar, fill)
+            
+        self._connect()
+        try:
+            rows = []
+            for first in range(0, len(symbols), PANEL_CHUNK_SIZE):
+                chunk = symbols[first:first + PANEL_CHUNK_SIZE]
+                query = f"""
+                    SELECT symbol, CAST(replace(substr(date, 1, 10), '-', '') AS INTEGER),
+                           {', '.join(fields)}
+                    FROM daily_prices
+                    WHERE symbol IN ({', '.join('?' * len(chunk))})
+                """
+                params = list(chunk)
+                
+                if start_date:
+                    query += " AND date >= ?"
+                    params.append(start_date)
+                if end_date:
+                    query += " AND date <= ?"
+                    params.append(end_date)
+                    
+                rows.extend(self.cursor.execute(query, params).fetchall())
+                
+            index = {symbol: i for i, symbol in enumerate(symbols)}
+            columns = list(zip(*rows)) or [()] * (len(fields) + 2)
+            row_symbols = np.fromiter((index[s] for s in columns[0]), dtype=np.int64, count=len(rows))
+            values = {
+                field: np.array(column, dtype=np.float64)
+                for field, column in zip(fields, columns[2:])
+            }
+            return PricePanel.from_rows(symbols, row_symbols, np.array(columns[1], dtype=np.int32),
+                                        values, calendar, fill)
+            
+        except Exception as e:
+            raise DatabaseError(f"خطا در بازیابی پنل قیمت سهام: {str(e)}")
+        finally:
+            self._disconnect()
+    
     def add_to_watchlist(self, symbol, notes=''):
         """
         افزودن سهم به لیست علاقه‌مندی‌ها
@@ -266,6 +521,16 @@ class DatabaseManager:
         finally:
             self._disconnect()
 
+    def build_archive(self, symbols: Optional[List[str]] = None) -> Dict:
+        """
+        ساخت یا تکمیل آرشیو ستونی از جدول daily_prices
+        symbols: لیست نمادها (None برای همه نمادها)
+        return: دیکشنری آمار (symbols, rows)
+        """
+        if self.archive is None:
+            raise DatabaseError("آرشیو ستونی قیمت‌ها تنظیم نشده است")
+        return self.archive.import_from_sqlite(self.db_path, 'daily_prices', symbols)
+        
     def get_database_stats(self) -> Dict:
         """
         دریافت آمار پایگاه داده
@@ -0,0 +1,303 @@
+"""
+این ماژول پشتیبان‌گیری آنلاین از پایگاه داده را مدیریت می‌کند.
+این ماژول امکانات زیر را فراهم می‌کند:
+- پشتیبان کامل با API پشتیبان SQLite در گام‌های چند صفحه‌ای
+- اجرای پشتیبان‌گیری در thread پس‌زمینه بدون قفل کردن خواندن و نوشتن
+- پشتیبان افزایشی از بخش‌های تغییر یافته جدول قیمت‌ها (نماد، ماه)
+- حذف پشتیبان‌های قدیمی بر اساس تعداد نگهداری
+"""
+
+import os
+import sqlite3
+import threading
+from concurrent.futures import Future
+from datetime import datetime
+from typing import Callable, List, Optional
+from .db_service import DatabaseService
+from .exceptions import DatabaseError
+
+# جداولی که در پشتیبان افزایشی به صورت کامل کپی نمی‌شوند
+_INCREMENTAL_EXCLUDED = ('stock_prices', 'price_history', 'latest_quote', 'backup_changes',
+                         'schema_version')
+
+
+class DatabaseBackup:
+    """کلاس پشتیبان‌گیری آنلاین از پایگاه داده"""
+
+    def __init__(self, service: DatabaseService, backup_dir: str, keep: int = 5,
+                 pages: int = 1024, sleep: float = 0.005):
+        """
+        سازنده کلاس DatabaseBackup
+        service: سرویس مشترک پایگاه داده
+        backup_dir: پوشه فایل‌های پشتیبان
+        keep: تعداد پشتیبان‌های کامل نگهداری شده
+        pages: تعداد صفحات کپی شده در هر گام
+        sleep: مکث بین گام‌ها (ثانیه)
+        """
+        self.service = service
+        self.db_path = service.db_path
+        self.backup_dir = backup_dir
+        self.keep = keep
+        self.pages = pages
+        self.sleep = sleep
+
+        self._running: Optional[Future] = None
+        self._lock = threading.Lock()
+        os.makedirs(backup_dir, exist_ok=True)
+
+    def start(self, incremental: bool = False,
+              progress: Optional[Callable[[int, int], None]] = None) -> Future:
+        """
+        شروع پشتیبان‌گیری در thread پس‌زمینه
+        اگر پشتیبان‌گیری دیگری در حال اجرا باشد همان Future برگردانده می‌شود
+        incremental: پشتیبان افزایشی به جای کامل
+        progress: تابع گزارش پیشرفت (صفحات باقیمانده، کل صفحات)
+        return: Future مسیر فایل پشتیبان
+        """
+        with self._lock:
+            if self._running is not None and not self._running.done():
+                return self._running
+            future = Future()
+            self._running = future
+
+        def worker():
+            if not future.set_running_or_notify_cancel():
+                return
+            try:
+                future.set_result(self.run(incremental, progress))
+            except Exception as e:
+                future.set_exception(e)
+
+        threading.Thread(target=worker, name='db-backup', daemon=True).start()
+        return future
+
+    def run(self, incremental: bool = False,
+            progress: Optional[Callable[[int, int], None]] = None) -> str:
+        """
+        اجرای همگام پشتیبان‌گیری و حذف پشتیبان‌های قدیمی
+        incremental: پشتیبان افزایشی به جای کامل
+        progress: تابع گزارش پیشرفت (صفحات باقیمانده، کل صفحات)
+        return: مسیر فایل پشتیبان
+        """
+        try:
+            # پشتیبان افزایشی بدون پشتیبان کامل پایه معنا ندارد
+            if incremental and self.list_backups('full'):
+                path = self._incremental_backup()
+            else:
+                path = self._full_backup(progress)
+            self.rotate()
+            return path
+        except sqlite3.Error as e:
+            raise DatabaseError(f"خطا در پشتیبان‌گیری از پایگاه داده: {str(e)}")
+
+    def _target_path(self, kind: str) -> str:
+        """
+        ساخت مسیر فایل پشتیبان جدید
+        kind: نوع پشتیبان (full یا incr)
+        return: مسیر فایل
+        """
+        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S_%f')
+        return os.path.join(self.backup_dir, f"{kind}_{timestamp}.db")
+
+    def _open_source(self) -> sqlite3.Connection:
+        """
+        باز کردن اتصال خواندنی به پایگاه داده اصلی
+        return: اتصال SQLite در حالت autocommit
+        """
+        return sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+
+    @staticmethod
+    def _change_seq(conn: sqlite3.Connection) -> int:
+        """
+        دریافت شماره آخرین تغییر ثبت شده قیمت‌ها
+        conn: اتصال پایگاه داده
+        return: شماره تغییر (0 اگر جدول وجود نداشته باشد)
+        """
+        exists = conn.execute("""
+            SELECT 1 FROM sqlite_master
+            WHERE type = 'table' AND name = 'backup_changes'
+        """).fetchone()
+        if not exists:
+            return 0
+        return conn.execute("SELECT COALESCE(MAX(id), 0) FROM backup_changes").fetchone()[0]
+
+    def _consume_changes(self, seq: int):
+        """
+        حذف تغییرات ثبت شده‌ای که در پشتیبان آمده‌اند
+        seq: شماره آخرین تغییر موجود در پشتیبان
+        """
+        if seq:
+            self.service.execute("DELETE FROM backup_changes WHERE id <= ?", (seq,))
+
+    def _full_backup(self, progress=None) -> str:
+        """
+        پشتیبان کامل با API پشتیبان SQLite
+        در طول کپی یک تراکنش خواندنی باز نگه داشته می‌شود تا تصویر ثابتی
+        کپی شود و نوشتن‌های هم‌زمان باعث شروع مجدد کپی نشوند
+        progress: تابع گزارش پیشرفت
+        return: مسیر فایل پشتیبان
+        """
+        target = self._target_path('full')
+        partial = target + '.part'
+
+        source = self._open_source()
+        try:
+            source.execute("BEGIN")
+            seq = self._change_seq(source)
+
+            destination = sqlite3.connect(partial)
+            try:
+                source.backup(
+                    destination,
+                    pages=self.pages,
+                    progress=(lambda status, remaining, total: progress(remaining, total))
+                    if progress else None,
+                    sleep=self.sleep
+                )
+            finally:
+                destination.close()
+            source.execute("ROLLBACK")
+        except Exception:
+            if os.path.exists(partial):
+                os.remove(partial)
+            raise
+        finally:
+            source.close()
+
+        os.replace(partial, target)
+        self._consume_changes(seq)
+        return target
+
+    def _incremental_backup(self) -> str:
+        """
+        پشتیبان افزایشی: فقط بخش‌های (نماد، ماه) تغییر یافته جدول قیمت‌ها
+        به همراه نسخه کامل جداول کوچک در فایل جداگانه ذخیره می‌شوند
+        return: مسیر فایل پشتیبان
+        """
+        target = self._target_path('incr')
+        partial = target + '.part'
+
+        source = self._open_source()
+        try:
+            source.execute("ATTACH DATABASE ? AS delta", (partial,))
+            source.execute("BEGIN")
+            seq = self._change_seq(source)
+
+            source.execute("""
+                CREATE TABLE delta.backup_info AS
+                SELECT ? AS created_at, ? AS change_seq
+            """, (datetime.now().isoformat(), seq))
+            source.execute("""
+                CREATE TABLE delta.partitions AS
+                SELECT symbol, month FROM main.backup_changes WHERE id <= ?
+            """, (seq,))
+            source.execute("""
+                CREATE TABLE delta.stock_prices AS
+                SELECT p.* FROM delta.partitions d
+                JOIN main.stock_prices p
+                    ON p.symbol = d.symbol AND substr(p.date, 1, 7) = d.month
+            """)
+
+            # جداول کوچک (پرتفوی، دیده‌بان، تنظیمات و ...) به صورت کامل
+            for table in self._user_tables(source, 'main'):
+                if table in _INCREMENTAL_EXCLUDED:
+                    continue
+                source.execute(f'CREATE TABLE delta."{table}" AS SELECT * FROM main."{table}"')
+
+            source.execute("COMMIT")
+            source.execute("DETACH DATABASE delta")
+        except Exception:
+            source.close()
+            if os.path.exists(partial):
+                os.remove(partial)
+            raise
+        source.close()
+
+        os.replace(partial, target)
+        self._consume_changes(seq)
+        return target
+
+    @staticmethod
+    def _user_tables(conn: sqlite3.Connection, schema: str) -> List[str]:
+        """
+        دریافت نام جداول کاربری یک پایگاه داده
+        conn: اتصال پایگاه داده
+        schema: نام پایگاه داده (main یا نام پیوست شده)
+        return: لیست نام جداول
+        """
+        rows = conn.execute(f"""
+            SELECT name FROM {schema}.sqlite_master
+            WHERE type = 'table' AND name NOT LIKE 'sqlite_%'
+        """).fetchall()
+        return [row[0] for row in rows]
+
+    def list_backups(self, kind: str) -> List[str]:
+        """
+        دریافت لیست فایل‌های پشتیبان به ترتیب زمان
+        kind: نوع پشتیبان (full یا incr)
+        return: لیست مسیر فایل‌ها (قدیمی‌ترین اول)
+        """
+        names = sorted(
+            name for name in os.listdir(self.backup_dir)
+            if name.startswith(f"{kind}_") and name.endswith('.db')
+        )
+        return [os.path.join(self.backup_dir, name) for name in names]
+
+    def rotate(self) -> List[str]:
+        """
+        حذف پشتیبان‌های کامل قدیمی‌تر از تعداد نگهداری
+        و پشتیبان‌های افزایشی قدیمی‌تر از قدیمی‌ترین پشتیبان کامل باقیمانده
+        return: لیست فایل‌های حذف شده
+        """
+        fulls = self.list_backups('full')
+        removed = fulls[:-self.keep] if self.keep > 0 else []
+        kept = fulls[len(removed):]
+
+        if kept:
+            oldest = os.path.basename(kept[0])[len('full_'):]
+            removed += [
+                path for path in self.list_backups('incr')
+                if os.path.basename(path)[len('incr_'):] < oldest
+            ]
+
+        for path in removed:
+            for suffix in ('', '-wal', '-shm'):
+                if os.path.exists(path + suffix):
+                    os.remove(path + suffix)
+        return removed
+
+    @staticmethod
+    def restore_incremental(base_path: str, delta_path: str):
+        """
+        اعمال یک پشتیبان افزایشی روی نسخه‌ای از پشتیبان کامل
+        پشتیبان‌های افزایشی باید به ترتیب زمان اعمال شوند
+        base_path: مسیر پایگاه داده بازیابی شده از پشتیبان کامل
+        delta_path: مسیر فایل پشتیبان افزایشی
+        """
+        conn = sqlite3.connect(base_path)
+        try:
+            conn.execute("ATTACH DATABASE ? AS delta", (delta_path,))
+            with conn:
+                # جایگزینی کامل جداول کوچک (ابتدا تا شناسه نمادها با منبع یکسان باشد)
+                for table in DatabaseBackup._user_tables(conn, 'delta'):
+                    if table in ('backup_info', 'partitions', 'stock_prices'):
+                        continue
+                    conn.execute(f'DELETE FROM main."{table}"')
+                    conn.execute(f'INSERT INTO main."{table}" SELECT * FROM delta."{table}"')
+
+                # جایگزینی بخش‌های تغییر یافته قیمت‌ها
+                conn.execute("""
+                    DELETE FROM main.stock_prices WHERE EXISTS (
+                        SELECT 1 FROM delta.partitions d
+                        WHERE d.symbol = stock_prices.symbol
+                        AND d.month = substr(stock_prices.date, 1, 7)
+                    )
+                """)
+                conn.execute("INSERT INTO main.stock_prices SELECT * FROM delta.stock_prices")
+
+                conn.execute("DELETE FROM main.backup_changes")
+            conn.execute("DETACH DATABASE delta")
+        except sqlite3.Error as e:
+            raise DatabaseError(f"خطا در بازیابی پشتیبان افزایشی: {str(e)}")
+        finally:
+            conn.close()
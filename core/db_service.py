@@ -0,0 +1,349 @@
+"""
+این ماژول سرویس مشترک پایگاه داده را برای کل برنامه فراهم می‌کند.
+این ماژول امکانات زیر را فراهم می‌کند:
+- یک نمونه سرویس برای هر فایل پایگاه داده در کل فرایند
+- مخزن کوچک اتصال‌های خواندنی برای thread‌های مختلف
+- یک thread نویسنده که همه نوشتن‌ها را به ترتیب اجرا می‌کند
+- صف نوشتن با تأخیر (write-behind) که نوشتن‌ها را در یک تراکنش گروهی commit می‌کند
+- اجرای یک‌باره عملیات راه‌اندازی (مانند ایجاد جداول)
+"""
+
+import os
+import queue
+import sqlite3
+import threading
+import time
+from concurrent.futures import Future
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, List, Optional
+from .exceptions import DatabaseError
+
+
+def report_errors(future: Future, description: str) -> Future:
+    """
+    گزارش خطای نوشتن‌های با تأخیر پس از اجرا
+    future: Future عملیات
+    description: شرح عملیات
+    return: همان Future
+    """
+    def report(done):
+        if done.exception() is not None:
+            print(f"Error {description}: {str(done.exception())}")
+    future.add_done_callback(report)
+    return future
+
+
+class DatabaseService:
+    """کلاس سرویس مشترک پایگاه داده"""
+
+    _instances: Dict[str, 'DatabaseService'] = {}
+    _instances_lock = threading.Lock()
+
+    def __init__(self, db_path: str, pool_size: int = 4,
+                 batch_size: int = 500, batch_delay: float = 0.05):
+        """
+        سازنده کلاس DatabaseService
+        db_path: مسیر فایل پایگاه داده
+        pool_size: حداکثر تعداد اتصال‌های خواندنی
+        batch_size: حداکثر تعداد نوشتن‌ها در یک تراکنش گروهی
+        batch_delay: حداکثر زمان انتظار نوشتن‌های با تأخیر قبل از commit (ثانیه)
+        """
+        self.db_path = db_path
+        self.pool_size = pool_size
+        self.batch_size = batch_size
+        self.batch_delay = batch_delay
+
+        # مخزن اتصال‌های خواندنی
+        self._read_pool = queue.LifoQueue()
+        self._pool_slots = threading.Semaphore(pool_size)
+
+        # صف و thread نویسنده
+        self._write_queue = queue.Queue()
+        self._pending = threading.local()
+        self._write_conn = self._open_connection()
+        self._writer = threading.Thread(
+            target=self._writer_loop, name='db-writer', daemon=True
+        )
+        self._writer.start()
+
+        # عملیات یک‌باره اجرا شده
+        self._completed_tasks = set()
+        self._tasks_lock = threading.Lock()
+        self._closed = False
+
+    @classmethod
+    def get_instance(cls, db_path: str, pool_size: int = 4) -> 'DatabaseService':
+        """
+        دریافت سرویس مشترک برای یک فایل پایگاه داده
+        db_path: مسیر فایل پایگاه داده
+        pool_size: حداکثر تعداد اتصال‌های خواندنی
+        return: نمونه مشترک DatabaseService
+        """
+        key = os.path.abspath(db_path)
+        with cls._instances_lock:
+            service = cls._instances.get(key)
+            if service is None or service._closed:
+                service = cls(db_path, pool_size)
+                cls._instances[key] = service
+            return service
+
+    def _open_connection(self) -> sqlite3.Connection:
+        """
+        ایجاد یک اتصال جدید با تنظیمات کارایی
+        return: اتصال SQLite
+        """
+        try:
+            conn = sqlite3.connect(self.db_path, check_same_thread=False, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("PRAGMA temp_store=MEMORY")
+            return conn
+        except Exception as e:
+            raise DatabaseError(f"خطا در اتصال به پایگاه داده: {str(e)}")
+
+    @contextmanager
+    def read_connection(self):
+        """
+        امانت گرفتن یک اتصال خواندنی از مخزن
+        هر اتصال در هر لحظه فقط در اختیار یک thread است
+        """
+        self._pool_slots.acquire()
+        try:
+            try:
+                conn = self._read_pool.get_nowait()
+            except queue.Empty:
+                conn = self._open_connection()
+            try:
+                yield conn
+            finally:
+                self._read_pool.put(conn)
+        finally:
+            self._pool_slots.release()
+
+    def query(self, sql: str, params=()) -> List[tuple]:
+        """
+        اجرای یک پرس‌وجوی خواندنی
+        sql: دستور SQL
+        params: پارامترهای دستور
+        return: لیست ردیف‌ها
+        """
+        self._wait_for_own_writes()
+        with self.read_connection() as conn:
+            return conn.execute(sql, params).fetchall()
+
+    def query_one(self, sql: str, params=()) -> Optional[tuple]:
+        """
+        اجرای یک پرس‌وجوی خواندنی و دریافت اولین ردیف
+        sql: دستور SQL
+        params: پارامترهای دستور
+        return: اولین ردیف یا None
+        """
+        self._wait_for_own_writes()
+        with self.read_connection() as conn:
+            return conn.execute(sql, params).fetchone()
+
+    def submit(self, func: Callable[[sqlite3.Connection], Any]) -> Future:
+        """
+        ارسال یک عملیات نوشتنی به thread نویسنده
+        func: تابعی که اتصال نویسنده را می‌گیرد و در یک تراکنش اجرا می‌شود
+        return: Future نتیجه عملیات
+        """
+        if self._closed:
+            raise DatabaseError("سرویس پایگاه داده بسته شده است")
+        future = Future()
+        self._write_queue.put((func, future, False))
+        return future
+
+    def defer(self, func: Callable[[sqlite3.Connection], Any]) -> Future:
+        """
+        ارسال یک عملیات نوشتنی بدون انتظار (write-behind)
+        عملیات با نوشتن‌های دیگر در یک تراکنش گروهی commit می‌شود؛
+        خواندن‌های بعدی همین thread تا commit آن صبر می‌کنند
+        func: تابعی که اتصال نویسنده را می‌گیرد
+        return: Future نتیجه عملیات
+        """
+        if self._closed:
+            raise DatabaseError("سرویس پایگاه داده بسته شده است")
+        if threading.current_thread() is self._writer:
+            # فراخوانی تو در تو از داخل thread نویسنده
+            future = Future()
+            future.set_result(func(self._write_conn))
+            return future
+        future = Future()
+        self._write_queue.put((func, future, True))
+        self._pending.future = future
+        return future
+
+    def execute_deferred(self, sql: str, params=()) -> Future:
+        """
+        اجرای یک دستور نوشتنی با تأخیر
+        sql: دستور SQL
+        params: پارامترهای دستور
+        return: Future شناسه آخرین ردیف درج شده
+        """
+        return self.defer(lambda conn: conn.execute(sql, params).lastrowid)
+
+    def flush(self):
+        """
+        انتظار برای commit تمام نوشتن‌های در صف
+        """
+        if threading.current_thread() is self._writer or self._closed:
+            return
+        self.submit(lambda conn: None).result()
+
+    def _wait_for_own_writes(self):
+        """
+        تضمین خواندن نوشته‌های خود (read-your-writes)
+        اگر این thread نوشتن با تأخیر commit نشده داشته باشد، صف فوراً commit می‌شود
+        """
+        future = getattr(self._pending, 'future', None)
+        if future is None:
+            return
+        self._pending.future = None
+        if not future.done() and threading.current_thread() is not self._writer:
+            self.flush()
+
+    def write(self, func: Callable[[sqlite3.Connection], Any]) -> Any:
+        """
+        اجرای یک عملیات نوشتنی و انتظار برای نتیجه
+        func: تابعی که اتصال نویسنده را می‌گیرد
+        return: مقدار بازگشتی func
+        """
+        if threading.current_thread() is self._writer:
+            # فراخوانی تو در تو از داخل thread نویسنده
+            return func(self._write_conn)
+        return self.submit(func).result()
+
+    def execute(self, sql: str, params=()) -> int:
+        """
+        اجرای یک دستور نوشتنی
+        sql: دستور SQL
+        params: پارامترهای دستور
+        return: شناسه آخرین ردیف درج شده
+        """
+        return self.write(lambda conn: conn.execute(sql, params).lastrowid)
+
+    def executemany(self, sql: str, rows) -> int:
+        """
+        اجرای یک دستور نوشتنی برای چند ردیف در یک تراکنش
+        sql: دستور SQL
+        rows: لیست پارامترها
+        return: تعداد ردیف‌های تغییر یافته
+        """
+        return self.write(lambda conn: conn.executemany(sql, rows).rowcount)
+
+    def run_once(self, name: str, func: Callable[[sqlite3.Connection], Any]):
+        """
+        اجرای یک‌باره یک عملیات در طول عمر فرایند
+        name: نام یکتای عملیات
+        func: تابعی که اتصال نویسنده را می‌گیرد
+        """
+        with self._tasks_lock:
+            if name in self._completed_tasks:
+                return
+            self.write(func)
+            self._completed_tasks.add(name)
+
+    def _collect_batch(self, first) -> tuple:
+        """
+        جمع‌آوری یک دسته نوشتن برای یک تراکنش
+        دسته با رسیدن به batch_size، گذشت batch_delay از اولین نوشتن با تأخیر
+        یا رسیدن یک نوشتن همگام (که فراخواننده منتظر آن است) بسته می‌شود
+        first: اولین عملیات دسته
+        return: (لیست عملیات‌ها، True اگر سرویس در حال بسته شدن باشد)
+        """
+        batch = [first]
+        deadline = time.monotonic() + self.batch_delay
+        waiting = first[2]
+        while len(batch) < self.batch_size:
+            try:
+                if waiting:
+                    job = self._write_queue.get(timeout=max(0, deadline - time.monotonic()))
+                else:
+                    job = self._write_queue.get_nowait()
+            except queue.Empty:
+                break
+            if job[0] is None:
+                return batch, True
+            batch.append(job)
+            waiting = waiting and job[2]
+        return batch, False
+
+    def _run_batch(self, batch):
+        """
+        اجرای یک دسته نوشتن در یک تراکنش با یک commit
+        هر عملیات در savepoint جداگانه اجرا می‌شود تا خطای یکی بقیه را لغو نکند
+        batch: لیست عملیات‌ها
+        """
+        conn = self._write_conn
+        started = []
+        outcomes = []
+        try:
+            with conn:
+                if not conn.in_transaction:
+                    conn.execute("BEGIN")
+                for func, future, _ in batch:
+                    if not future.set_running_or_notify_cancel():
+                        continue
+                    started.append(future)
+                    conn.execute("SAVEPOINT job")
+                    try:
+                        outcomes.append((future, func(conn), None))
+                        conn.execute("RELEASE job")
+                    except Exception as e:
+                        conn.execute("ROLLBACK TO job")
+                        conn.execute("RELEASE job")
+                        outcomes.append((future, None, e))
+        except Exception as e:
+            # خطا در تراکنش یا commit: هیچ عملیاتی از دسته ثبت نشده است
+            outcomes = [(future, None, e) for future in started]
+
+        # نتیجه‌ها فقط پس از commit اعلام می‌شوند
+        for future, result, error in outcomes:
+            if error is None:
+                future.set_result(result)
+            else:
+                future.set_exception(error)
+
+    def _writer_loop(self):
+        """
+        حلقه اصلی thread نویسنده
+        عملیات‌های صف به صورت دسته‌ای در یک تراکنش اجرا و commit می‌شوند
+        """
+        while True:
+            job = self._write_queue.get()
+            if job[0] is None:
+                break
+            batch, closing = self._collect_batch(job)
+            self._run_batch(batch)
+            if closing:
+                break
+
+    def close(self):
+        """
+        بستن سرویس و تمام اتصال‌ها
+        نوشتن‌های در صف قبل از بسته شدن اجرا می‌شوند
+        """
+        if self._closed:
+            return
+        self._closed = True
+        self._write_queue.put((None, None, False))
+        self._writer.join()
+        self._write_conn.close()
+
+        while True:
+            try:
+                self._read_pool.get_nowait().close()
+            except queue.Empty:
+                break
+
+    @classmethod
+    def close_all(cls):
+        """
+        بستن تمام سرویس‌های باز (هنگام خروج از برنامه)
+        """
+        with cls._instances_lock:
+            services = list(cls._instances.values())
+            cls._instances.clear()
+        for service in services:
+            service.close()
@@ -72,6 +72,22 @@ class NetworkError(StockAppError):
     def __init__(self, message="خطا در اتصال به شبکه"):
         super().__init__(message)
 
+class CacheError(StockAppError):
+    """
+    خطاهای مربوط به کش
+    برای مدیریت خطاهای ذخیره و بازیابی داده‌های کش
+    """
+    def __init__(self, message="خطا در عملیات کش"):
+        super().__init__(message)
+
+class CircuitOpenError(APIError):
+    """
+    خطای قطع بودن موقت ارتباط با یک نقطه پایانی
+    پس از خطاهای پیاپی درخواست‌ها بدون ارسال به سرور رد می‌شوند
+    """
+    def __init__(self, message="ارتباط با سرور موقتاً قطع است"):
+        super().__init__(message)
+
 def handle_error(error, logger=None):
     """
     تابع مدیریت خطاها
@@ -84,7 +100,9 @@ def handle_error(error, logger=None):
         logger.error(f"خطا: {str(error)}")
         
     # برگرداندن پیام مناسب بر اساس نوع خطا
-    if isinstance(error, APIError):
+    if isinstance(error, CircuitOpenError):
+        return "ارتباط با سرور موقتاً قطع است. درخواست‌ها پس از مدت کوتاهی دوباره ارسال می‌شوند."
+    elif isinstance(error, APIError):
         return "خطا در ارتباط با سرور. لطفاً دوباره تلاش کنید."
     elif isinstance(error, DatabaseError):
         return "خطا در عملیات پایگاه داده. لطفاً با پشتیبانی تماس بگیرید."
@@ -0,0 +1,127 @@
+"""
+این ماژول نمایه زمان انقضای کلیدهای کش را فراهم می‌کند.
+این ماژول امکانات زیر را فراهم می‌کند:
+- صف اولویت (min-heap) روی زمان انقضا
+- استخراج فقط کلیدهای منقضی شده با هزینه O(k log n)
+- حذف تنبل ورودی‌های قدیمی هنگام تمدید یا حذف کلید
+- thread پس‌زمینه برای پاکسازی دوره‌ای
+"""
+
+import heapq
+import threading
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+
+
+class ExpiryIndex:
+    """کلاس نمایه انقضا با min-heap"""
+
+    def __init__(self):
+        """
+        سازنده کلاس ExpiryIndex
+        """
+        self._heap: List[Tuple[float, str]] = []
+        self._expiry: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._expiry)
+
+    def push(self, key: str, expires_at: float):
+        """
+        ثبت یا تمدید زمان انقضای یک کلید
+        ورودی قبلی کلید در heap می‌ماند و هنگام استخراج نادیده گرفته می‌شود
+        key: کلید کش
+        expires_at: زمان انقضا (timestamp)
+        """
+        with self._lock:
+            self._expiry[key] = expires_at
+            heapq.heappush(self._heap, (expires_at, key))
+            # جلوگیری از رشد بی‌رویه heap با ورودی‌های قدیمی
+            if len(self._heap) > 2 * len(self._expiry) + 1024:
+                self._heap = [(expiry, key) for key, expiry in self._expiry.items()]
+                heapq.heapify(self._heap)
+
+    def discard(self, key: str):
+        """
+        حذف یک کلید از نمایه
+        key: کلید کش
+        """
+        with self._lock:
+            self._expiry.pop(key, None)
+
+    def clear(self):
+        """
+        پاک کردن نمایه
+        """
+        with self._lock:
+            self._heap.clear()
+            self._expiry.clear()
+
+    def pop_expired(self, now: Optional[float] = None) -> List[str]:
+        """
+        استخراج کلیدهای منقضی شده
+        now: زمان مرجع (پیش‌فرض: اکنون)
+        return: لیست کلیدهای منقضی شده
+        """
+        now = time.time() if now is None else now
+        expired = []
+        with self._lock:
+            while self._heap and self._heap[0][0] <= now:
+                expires_at, key = heapq.heappop(self._heap)
+                if self._expiry.get(key) == expires_at:
+                    del self._expiry[key]
+                    expired.append(key)
+        return expired
+
+    def next_expiry(self) -> Optional[float]:
+        """
+        زودترین زمان انقضای ثبت شده (ممکن است متعلق به ورودی قدیمی باشد)
+        return: timestamp یا None
+        """
+        with self._lock:
+            return self._heap[0][0] if self._heap else None
+
+
+class ExpirySweeper:
+    """کلاس thread پس‌زمینه پاکسازی دوره‌ای"""
+
+    def __init__(self, sweep: Callable[[], None], interval: float = 30):
+        """
+        سازنده کلاس ExpirySweeper
+        sweep: تابع پاکسازی
+        interval: فاصله اجرای پاکسازی (ثانیه)
+        """
+        self.sweep = sweep
+        self.interval = interval
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self):
+        """
+        شروع thread پاکسازی (در صورت اجرا نبودن)
+        """
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name='cache-sweeper', daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        """
+        حلقه thread پاکسازی
+        """
+        while not self._stop.wait(self.interval):
+            try:
+                self.sweep()
+            except Exception as e:
+                print(f"Error sweeping expired cache entries: {str(e)}")
+
+    def stop(self):
+        """
+        توقف thread پاکسازی
+        """
+        self._stop.set()
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join()
+        self._thread = None
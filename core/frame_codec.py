@@ -0,0 +1,229 @@
+"""
+این ماژول سریال‌سازی دودویی ستونی دیتافریم‌ها و آرایه‌های NumPy را فراهم می‌کند.
+این ماژول امکانات زیر را فراهم می‌کند:
+- ذخیره هر ستون عددی، تاریخی یا منطقی به صورت بافر خام هم‌تراز (بدون تبدیل متنی)
+- حفظ نوع داده ستون‌ها، ایندکس (شامل DatetimeIndex و منطقه زمانی) و نام‌ها
+- بازسازی با np.frombuffer؛ روی فایل memmap بدون کپی داده
+- ذخیره ستون‌های متنی و object به صورت لیست JSON
+"""
+
+import json
+import struct
+from typing import Any, Dict, List, Tuple, Union
+import numpy as np
+import pandas as pd
+from .exceptions import CacheError
+
+MAGIC = b'SAF1'
+_HEADER = struct.Struct('<4sI')
+_ALIGN = 8
+
+
+def is_binary_value(value: Any) -> bool:
+    """
+    بررسی قابل سریال‌سازی بودن یک مقدار با این کدگذاری
+    value: مقدار کش
+    return: True برای دیتافریم، سری و آرایه NumPy
+    """
+    return isinstance(value, (pd.DataFrame, pd.Series, np.ndarray))
+
+
+def _is_raw(values) -> bool:
+    """
+    بررسی قابل ذخیره بودن آرایه به صورت بافر خام
+    values: آرایه یا آرایه پانداس
+    return: True برای انواع عددی، منطقی و تاریخی NumPy
+    """
+    dtype = getattr(values, 'dtype', None)
+    if isinstance(dtype, pd.DatetimeTZDtype):
+        return True
+    return isinstance(dtype, np.dtype) and dtype.kind in 'biufcmM'
+
+
+class _Writer:
+    """جمع‌آوری بافرهای خام با هم‌ترازی ۸ بایتی"""
+
+    def __init__(self):
+        self.buffers: List[bytes] = []
+        self.offset = 0
+
+    def add(self, values) -> Dict:
+        """
+        افزودن یک ستون و ساخت توصیف آن
+        values: آرایه NumPy، سری یا ایندکس
+        return: دیکشنری توصیف ستون
+        """
+        if isinstance(getattr(values, 'dtype', None), pd.DatetimeTZDtype):
+            # زمان‌های دارای منطقه زمانی به صورت UTC ذخیره می‌شوند
+            utc = pd.DatetimeIndex(values).tz_convert('UTC').tz_localize(None)
+            spec = self._raw(utc.to_numpy())
+            spec['tz'] = str(values.dtype.tz)
+            return spec
+        if _is_raw(values):
+            return self._raw(np.asarray(values))
+        # ستون‌های متنی، دسته‌ای و object
+        return {
+            'kind': 'json',
+            'dtype': str(values.dtype),
+            'values': np.asarray(values, dtype=object).tolist()
+        }
+
+    def _raw(self, array: np.ndarray) -> Dict:
+        """
+        افزودن بافر خام یک آرایه
+        array: آرایه NumPy
+        return: دیکشنری توصیف بافر
+        """
+        array = np.ascontiguousarray(array)
+        data = array.tobytes()
+        spec = {
+            'kind': 'raw',
+            'dtype': array.dtype.str,
+            'shape': list(array.shape),
+            'offset': self.offset
+        }
+        padding = -len(data) % _ALIGN
+        self.buffers.append(data + b'\0' * padding)
+        self.offset += len(data) + padding
+        return spec
+
+
+def _encode_index(writer: _Writer, index: pd.Index) -> Dict:
+    """
+    توصیف یک ایندکس پانداس
+    writer: جمع‌کننده بافرها
+    index: ایندکس
+    return: دیکشنری توصیف ایندکس
+    """
+    if isinstance(index, pd.MultiIndex):
+        raise CacheError("ایندکس چندسطحی در کدگذاری دودویی پشتیبانی نمی‌شود")
+    if isinstance(index, pd.RangeIndex):
+        spec = {'kind': 'range', 'start': index.start, 'stop': index.stop, 'step': index.step}
+    else:
+        spec = writer.add(index)
+        if isinstance(index, pd.DatetimeIndex) and index.freqstr:
+            spec['freq'] = index.freqstr
+    spec['name'] = index.name
+    return spec
+
+
+def serialize(value: Union[pd.DataFrame, pd.Series, np.ndarray]) -> bytes:
+    """
+    سریال‌سازی دیتافریم، سری یا آرایه به قالب دودویی ستونی
+    value: مقدار
+    return: بایت‌های کدگذاری شده
+    """
+    writer = _Writer()
+    try:
+        if isinstance(value, pd.DataFrame):
+            if isinstance(value.columns, pd.MultiIndex):
+                raise CacheError("ستون‌های چندسطحی در کدگذاری دودویی پشتیبانی نمی‌شوند")
+            header = {
+                'type': 'frame',
+                'index': _encode_index(writer, value.index),
+                'names': value.columns.tolist(),
+                'columns_name': value.columns.name,
+                'columns': [writer.add(value.iloc[:, i]) for i in range(value.shape[1])]
+            }
+        elif isinstance(value, pd.Series):
+            header = {
+                'type': 'series',
+                'index': _encode_index(writer, value.index),
+                'name': value.name,
+                'values': writer.add(value)
+            }
+        elif isinstance(value, np.ndarray):
+            if not _is_raw(value):
+                raise CacheError(f"نوع داده {value.dtype} در کدگذاری دودویی پشتیبانی نمی‌شود")
+            header = {'type': 'array', 'values': writer._raw(value)}
+        else:
+            raise CacheError(f"نوع {type(value).__name__} در کدگذاری دودویی پشتیبانی نمی‌شود")
+        meta = json.dumps(header, ensure_ascii=False, default=str).encode('utf-8')
+    except CacheError:
+        raise
+    except Exception as e:
+        raise CacheError(f"خطا در سریال‌سازی داده: {str(e)}")
+
+    # هم‌ترازی ابتدای بافرها
+    meta += b' ' * (-(_HEADER.size + len(meta)) % _ALIGN)
+    return b''.join([_HEADER.pack(MAGIC, len(meta)), meta, *writer.buffers])
+
+
+def _read_array(buffer, base: int, spec: Dict, copy: bool):
+    """
+    بازسازی یک ستون از توصیف آن
+    buffer: بافر کامل (بایت یا memmap)
+    base: محل شروع بافرها
+    spec: توصیف ستون
+    copy: کپی داده به جای نما روی بافر
+    return: آرایه NumPy یا آرایه پانداس
+    """
+    if spec['kind'] == 'json':
+        return pd.array(spec['values'], dtype=pd.api.types.pandas_dtype(spec['dtype']))
+    dtype = np.dtype(spec['dtype'])
+    count = int(np.prod(spec['shape'], dtype=np.int64))
+    array = np.frombuffer(buffer, dtype=dtype, count=count, offset=base + spec['offset'])
+    array = array.reshape(spec['shape'])
+    if copy:
+        array = array.copy()
+    if 'tz' in spec:
+        return pd.DatetimeIndex(array).tz_localize('UTC').tz_convert(spec['tz']).array
+    return array
+
+
+def _decode_index(buffer, base: int, spec: Dict, copy: bool) -> pd.Index:
+    """
+    بازسازی ایندکس از توصیف آن
+    buffer: بافر کامل
+    base: محل شروع بافرها
+    spec: توصیف ایندکس
+    copy: کپی داده به جای نما روی بافر
+    return: ایندکس پانداس
+    """
+    if spec['kind'] == 'range':
+        return pd.RangeIndex(spec['start'], spec['stop'], spec['step'], name=spec['name'])
+    index = pd.Index(_read_array(buffer, base, spec, copy), name=spec['name'], copy=False)
+    if 'freq' in spec:
+        index.freq = spec['freq']
+    return index
+
+
+def read_header(buffer) -> Tuple[Dict, int]:
+    """
+    خواندن سرآیند یک مقدار کدگذاری شده
+    buffer: بایت‌ها یا memmap
+    return: (دیکشنری سرآیند، محل شروع بافرها)
+    """
+    magic, length = _HEADER.unpack_from(buffer, 0)
+    if magic != MAGIC:
+        raise CacheError("قالب داده دودویی کش معتبر نیست")
+    start = _HEADER.size
+    header = json.loads(bytes(buffer[start:start + length]).decode('utf-8'))
+    return header, start + length
+
+
+def deserialize(buffer, copy: bool = True) -> Union[pd.DataFrame, pd.Series, np.ndarray]:
+    """
+    بازسازی دیتافریم، سری یا آرایه از قالب دودویی
+    buffer: بایت‌ها یا memmap
+    copy: کپی داده؛ با False ستون‌ها نمای فقط خواندنی روی بافر هستند
+    return: مقدار بازسازی شده
+    """
+    try:
+        header, base = read_header(buffer)
+        if header['type'] == 'array':
+            return _read_array(buffer, base, header['values'], copy)
+
+        index = _decode_index(buffer, base, header['index'], copy)
+        if header['type'] == 'series':
+            return pd.Series(_read_array(buffer, base, header['values'], copy),
+                             index=index, name=header['name'], copy=False)
+
+        columns = [_read_array(buffer, base, spec, copy) for spec in header['columns']]
+        frame = pd.DataFrame(dict(enumerate(columns)), index=index, copy=False)
+        frame.columns = pd.Index(header['names'], name=header['columns_name'])
+        return frame
+    except CacheError:
+        raise
+    except Exception as e:
+        raise CacheError(f"خطا در بازسازی داده: {str(e)}")
@@ -0,0 +1,204 @@
+"""
+این ماژول کش بازه‌ای تاریخچه قیمت هر نماد را مدیریت می‌کند.
+این ماژول امکانات زیر را فراهم می‌کند:
+- نگهداری یک دیتافریم و لیست بازه‌های پوشش داده شده برای هر نماد
+- ادغام بازه‌های هم‌پوشان یا مجاور
+- پاسخ به هر زیربازه پوشش داده شده بدون درخواست جدید
+- دریافت فقط شکاف‌های پوشش داده نشده و چسباندن نتیجه
+"""
+
+import threading
+import time
+from datetime import datetime
+from typing import Callable, List, Optional, Tuple
+import pandas as pd
+from .cache_manager import CacheManager
+
+DAY = pd.Timedelta(days=1)
+
+
+def _day(value) -> pd.Timestamp:
+    """
+    تبدیل تاریخ به ابتدای روز
+    value: رشته، datetime یا Timestamp
+    return: Timestamp بدون ساعت
+    """
+    return pd.Timestamp(value).normalize()
+
+
+def merge_ranges(ranges: List[Tuple[pd.Timestamp, pd.Timestamp]]) -> List[Tuple[pd.Timestamp, pd.Timestamp]]:
+    """
+    ادغام بازه‌های روزانه هم‌پوشان یا مجاور
+    ranges: لیست (شروع، پایان) شامل هر دو سر
+    return: لیست مرتب بازه‌های جدا از هم
+    """
+    merged = []
+    for start, end in sorted(ranges):
+        if merged and start <= merged[-1][1] + DAY:
+            if end > merged[-1][1]:
+                merged[-1] = (merged[-1][0], end)
+        else:
+            merged.append((start, end))
+    return merged
+
+
+def missing_ranges(covered: List[Tuple[pd.Timestamp, pd.Timestamp]],
+                   start: pd.Timestamp, end: pd.Timestamp) -> List[Tuple[pd.Timestamp, pd.Timestamp]]:
+    """
+    محاسبه شکاف‌های پوشش داده نشده یک بازه
+    covered: بازه‌های ادغام شده
+    start: شروع بازه درخواستی
+    end: پایان بازه درخواستی
+    return: لیست (شروع، پایان) شکاف‌ها
+    """
+    gaps = []
+    cursor = start
+    for first, last in covered:
+        if last < cursor:
+            continue
+        if first > end:
+            break
+        if first > cursor:
+            gaps.append((cursor, first - DAY))
+        cursor = max(cursor, last + DAY)
+        if cursor > end:
+            break
+    if cursor <= end:
+        gaps.append((cursor, end))
+    return gaps
+
+
+class HistoryRangeCache:
+    """کلاس کش بازه‌ای تاریخچه قیمت نمادها"""
+
+    def __init__(self, cache: CacheManager, ttl: int = 3600, live_ttl: int = 60):
+        """
+        سازنده کلاس HistoryRangeCache
+        cache: مدیر کش برای نگهداری داده‌ها
+        ttl: زمان انقضای داده‌های هر نماد به ثانیه
+        live_ttl: اعتبار پوشش روز جاری (قیمت‌های امروز در طول روز تغییر می‌کنند)
+        """
+        self.cache = cache
+        self.ttl = ttl
+        self.live_ttl = live_ttl
+        self._locks = {}
+        self._locks_guard = threading.Lock()
+
+    @staticmethod
+    def _keys(symbol: str) -> Tuple[str, str]:
+        """
+        کلیدهای کش داده‌ها و بازه‌های یک نماد
+        symbol: نماد سهم
+        return: (کلید دیتافریم، کلید بازه‌ها)
+        """
+        return f'history_{symbol}', f'history_ranges_{symbol}'
+
+    def _lock(self, symbol: str) -> threading.Lock:
+        """
+        قفل هر نماد تا به‌روزرسانی هم‌زمان بازه‌ها یکدیگر را بازنویسی نکنند
+        symbol: نماد سهم
+        return: قفل نماد
+        """
+        with self._locks_guard:
+            return self._locks.setdefault(symbol, threading.Lock())
+
+    def _load(self, symbol: str) -> Tuple[Optional[pd.DataFrame], List[Tuple[pd.Timestamp, pd.Timestamp, float]]]:
+        """
+        خواندن داده‌ها و بازه‌های پوشش داده شده یک نماد از کش
+        symbol: نماد سهم
+        return: (دیتافریم یا None، لیست (شروع، پایان، زمان دریافت))
+        """
+        frame_key, ranges_key = self._keys(symbol)
+        frame = self.cache.get(frame_key)
+        ranges = self.cache.get(ranges_key)
+        if not isinstance(frame, pd.DataFrame) or not ranges:
+            return None, []
+        return frame, [(pd.Timestamp(start), pd.Timestamp(end), fetched_at)
+                       for start, end, fetched_at in ranges]
+
+    def _covered(self, ranges) -> List[Tuple[pd.Timestamp, pd.Timestamp]]:
+        """
+        بازه‌های معتبر برای پاسخ
+        ردیف روزی که دریافت در همان روز انجام شده ناقص است و فقط تا live_ttl معتبر می‌ماند
+        ranges: لیست (شروع، پایان، زمان دریافت)
+        return: بازه‌های ادغام شده
+        """
+        now = time.time()
+        valid = []
+        for start, end, fetched_at in ranges:
+            fetched_day = _day(datetime.fromtimestamp(fetched_at))
+            if end >= fetched_day and now - fetched_at > self.live_ttl:
+                end = fetched_day - DAY
+            if start <= end:
+                valid.append((start, end))
+        return merge_ranges(valid)
+
+    def get(self, symbol: str, start_date, end_date,
+            fetch: Callable[[str, datetime, datetime], pd.DataFrame]) -> pd.DataFrame:
+        """
+        دریافت تاریخچه یک بازه؛ فقط شکاف‌های پوشش داده نشده دریافت می‌شوند
+        symbol: نماد سهم
+        start_date: تاریخ شروع
+        end_date: تاریخ پایان
+        fetch: تابع دریافت یک بازه (نماد، شروع، پایان) با خروجی دیتافریم دارای ایندکس تاریخ
+        return: دیتافریم تاریخچه بازه درخواستی
+        """
+        start, end = _day(start_date), _day(end_date)
+
+        with self._lock(symbol):
+            frame, ranges = self._load(symbol)
+            gaps = missing_ranges(self._covered(ranges), start, end)
+
+            if gaps:
+                fetched_at = time.time()
+                parts = [frame] if frame is not None else []
+                for gap_start, gap_end in gaps:
+                    part = fetch(symbol, gap_start.to_pydatetime(), gap_end.to_pydatetime())
+                    if part is not None and len(part):
+                        parts.append(part)
+                    ranges.append((gap_start, gap_end, fetched_at))
+
+                if parts:
+                    frame = pd.concat(parts)
+                    # ردیف‌های تازه‌تر (مثلاً روز جاری) جایگزین نسخه قبلی می‌شوند
+                    frame = frame[~frame.index.duplicated(keep='last')].sort_index()
+                ranges = self._merge_with_times(ranges)
+
+                frame_key, ranges_key = self._keys(symbol)
+                if frame is not None:
+                    self.cache.set(frame_key, frame, ttl=self.ttl, symbol=symbol)
+                self.cache.set(ranges_key, [(s.isoformat(), e.isoformat(), t) for s, e, t in ranges],
+                               ttl=self.ttl, symbol=symbol)
+
+        if frame is None:
+            return pd.DataFrame()
+        return frame.loc[start:end + DAY - pd.Timedelta(1, 'ns')].copy()
+
+    @staticmethod
+    def _merge_with_times(ranges) -> List[Tuple[pd.Timestamp, pd.Timestamp, float]]:
+        """
+        ادغام بازه‌ها؛ زمان دریافت بازه ادغام شده زمان بخشی است که انتهای آن را پوشش می‌دهد
+        (فقط انتهای بازه ممکن است ردیف ناقص روز دریافت را داشته باشد)
+        ranges: لیست (شروع، پایان، زمان دریافت)
+        return: لیست ادغام شده
+        """
+        merged = []
+        for start, end, fetched_at in sorted(ranges):
+            if merged and start <= merged[-1][1] + DAY:
+                first, last, last_fetched = merged[-1]
+                if end > last:
+                    last, last_fetched = end, fetched_at
+                elif end == last:
+                    last_fetched = max(last_fetched, fetched_at)
+                merged[-1] = (first, last, last_fetched)
+            else:
+                merged.append((start, end, fetched_at))
+        return merged
+
+    def invalidate(self, symbol: str):
+        """
+        حذف داده‌ها و بازه‌های یک نماد از کش (تمام کلیدهای فضای نام history آن نماد)
+        symbol: نماد سهم
+        """
+        with self._lock(symbol):
+            self.cache.invalidate(symbol=symbol, namespace='history')
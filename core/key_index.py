@@ -0,0 +1,179 @@
+"""
+این ماژول فضای نام سلسله‌مراتبی و نمایه ثانویه کلیدهای کش را فراهم می‌کند.
+این ماژول امکانات زیر را فراهم می‌کند:
+- تشخیص فضای نام (مانند history/ranges یا market/watch) و نماد هر کلید
+- نمایه نماد و فضای نام به کلیدها برای کلیدهای موجود در حافظه
+- یافتن کلیدهای یک نماد یا زیرشاخه فضای نام با هزینه متناسب با تعداد همان کلیدها
+"""
+
+import re
+import threading
+from typing import Dict, List, Optional, Set, Tuple
+
+# پیشوند کلیدهای شناخته شده (طولانی‌ترها اول)، فضای نام و وابستگی به نماد؛
+# بقیه کلیدها تا اولین '_'
+NAMESPACES = (
+    ('history_ranges_', 'history/ranges', True),
+    ('history_', 'history', True),
+    ('price_', 'price', True),
+    ('indicator_', 'indicator', True),
+    ('calendar_', 'calendar', False),
+    ('market_watch', 'market/watch', False),
+    ('market_status', 'market/status', False),
+    ('market_indices', 'market/indices', False),
+    ('symbols', 'symbols', False),
+)
+# بازه تاریخ انتهای کلید (مانند history_X_2024-01-01_2024-02-01)
+_DATE_RANGE = re.compile(r'(?:_\d{4}-?\d{2}-?\d{2}){2}$')
+
+
+def namespace_of(key: str) -> str:
+    """
+    تشخیص فضای نام یک کلید
+    key: کلید کش
+    return: فضای نام سلسله‌مراتبی (سطوح با '/' جدا می‌شوند)
+    """
+    for prefix, namespace, _ in NAMESPACES:
+        if key.startswith(prefix):
+            return namespace
+    return key.split('_', 1)[0]
+
+
+def symbol_of(key: str) -> Optional[str]:
+    """
+    تشخیص نماد کلیدهای وابسته به نماد (مانند price_X، history_X_<شروع>_<پایان>
+    یا indicator_<نام>_X)
+    key: کلید کش
+    return: نماد یا None
+    """
+    for prefix, _, scoped in NAMESPACES:
+        if key.startswith(prefix):
+            if not scoped:
+                return None
+            rest = _DATE_RANGE.sub('', key[len(prefix):])
+            if prefix == 'indicator_':
+                # نام اندیکاتور ممکن است '_' داشته باشد (مانند sma_20)؛ نماد آخرین بخش است
+                rest = rest.rpartition('_')[2]
+            return rest or None
+    return None
+
+
+def namespace_levels(namespace: str) -> List[str]:
+    """
+    سطوح یک فضای نام از ریشه تا خود آن
+    namespace: فضای نام (مانند history/ranges)
+    return: لیست سطوح (مانند ['history', 'history/ranges'])
+    """
+    parts = namespace.split('/')
+    return ['/'.join(parts[:i]) for i in range(1, len(parts) + 1)]
+
+
+class KeyIndex:
+    """کلاس نمایه ثانویه نماد و فضای نام به کلیدها"""
+
+    def __init__(self):
+        """
+        سازنده کلاس KeyIndex
+        """
+        self._entries: Dict[str, Tuple[str, Optional[str]]] = {}
+        self._by_namespace: Dict[str, Set[str]] = {}
+        self._by_symbol: Dict[str, Set[str]] = {}
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._entries
+
+    def add(self, key: str, symbol: Optional[str] = None):
+        """
+        ثبت یک کلید در نمایه
+        key: کلید کش
+        symbol: نماد مربوط (پیش‌فرض: از روی کلید)
+        """
+        symbol = symbol or symbol_of(key)
+        namespace = namespace_of(key)
+        with self._lock:
+            if self._entries.get(key) == (namespace, symbol):
+                return
+            self._discard(key)
+            self._entries[key] = (namespace, symbol)
+            for level in namespace_levels(namespace):
+                self._by_namespace.setdefault(level, set()).add(key)
+            if symbol:
+                self._by_symbol.setdefault(symbol, set()).add(key)
+
+    def symbol(self, key: str) -> Optional[str]:
+        """
+        نماد ثبت شده یک کلید
+        key: کلید کش
+        return: نماد یا None
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            return entry[1] if entry else None
+
+    def discard(self, key: str):
+        """
+        حذف یک کلید از نمایه
+        key: کلید کش
+        """
+        with self._lock:
+            self._discard(key)
+
+    def _discard(self, key: str):
+        """
+        حذف یک کلید (باید درون قفل فراخوانی شود)
+        key: کلید کش
+        """
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+        namespace, symbol = entry
+        for level in namespace_levels(namespace):
+            self._remove_from(self._by_namespace, level, key)
+        if symbol:
+            self._remove_from(self._by_symbol, symbol, key)
+
+    @staticmethod
+    def _remove_from(index: Dict[str, Set[str]], name: str, key: str):
+        """
+        حذف کلید از یک مجموعه نمایه و حذف مجموعه خالی
+        index: نمایه
+        name: نام مجموعه
+        key: کلید کش
+        """
+        keys = index.get(name)
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del index[name]
+
+    def clear(self):
+        """
+        پاک کردن نمایه
+        """
+        with self._lock:
+            self._entries.clear()
+            self._by_namespace.clear()
+            self._by_symbol.clear()
+
+    def keys_for(self, symbol: Optional[str] = None, namespace: Optional[str] = None) -> List[str]:
+        """
+        کلیدهای یک نماد و/یا یک فضای نام (شامل زیرشاخه‌های آن)
+        symbol: نماد (None برای همه نمادها)
+        namespace: فضای نام (None برای همه فضاها)
+        return: لیست کلیدها
+        """
+        with self._lock:
+            sets: List[Set[str]] = []
+            if symbol is not None:
+                sets.append(self._by_symbol.get(symbol, set()))
+            if namespace is not None:
+                sets.append(self._by_namespace.get(namespace.strip('/'), set()))
+            if not sets:
+                return list(self._entries)
+            # پیمایش کوچک‌ترین مجموعه
+            sets.sort(key=len)
+            return [key for key in sets[0] if all(key in other for other in sets[1:])]
@@ -9,9 +9,12 @@
 
 import pandas as pd
 from datetime import datetime, timedelta
-from typing import Dict, List, Optional
-from .exceptions import ValidationError
+from typing import Dict, List, Optional, Tuple
+from .exceptions import APIError, ValidationError
 from .cache_manager import CacheManager
+from .history_cache import HistoryRangeCache
+from .market_watch import MarketWatchFeed
+from . import resilience
 import requests
 
 class MarketDataProvider:
@@ -21,6 +24,10 @@ class MarketDataProvider:
         راه‌اندازی کش و تنظیمات اولیه
         """
         self.cache = CacheManager()
+        self.history = HistoryRangeCache(self.cache, ttl=3600)
+        # نمای دیده‌بان بازار در حافظه؛ مصرف‌کنندگان با market_watch.subscribe از
+        # نمادهای تغییر کرده مطلع می‌شوند
+        self.market_watch = MarketWatchFeed(self._fetch_market_watch_delta)
         self.symbols = {}  # دیکشنری اطلاعات نمادها
         self.load_symbols()
         
@@ -50,17 +57,13 @@ class MarketDataProvider:
         if symbol not in self.symbols:
             raise ValidationError(f"نماد {symbol} معتبر نیست")
             
-        # بررسی کش
-        cached_price = self.cache.get(f'price_{symbol}')
-        if cached_price:
-            return cached_price
-            
         try:
-            # دریافت از API
-            price_data = self._fetch_real_time_price(symbol)
-            # ذخیره در کش با TTL کوتاه
-            self.cache.set(f'price_{symbol}', price_data, ttl=60)
-            return price_data
+            # بررسی کش و دریافت از API با TTL کوتاه؛
+            # درخواست‌های هم‌زمان یک نماد منتظر همان یک درخواست می‌مانند
+            return self.cache.get_or_set(
+                f'price_{symbol}', lambda: self._fetch_real_time_price(symbol), ttl=60,
+                symbol=symbol
+            )
         except Exception as e:
             raise ValidationError(f"خطا در دریافت قیمت: {str(e)}")
             
@@ -75,20 +78,21 @@ class MarketDataProvider:
         if symbol not in self.symbols:
             raise ValidationError(f"نماد {symbol} معتبر نیست")
             
-        cache_key = f'history_{symbol}_{start_date.date()}_{end_date.date()}'
-        cached_data = self.cache.get(cache_key)
-        if cached_data is not None:
-            return pd.DataFrame(cached_data)
-            
         try:
-            # دریافت از API
-            historical_data = self._fetch_historical_data(symbol, start_date, end_date)
-            # ذخیره در کش
-            self.cache.set(cache_key, historical_data.to_dict(), ttl=3600)
-            return historical_data
+            # فقط بازه‌های پوشش داده نشده از API دریافت می‌شوند
+            return self.history.get(symbol, start_date, end_date, self._fetch_historical_data)
         except Exception as e:
             raise ValidationError(f"خطا در دریافت تاریخچه: {str(e)}")
 
+    def invalidate_symbol(self, symbol: str):
+        """
+        حذف تمام داده‌های کش شده یک نماد (قیمت، تاریخچه و داده‌های مشتق)
+        مثلاً پس از اصلاح داده‌ها یا تعدیل قیمت‌ها در افزایش سرمایه
+        symbol: نماد سهم
+        """
+        self.history.invalidate(symbol)
+        self.cache.invalidate(symbol=symbol)
+            
     def _load_symbols_from_source(self):
         """
         بارگذاری اطلاعات نمادها از منبع اصلی (API یا فایل)
@@ -174,19 +178,24 @@ class MarketDataProvider:
                 'Content-Type': 'application/json'
             }
             
-            # ارسال درخواست
-            response = requests.get(
-                f"{self.base_url}/{endpoint}",
-                headers=headers,
-                params=params,
-                timeout=self.timeout
+            # ارسال درخواست با محدودکننده نرخ، تلاش مجدد و قطع‌کننده مدار مشترک میزبان
+            url = f"{self.base_url}/{endpoint}"
+            response = resilience.call(
+                url,
+                endpoint.split('/', 1)[0],
+                lambda: requests.get(
+                    url,
+                    headers=headers,
+                    params=params,
+                    timeout=self.timeout
+                )
             )
             
             # بررسی خطاها
             response.raise_for_status()
             return response.json()
             
-        except requests.exceptions.RequestException as e:
+        except (requests.exceptions.RequestException, APIError) as e:
             raise ValidationError(f"خطا در ارتباط با API: {str(e)}")
 
     def get_market_status(self) -> Dict:
@@ -195,29 +204,28 @@ class MarketDataProvider:
         return: دیکشنری وضعیت بازار
         """
         try:
-            # بررسی کش
-            cached_status = self.cache.get('market_status')
-            if cached_status:
-                return cached_status
-            
-            # دریافت از API
-            response = self._make_api_request('market/status')
-            status_data = {
-                'is_open': response['is_open'],
-                'timestamp': datetime.fromtimestamp(response['timestamp']),
-                'index_value': float(response['index_value']),
-                'index_change': float(response['index_change']),
-                'total_volume': int(response['total_volume']),
-                'total_trades': int(response['total_trades'])
-            }
-            
-            # ذخیره در کش
-            self.cache.set('market_status', status_data, ttl=300)  # 5 دقیقه
-            return status_data
-        
+            # بررسی کش و دریافت از API (5 دقیقه)؛ تا 30 دقیقه پس از آن داده قبلی
+            # فوراً برگردانده و به‌روزرسانی در پس‌زمینه انجام می‌شود
+            return self.cache.get_or_set('market_status', self._fetch_market_status,
+                                         ttl=300, stale_ttl=1800)
         except Exception as e:
             raise ValidationError(f"خطا در دریافت وضعیت بازار: {str(e)}")
 
+    def _fetch_market_status(self) -> Dict:
+        """
+        دریافت وضعیت کلی بازار از API
+        return: دیکشنری وضعیت بازار
+        """
+        response = self._make_api_request('market/status')
+        return {
+            'is_open': response['is_open'],
+            'timestamp': datetime.fromtimestamp(response['timestamp']),
+            'index_value': float(response['index_value']),
+            'index_change': float(response['index_change']),
+            'total_volume': int(response['total_volume']),
+            'total_trades': int(response['total_trades'])
+        }
+
     def get_market_depth(self, symbol: str) -> Dict:
         """
         دریافت عمق بازار برای یک نماد
@@ -275,38 +283,37 @@ class MarketDataProvider:
         return: دیکشنری شاخص‌های بازار
         """
         try:
-            # بررسی کش
-            cached_indices = self.cache.get('market_indices')
-            if cached_indices:
-                return cached_indices
-            
-            # دریافت از API
-            response = self._make_api_request('indices')
-            indices_data = {
-                'total_index': {
-                    'value': float(response['total']['value']),
-                    'change': float(response['total']['change'])
-                },
-                'equal_weight': {
-                    'value': float(response['equal_weight']['value']),
-                    'change': float(response['equal_weight']['change'])
-                },
-                'industry_indices': {
-                    name: {
-                        'value': float(data['value']),
-                        'change': float(data['change'])
-                    }
-                    for name, data in response['industries'].items()
-                }
-            }
-            
-            # ذخیره در کش
-            self.cache.set('market_indices', indices_data, ttl=300)  # 5 دقیقه
-            return indices_data
-        
+            # بررسی کش و دریافت از API (5 دقیقه)؛ تا 30 دقیقه پس از آن داده قبلی
+            # فوراً برگردانده و به‌روزرسانی در پس‌زمینه انجام می‌شود
+            return self.cache.get_or_set('market_indices', self._fetch_market_indices,
+                                         ttl=300, stale_ttl=1800)
         except Exception as e:
             raise ValidationError(f"خطا در دریافت شاخص‌های بازار: {str(e)}")
 
+    def _fetch_market_indices(self) -> Dict:
+        """
+        دریافت شاخص‌های اصلی بازار از API
+        return: دیکشنری شاخص‌های بازار
+        """
+        response = self._make_api_request('indices')
+        return {
+            'total_index': {
+                'value': float(response['total']['value']),
+                'change': float(response['total']['change'])
+            },
+            'equal_weight': {
+                'value': float(response['equal_weight']['value']),
+                'change': float(response['equal_weight']['change'])
+            },
+            'industry_indices': {
+                name: {
+                    'value': float(data['value']),
+                    'change': float(data['change'])
+                }
+                for name, data in response['industries'].items()
+            }
+        }
+
     def get_symbol_info(self, symbol: str) -> Dict:
         """
         دریافت اطلاعات کامل یک نماد
@@ -377,29 +384,42 @@ class MarketDataProvider:
         return: دیتافریم اطلاعات کلی نمادها
         """
         try:
-            # بررسی کش
-            cached_watch = self.cache.get('market_watch')
-            if cached_watch is not None:
-                return pd.DataFrame(cached_watch)
-            
-            # دریافت از API
-            response = self._make_api_request('market/watch')
-            
-            # تبدیل به دیتافریم
-            df = pd.DataFrame(response['data'])
-            df['timestamp'] = pd.to_datetime(df['timestamp'], unit='s')
-            
-            # محاسبات اضافی
-            df['value'] = df['price'] * df['volume']
-            df['price_change_percent'] = (df['price_change'] / (df['price'] - df['price_change'])) * 100
-            
-            # ذخیره در کش
-            self.cache.set('market_watch', df.to_dict(), ttl=60)  # 1 دقیقه
-            return df
-        
+            # بررسی کش و دریافت از API (1 دقیقه)؛ تا 10 دقیقه پس از آن داده قبلی
+            # فوراً برگردانده و به‌روزرسانی در پس‌زمینه انجام می‌شود.
+            # به‌روزرسانی هم‌زمان چند صفحه فقط یک درخواست ارسال می‌کند
+            return self.cache.get_or_set('market_watch', self._fetch_market_watch,
+                                         ttl=60, stale_ttl=600).copy()
         except Exception as e:
             raise ValidationError(f"خطا در دریافت دیده‌بان بازار: {str(e)}")
 
+    def _fetch_market_watch(self) -> pd.DataFrame:
+        """
+        دریافت دیده‌بان بازار از API
+        فقط ردیف‌های تغییر کرده پس از دریافت قبلی گرفته و روی نمای حافظه اعمال می‌شوند
+        return: دیتافریم اطلاعات کلی نمادها
+        """
+        self.market_watch.poll()
+        
+        # تبدیل به دیتافریم
+        df = self.market_watch.snapshot.to_frame().reset_index()
+        df['timestamp'] = pd.to_datetime(df['timestamp'], unit='s')
+        
+        # محاسبات اضافی
+        df['value'] = df['price'] * df['volume']
+        df['price_change_percent'] = (df['price_change'] / (df['price'] - df['price_change'])) * 100
+        return df
+
+    def _fetch_market_watch_delta(self, ref_id: int) -> Tuple[int, List[Dict], bool]:
+        """
+        دریافت تغییرات دیده‌بان بازار پس از یک شناسه مرجع
+        ref_id: شناسه مرجع آخرین دریافت (0 برای دیده‌بان کامل)
+        return: (شناسه مرجع جدید، ردیف‌های تغییر کرده، کامل بودن پاسخ)
+        """
+        response = self._make_api_request('market/watch', {'refid': ref_id} if ref_id else None)
+        # پاسخ بدون refid یعنی سرور دیده‌بان کامل فرستاده است
+        full = not ref_id or 'refid' not in response
+        return response.get('refid', 0), response['data'], full
+
     def get_trades_history(self, symbol: str, limit: int = 100) -> pd.DataFrame:
         """
         دریافت تاریخچه معاملات یک نماد
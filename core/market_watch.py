@@ -0,0 +1,331 @@
+"""
+این ماژول نگهداری و به‌روزرسانی تدریجی دیده‌بان بازار را مدیریت می‌کند.
+این ماژول امکانات زیر را فراهم می‌کند:
+- نمای ستونی دیده‌بان بازار در حافظه با دسترسی مستقیم به ردیف هر نماد
+- اعمال تغییرات (delta) روی همان نما بدون ساخت دوباره کل جدول
+- دریافت دوره‌ای فقط تغییرات پس از آخرین شناسه مرجع (refid)
+- اعلام نمادهای تغییر کرده به مصرف‌کنندگان
+"""
+
+import logging
+import threading
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+import numpy as np
+import pandas as pd
+
+
+class MarketWatchSnapshot:
+    """کلاس نمای ستونی دیده‌بان بازار با کلید نماد"""
+
+    def __init__(self, columns: Optional[Sequence[Tuple[str, type]]] = None, capacity: int = 1024):
+        """
+        سازنده کلاس MarketWatchSnapshot
+        ستون‌های عددی (int یا float) همیشه float64 نگه داشته می‌شوند تا قیمت صحیح در یک
+        پاسخ و اعشاری در پاسخ بعدی یکسان ذخیره شوند؛ مقدار None به NaN تبدیل می‌شود
+        columns: لیست (نام ستون، نوع) مانند MARKET_WATCH_COLUMNS (پیش‌فرض: تشخیص از اولین مقدار)
+        capacity: ظرفیت اولیه ردیف‌ها
+        """
+        self._capacity = max(1, capacity)
+        self._positions: Dict[str, int] = {}
+        self._symbols = np.empty(self._capacity, dtype=object)
+        self._columns: Dict[str, np.ndarray] = {}
+        self._size = 0
+        self._lock = threading.Lock()
+        for name, kind in (columns or ()):
+            self._columns[name] = self._new_column(kind is not str, self._capacity)
+
+    def __len__(self) -> int:
+        return len(self._positions)
+
+    def __contains__(self, symbol: str) -> bool:
+        return symbol in self._positions
+
+    @property
+    def columns(self) -> List[str]:
+        """نام ستون‌ها"""
+        return list(self._columns)
+
+    @staticmethod
+    def _new_column(numeric: bool, capacity: int) -> np.ndarray:
+        """
+        ساخت آرایه خالی یک ستون
+        numeric: ستون عددی (float64 با مقدار اولیه NaN) یا غیرعددی (object)
+        capacity: ظرفیت آرایه
+        return: آرایه ستون
+        """
+        if numeric:
+            return np.full(capacity, np.nan, dtype=np.float64)
+        return np.empty(capacity, dtype=object)
+
+    @staticmethod
+    def _is_number(value) -> bool:
+        """
+        بررسی عددی بودن یک مقدار (bool عدد حساب نمی‌شود)
+        value: مقدار
+        return: True برای int و float
+        """
+        return isinstance(value, (int, float, np.integer, np.floating)) and \
+            not isinstance(value, (bool, np.bool_))
+
+    def _convert_row(self, row: Dict, symbol_key: str) -> List[Tuple[str, bool, object]]:
+        """
+        تبدیل مقادیر یک ردیف به نوع ستون‌ها پیش از هر تغییری در نما (باید درون قفل فراخوانی شود)
+        row: ردیف ورودی
+        symbol_key: نام کلید نماد
+        return: لیست (نام ستون، عددی بودن، مقدار تبدیل شده)
+        raises: ValueError یا TypeError برای مقدار غیرقابل تبدیل در ستون عددی
+        """
+        converted = []
+        for name, value in row.items():
+            if name == symbol_key:
+                continue
+            values = self._columns.get(name)
+            if values is None:
+                if value is None:
+                    # نوع ستون هنوز معلوم نیست
+                    continue
+                numeric = self._is_number(value)
+            else:
+                numeric = values.dtype == np.float64
+            if numeric:
+                value = np.nan if value is None else float(value)
+            converted.append((name, numeric, value))
+        return converted
+
+    def _grow(self, size: int):
+        """
+        افزایش ظرفیت آرایه‌ها به حداقل size ردیف (باید درون قفل فراخوانی شود)
+        size: تعداد ردیف مورد نیاز
+        """
+        if size <= self._capacity:
+            return
+        capacity = self._capacity
+        while capacity < size:
+            capacity *= 2
+        symbols = np.empty(capacity, dtype=object)
+        symbols[:self._size] = self._symbols[:self._size]
+        self._symbols = symbols
+        for name, values in self._columns.items():
+            grown = self._new_column(values.dtype == np.float64, capacity)
+            grown[:self._size] = values[:self._size]
+            self._columns[name] = grown
+        self._capacity = capacity
+
+    def apply(self, rows: Iterable[Dict], symbol_key: str = 'symbol') -> List[str]:
+        """
+        اعمال ردیف‌های تغییر کرده روی نما
+        ستون‌های نیامده در یک ردیف مقدار قبلی خود را نگه می‌دارند
+        rows: ردیف‌ها (دیکشنری شامل نماد و مقادیر ستون‌ها)
+        symbol_key: نام کلید نماد در هر ردیف
+        return: لیست نمادهایی که مقدارشان واقعاً تغییر کرده یا جدید هستند
+        """
+        changed = []
+        with self._lock:
+            for row in rows:
+                symbol = row.get(symbol_key)
+                if not symbol:
+                    continue
+                # ردیف نامعتبر پیش از ثبت نماد کنار گذاشته می‌شود تا نیمه‌کاره درج نشود
+                try:
+                    converted = self._convert_row(row, symbol_key)
+                except (TypeError, ValueError) as e:
+                    logging.error(f"ردیف نامعتبر دیده‌بان برای {symbol}: {str(e)}")
+                    continue
+
+                position = self._positions.get(symbol)
+                is_new = position is None
+                if is_new:
+                    position = self._size
+                    self._grow(position + 1)
+                    self._size += 1
+                    self._positions[symbol] = position
+                    self._symbols[position] = symbol
+                    # پاک کردن مقادیر باقی‌مانده از ردیف حذف شده قبلی در همین جایگاه
+                    for values in self._columns.values():
+                        values[position] = np.nan if values.dtype == np.float64 else None
+                dirty = is_new
+                for name, numeric, value in converted:
+                    values = self._columns.get(name)
+                    if values is None:
+                        values = self._columns[name] = self._new_column(numeric, self._capacity)
+                    current = values[position]
+                    if numeric:
+                        same = current == value or (np.isnan(current) and np.isnan(value))
+                    else:
+                        same = current == value
+                    if is_new or not same:
+                        values[position] = value
+                        dirty = True
+                if dirty:
+                    changed.append(symbol)
+        return changed
+
+    def replace(self, rows: Iterable[Dict], symbol_key: str = 'symbol') -> List[str]:
+        """
+        جایگزینی کامل نما با یک دیده‌بان کامل
+        نمادهای حذف شده حذف و ردیف‌ها فشرده می‌شوند
+        rows: تمام ردیف‌های دیده‌بان
+        symbol_key: نام کلید نماد در هر ردیف
+        return: لیست نمادهای جدید، تغییر کرده یا حذف شده
+        """
+        rows = list(rows)
+        changed = self.apply(rows, symbol_key)
+        present = {row.get(symbol_key) for row in rows}
+        removed = [symbol for symbol in list(self._positions) if symbol not in present]
+        if removed:
+            self.remove(removed)
+        return changed + removed
+
+    def remove(self, symbols: Iterable[str]):
+        """
+        حذف نمادها از نما (ردیف‌های باقی‌مانده به ابتدای آرایه‌ها منتقل می‌شوند)
+        symbols: لیست نمادها
+        """
+        with self._lock:
+            drop = [self._positions.pop(symbol) for symbol in symbols if symbol in self._positions]
+            if not drop:
+                return
+            keep = np.ones(self._size, dtype=bool)
+            keep[drop] = False
+            size = int(keep.sum())
+            self._symbols[:size] = self._symbols[:self._size][keep]
+            self._symbols[size:self._size] = None
+            for values in self._columns.values():
+                values[:size] = values[:self._size][keep]
+            self._size = size
+            self._positions = {symbol: i for i, symbol in enumerate(self._symbols[:size])}
+
+    def clear(self):
+        """
+        پاک کردن تمام ردیف‌ها (ستون‌ها باقی می‌مانند)
+        """
+        with self._lock:
+            self._positions.clear()
+            self._symbols[:self._size] = None
+            self._size = 0
+
+    def get(self, symbol: str) -> Optional[Dict]:
+        """
+        دریافت ردیف یک نماد
+        symbol: نماد سهم
+        return: دیکشنری مقادیر ستون‌ها یا None
+        """
+        with self._lock:
+            position = self._positions.get(symbol)
+            if position is None:
+                return None
+            row = {name: values[position].item() if values.dtype != object else values[position]
+                   for name, values in self._columns.items()}
+        row['symbol'] = symbol
+        return row
+
+    def to_frame(self, symbols: Optional[Iterable[str]] = None) -> pd.DataFrame:
+        """
+        کپی نما به صورت دیتافریم با ایندکس نماد
+        symbols: فقط این نمادها (مثلاً نمادهای تغییر کرده؛ پیش‌فرض همه)
+        return: دیتافریم ستون‌ها
+        """
+        with self._lock:
+            if symbols is None:
+                rows = slice(0, self._size)
+            else:
+                rows = np.array([self._positions[symbol] for symbol in symbols
+                                 if symbol in self._positions], dtype=np.intp)
+            frame = pd.DataFrame(
+                {name: values[rows].copy() for name, values in self._columns.items()},
+                index=pd.Index(self._symbols[rows].copy(), name='symbol')
+            )
+        return frame
+
+
+class MarketWatchFeed:
+    """کلاس دریافت تدریجی دیده‌بان بازار و اعلام تغییرات"""
+
+    def __init__(self, fetch: Callable[[int], Tuple[int, List[Dict], bool]],
+                 snapshot: Optional[MarketWatchSnapshot] = None, symbol_key: str = 'symbol'):
+        """
+        سازنده کلاس MarketWatchFeed
+        fetch: تابع دریافت با ورودی شناسه مرجع (0 برای دیده‌بان کامل) و خروجی
+               (شناسه مرجع جدید، ردیف‌ها، کامل بودن پاسخ)
+        snapshot: نمای دیده‌بان (پیش‌فرض: نمای جدید با تشخیص خودکار ستون‌ها)
+        symbol_key: نام کلید نماد در ردیف‌ها
+        """
+        self.fetch = fetch
+        self.snapshot = snapshot or MarketWatchSnapshot()
+        self.symbol_key = symbol_key
+        self.ref_id = 0
+        self._listeners: List[Callable[[List[str]], None]] = []
+        self._poll_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def subscribe(self, callback: Callable[[List[str]], None]):
+        """
+        ثبت تابع دریافت لیست نمادهای تغییر کرده پس از هر به‌روزرسانی
+        (از thread دریافت فراخوانی می‌شود؛ رابط کاربری باید با after به thread اصلی منتقل کند)
+        callback: تابع با ورودی لیست نمادها
+        """
+        self._listeners.append(callback)
+
+    def unsubscribe(self, callback: Callable[[List[str]], None]):
+        """
+        حذف تابع ثبت شده
+        callback: تابع ثبت شده
+        """
+        if callback in self._listeners:
+            self._listeners.remove(callback)
+
+    def poll(self) -> List[str]:
+        """
+        دریافت تغییرات پس از آخرین شناسه مرجع و اعمال روی نما
+        در صورت خطا شناسه مرجع صفر می‌شود تا دریافت بعدی دیده‌بان کامل باشد
+        return: لیست نمادهای تغییر کرده
+        """
+        with self._poll_lock:
+            try:
+                ref_id, rows, full = self.fetch(self.ref_id)
+            except Exception:
+                self.ref_id = 0
+                raise
+            if full:
+                changed = self.snapshot.replace(rows, self.symbol_key)
+            else:
+                changed = self.snapshot.apply(rows, self.symbol_key)
+            self.ref_id = ref_id or 0
+
+        if changed:
+            for callback in list(self._listeners):
+                try:
+                    callback(changed)
+                except Exception as e:
+                    logging.error(f"خطا در اعلام تغییرات دیده‌بان: {str(e)}")
+        return changed
+
+    def start(self, interval: float = 60):
+        """
+        شروع دریافت دوره‌ای در thread پس‌زمینه
+        interval: فاصله دریافت‌ها به ثانیه
+        """
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+
+        def loop():
+            while not self._stop.is_set():
+                try:
+                    self.poll()
+                except Exception as e:
+                    logging.error(f"خطا در به‌روزرسانی دیده‌بان بازار: {str(e)}")
+                self._stop.wait(interval)
+
+        self._thread = threading.Thread(target=loop, name='market-watch', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """
+        توقف دریافت دوره‌ای
+        """
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
@@ -0,0 +1,271 @@
+"""
+این ماژول لایه حافظه محدود کش را فراهم می‌کند.
+این ماژول امکانات زیر را فراهم می‌کند:
+- نگهداری داده‌ها با ترتیب آخرین استفاده (LRU)
+- تخمین حجم هر داده (دیتافریم، آرایه NumPy، دیکشنری، لیست و متن)
+- حذف قدیمی‌ترین داده‌ها هنگام عبور از سقف حجم یا تعداد
+- آمار برخورد، عدم برخورد و حذف‌ها
+- حجم و تعداد داده‌های هر فضای نام بدون پیمایش داده‌ها
+"""
+
+import sys
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Iterator, List, Optional
+import numpy as np
+import pandas as pd
+
+
+def estimate_size(value: Any) -> int:
+    """
+    تخمین حجم حافظه یک داده
+    value: داده کش
+    return: حجم تقریبی به بایت
+    """
+    if isinstance(value, pd.DataFrame):
+        return int(value.memory_usage(index=True, deep=True).sum())
+    if isinstance(value, pd.Series):
+        return int(value.memory_usage(index=True, deep=True))
+    if isinstance(value, np.ndarray):
+        return value.nbytes
+    if isinstance(value, dict):
+        return sys.getsizeof(value) + sum(
+            estimate_size(k) + estimate_size(v) for k, v in value.items()
+        )
+    if isinstance(value, (list, tuple, set, frozenset)):
+        return sys.getsizeof(value) + sum(estimate_size(item) for item in value)
+    return sys.getsizeof(value)
+
+
+class MemoryCache:
+    """
+    کلاس لایه حافظه LRU با سقف حجم
+    رابط آن مانند دیکشنری است تا جایگزین دیکشنری کش شود
+    """
+
+    def __init__(self, max_bytes: int = 128 * 1024 * 1024, max_items: int = 0,
+                 sizeof: Callable[[Any], int] = estimate_size,
+                 on_evict: Optional[Callable[[str, Any], None]] = None,
+                 namespace: Optional[Callable[[str], str]] = None):
+        """
+        سازنده کلاس MemoryCache
+        max_bytes: سقف حجم داده‌ها به بایت (0 برای نامحدود)
+        max_items: سقف تعداد داده‌ها (0 برای نامحدود)
+        sizeof: تابع تخمین حجم هر داده
+        on_evict: تابعی که پس از حذف هر داده با (کلید، مقدار) فراخوانی می‌شود
+        namespace: تابع تشخیص فضای نام کلید برای آمار حجم (اختیاری)
+        """
+        self.max_bytes = max_bytes
+        self.max_items = max_items
+        self.sizeof = sizeof
+        self.on_evict = on_evict
+        self.namespace = namespace
+
+        self._entries: 'OrderedDict[str, Any]' = OrderedDict()
+        self._sizes: Dict[str, int] = {}
+        # فضای نام -> [تعداد، حجم]
+        self._namespaces: Dict[str, List[int]] = {}
+        self._lock = threading.RLock()
+
+        self.current_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.evicted_bytes = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, key) -> bool:
+        return key in self._entries
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(list(self._entries))
+
+    def __getitem__(self, key: str) -> Any:
+        """
+        دریافت داده و انتقال آن به انتهای ترتیب استفاده
+        key: کلید داده
+        return: مقدار داده
+        """
+        with self._lock:
+            try:
+                value = self._entries[key]
+            except KeyError:
+                self.misses += 1
+                raise
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def __setitem__(self, key: str, value: Any):
+        """
+        ذخیره داده و حذف قدیمی‌ترین داده‌ها در صورت عبور از سقف
+        داده‌ای که به تنهایی از سقف حجم بزرگ‌تر باشد در حافظه نگهداری نمی‌شود
+        key: کلید داده
+        value: مقدار داده
+        """
+        size = self.sizeof(value)
+        evicted = []
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            if self.max_bytes and size > self.max_bytes:
+                evicted.append((key, value))
+                self.evictions += 1
+                self.evicted_bytes += size
+            else:
+                self._entries[key] = value
+                self._sizes[key] = size
+                self.current_bytes += size
+                self._account(key, 1, size)
+                evicted = self._evict()
+        self._notify(evicted)
+
+    def __delitem__(self, key: str):
+        with self._lock:
+            if key not in self._entries:
+                raise KeyError(key)
+            self._remove(key)
+
+    def get(self, key: str, default: Any = None) -> Any:
+        """
+        دریافت داده بدون خطا در صورت عدم وجود
+        key: کلید داده
+        default: مقدار پیش‌فرض
+        return: مقدار داده یا مقدار پیش‌فرض
+        """
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def pop(self, key: str, default: Any = None) -> Any:
+        """
+        حذف و بازگرداندن یک داده
+        key: کلید داده
+        default: مقدار پیش‌فرض
+        return: مقدار داده یا مقدار پیش‌فرض
+        """
+        with self._lock:
+            if key not in self._entries:
+                return default
+            return self._remove(key)
+
+    def pop_if(self, key: str, predicate: Callable[[Any], bool]) -> bool:
+        """
+        حذف یک داده فقط در صورت برقرار بودن شرط (به صورت اتمی)
+        key: کلید داده
+        predicate: شرط روی مقدار فعلی
+        return: True اگر داده حذف شده باشد
+        """
+        with self._lock:
+            if key not in self._entries or not predicate(self._entries[key]):
+                return False
+            self._remove(key)
+            return True
+
+    def keys(self):
+        return list(self._entries.keys())
+
+    def values(self):
+        return list(self._entries.values())
+
+    def items(self):
+        return list(self._entries.items())
+
+    def clear(self):
+        """
+        پاک کردن تمام داده‌ها (آمار حفظ می‌شود)
+        """
+        with self._lock:
+            self._entries.clear()
+            self._sizes.clear()
+            self._namespaces.clear()
+            self.current_bytes = 0
+
+    def _remove(self, key: str) -> Any:
+        """
+        حذف یک داده و کسر حجم آن
+        key: کلید داده
+        return: مقدار حذف شده
+        """
+        size = self._sizes.pop(key, 0)
+        self.current_bytes -= size
+        self._account(key, -1, -size)
+        return self._entries.pop(key)
+
+    def _account(self, key: str, items: int, size: int):
+        """
+        به‌روزرسانی تعداد و حجم فضای نام یک کلید
+        key: کلید داده
+        items: تغییر تعداد
+        size: تغییر حجم
+        """
+        if self.namespace is None:
+            return
+        totals = self._namespaces.setdefault(self.namespace(key), [0, 0])
+        totals[0] += items
+        totals[1] += size
+
+    def _evict(self) -> list:
+        """
+        حذف کم‌استفاده‌ترین داده‌ها تا رسیدن به زیر سقف
+        return: لیست (کلید، مقدار) داده‌های حذف شده
+        """
+        evicted = []
+        while self._entries and (
+            (self.max_bytes and self.current_bytes > self.max_bytes)
+            or (self.max_items and len(self._entries) > self.max_items)
+        ):
+            key = next(iter(self._entries))
+            size = self._sizes.get(key, 0)
+            evicted.append((key, self._remove(key)))
+            self.evictions += 1
+            self.evicted_bytes += size
+        return evicted
+
+    def _notify(self, evicted: list):
+        """
+        اطلاع‌رسانی داده‌های حذف شده خارج از قفل
+        evicted: لیست (کلید، مقدار)
+        """
+        if self.on_evict is not None:
+            for key, value in evicted:
+                self.on_evict(key, value)
+
+    def resize(self, max_bytes: Optional[int] = None, max_items: Optional[int] = None):
+        """
+        تغییر سقف حجم یا تعداد و حذف داده‌های اضافی
+        max_bytes: سقف جدید حجم (اختیاری)
+        max_items: سقف جدید تعداد (اختیاری)
+        """
+        with self._lock:
+            if max_bytes is not None:
+                self.max_bytes = max_bytes
+            if max_items is not None:
+                self.max_items = max_items
+            evicted = self._evict()
+        self._notify(evicted)
+
+    def get_stats(self) -> Dict:
+        """
+        دریافت آمار لایه حافظه
+        return: دیکشنری تعداد، حجم، سقف‌ها و آمار برخورد و حذف
+        """
+        requests = self.hits + self.misses
+        return {
+            'items': len(self._entries),
+            'bytes': self.current_bytes,
+            'max_bytes': self.max_bytes,
+            'max_items': self.max_items,
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / requests if requests else 0.0,
+            'evictions': self.evictions,
+            'evicted_bytes': self.evicted_bytes,
+            'namespaces': {
+                namespace: {'items': items, 'bytes': size}
+                for namespace, (items, size) in self._namespaces.items() if items
+            }
+        }
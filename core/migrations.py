@@ -0,0 +1,565 @@
+"""
+این ماژول مهاجرت‌های نسخه‌دار طرح پایگاه داده را مدیریت می‌کند.
+این ماژول امکانات زیر را فراهم می‌کند:
+- نگهداری نسخه طرح در جدول schema_version
+- اجرای مرتب و یک‌باره مهاجرت‌ها
+- اجرای دستورات DDL فقط هنگام تغییر نسخه
+"""
+
+from datetime import datetime
+from typing import Callable, List, Optional, Tuple
+
+
+def _initial_schema(conn):
+    """
+    نسخه 1: جداول اصلی برنامه
+    conn: اتصال نویسنده
+    """
+    # جدول لیست سهام
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS stock_list (
+            id INTEGER PRIMARY KEY,
+            symbol TEXT UNIQUE,
+            name TEXT,
+            code TEXT,
+            sector TEXT,
+            market TEXT,
+            last_update TIMESTAMP
+        )
+    """)
+
+    # جدول قیمت‌ها
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS stock_prices (
+            symbol TEXT,
+            date TEXT,
+            open REAL,
+            high REAL,
+            low REAL,
+            close REAL,
+            volume INTEGER,
+            PRIMARY KEY (symbol, date)
+        )
+    """)
+
+    # جدول پرتفوی
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS portfolio (
+            id INTEGER PRIMARY KEY,
+            symbol TEXT,
+            quantity INTEGER,
+            avg_price REAL,
+            total_value REAL,
+            status TEXT DEFAULT 'open',
+            last_update TIMESTAMP,
+            FOREIGN KEY (symbol) REFERENCES stock_list(symbol)
+        )
+    """)
+
+    # جدول دیده‌بان
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS watchlist (
+            id INTEGER PRIMARY KEY,
+            symbol TEXT,
+            alert_price REAL,
+            alert_type TEXT,
+            last_update TIMESTAMP,
+            FOREIGN KEY (symbol) REFERENCES stock_list(symbol)
+        )
+    """)
+
+    # جدول هشدارها
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS alerts (
+            id INTEGER PRIMARY KEY,
+            symbol TEXT,
+            alert_type TEXT,
+            price REAL,
+            status TEXT,
+            created_at TIMESTAMP,
+            triggered_at TIMESTAMP,
+            FOREIGN KEY (symbol) REFERENCES stock_list(symbol)
+        )
+    """)
+
+    # جدول تنظیمات
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS settings (
+            id INTEGER PRIMARY KEY,
+            basic_info_url TEXT,
+            ratios_url TEXT,
+            statements_url TEXT,
+            profitability_url TEXT
+        )
+    """)
+
+
+def _hot_query_indexes(conn):
+    """
+    نسخه 2: ایندکس‌های پوشا برای پرس‌وجوهای پرتکرار
+    انتخاب شده بر اساس EXPLAIN QUERY PLAN پرس‌وجوهای پرتفوی و گزارش‌ها
+    conn: اتصال نویسنده
+    """
+    # get_portfolio_summary و get_portfolio_stocks: فیلتر status و گروه‌بندی symbol
+    conn.execute("""
+        CREATE INDEX IF NOT EXISTS idx_portfolio_status_symbol
+        ON portfolio (status, symbol, quantity, avg_price)
+    """)
+
+    # get_trades_report و get_portfolio_history: فیلتر status و مرتب‌سازی last_update
+    conn.execute("""
+        CREATE INDEX IF NOT EXISTS idx_portfolio_status_update
+        ON portfolio (status, last_update, symbol, quantity, avg_price)
+    """)
+
+    # آخرین قیمت هر نماد بدون مراجعه به جدول اصلی
+    conn.execute("""
+        CREATE INDEX IF NOT EXISTS idx_stock_prices_symbol_date
+        ON stock_prices (symbol, date DESC, close)
+    """)
+
+    # هشدارهای فعال و جستجوی دیده‌بان بر اساس نماد
+    conn.execute("""
+        CREATE INDEX IF NOT EXISTS idx_alerts_status_symbol
+        ON alerts (status, symbol)
+    """)
+    conn.execute("""
+        CREATE INDEX IF NOT EXISTS idx_watchlist_symbol
+        ON watchlist (symbol)
+    """)
+
+    # به‌روزرسانی آمار برای انتخاب ایندکس‌ها توسط planner
+    conn.execute("ANALYZE")
+
+
+# بازسازی ردیف latest_quote یک نماد از دو جستجوی ایندکسی روی stock_prices
+_REFRESH_LATEST_QUOTE = """
+    DELETE FROM latest_quote WHERE symbol = {ref}.symbol;
+    INSERT INTO latest_quote (symbol, last_date, last_close, prev_date, prev_close, volume)
+    SELECT p.symbol, p.date, p.close, prev.date, prev.close, p.volume
+    FROM stock_prices p
+    LEFT JOIN stock_prices prev ON prev.symbol = p.symbol AND prev.date = (
+        SELECT MAX(date) FROM stock_prices
+        WHERE symbol = p.symbol AND date < p.date
+    )
+    WHERE p.symbol = {ref}.symbol
+    ORDER BY p.date DESC
+    LIMIT 1;
+"""
+
+# فقط تغییراتی که روی دو روز آخر اثر دارند ردیف را بازسازی می‌کنند
+_AFFECTS_LATEST_QUOTE = """
+    NOT EXISTS (
+        SELECT 1 FROM latest_quote
+        WHERE symbol = {ref}.symbol AND prev_date IS NOT NULL AND {ref}.date < prev_date
+    )
+"""
+
+
+def _latest_quote(conn):
+    """
+    نسخه 3: جدول آخرین قیمت هر نماد
+    این جدول با trigger در همان تراکنش نوشتن قیمت‌ها به‌روز می‌شود
+    conn: اتصال نویسنده
+    """
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS latest_quote (
+            symbol TEXT PRIMARY KEY,
+            last_date TEXT,
+            last_close REAL,
+            prev_date TEXT,
+            prev_close REAL,
+            volume INTEGER
+        )
+    """)
+
+    # پر کردن جدول از تاریخچه موجود
+    conn.execute("DELETE FROM latest_quote")
+    conn.execute("""
+        INSERT INTO latest_quote (symbol, last_date, last_close, prev_date, prev_close, volume)
+        SELECT p.symbol, p.date, p.close, prev.date, prev.close, p.volume
+        FROM (SELECT symbol, MAX(date) AS date FROM stock_prices GROUP BY symbol) last
+        JOIN stock_prices p ON p.symbol = last.symbol AND p.date = last.date
+        LEFT JOIN stock_prices prev ON prev.symbol = p.symbol AND prev.date = (
+            SELECT MAX(date) FROM stock_prices
+            WHERE symbol = p.symbol AND date < p.date
+        )
+    """)
+
+    triggers = {
+        'insert': ('AFTER INSERT', 'NEW', 'NEW'),
+        'update': ('AFTER UPDATE', 'NEW', 'OLD'),
+        'delete': ('AFTER DELETE', 'OLD', 'OLD'),
+    }
+    for name, (event, ref, date_ref) in triggers.items():
+        condition = _AFFECTS_LATEST_QUOTE.format(ref=date_ref)
+        if name == 'update':
+            condition = f"({condition}) OR ({_AFFECTS_LATEST_QUOTE.format(ref='NEW')})"
+        conn.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS trg_latest_quote_{name}
+            {event} ON stock_prices
+            WHEN {condition}
+            BEGIN
+                {_REFRESH_LATEST_QUOTE.format(ref=ref)}
+            END
+        """)
+
+
+def _portfolio_nav(conn):
+    """
+    نسخه 4: جدول ارزش روزانه پرتفوی (NAV)
+    برای هر روز معاملاتی یک ردیف از پیش محاسبه شده نگهداری می‌شود
+    conn: اتصال نویسنده
+    """
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS portfolio_nav (
+            date TEXT PRIMARY KEY,
+            total_value REAL,
+            total_cost REAL,
+            positions INTEGER,
+            created_at TIMESTAMP
+        ) WITHOUT ROWID
+    """)
+
+
+def _backup_changes(conn):
+    """
+    نسخه 5: ثبت بخش‌های (نماد، ماه) تغییر یافته قیمت‌ها برای پشتیبان افزایشی
+    هر تغییر شماره جدید می‌گیرد تا تغییرات بعد از شروع پشتیبان از دست نروند
+    conn: اتصال نویسنده
+    """
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS backup_changes (
+            id INTEGER PRIMARY KEY,
+            symbol TEXT,
+            month TEXT,
+            UNIQUE (symbol, month)
+        )
+    """)
+
+    triggers = {
+        'insert': ('AFTER INSERT', ('NEW',)),
+        'update': ('AFTER UPDATE', ('OLD', 'NEW')),
+        'delete': ('AFTER DELETE', ('OLD',)),
+    }
+    for name, (event, refs) in triggers.items():
+        body = "".join(f"""
+                INSERT OR REPLACE INTO backup_changes (symbol, month)
+                VALUES ({ref}.symbol, substr({ref}.date, 1, 7));""" for ref in refs)
+        conn.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS trg_backup_changes_{name}
+            {event} ON stock_prices
+            BEGIN{body}
+            END
+        """)
+
+
+# تبدیل تاریخ متنی YYYY-MM-DD به عدد YYYYMMDD و برعکس
+_DATE_KEY = "CAST(replace(substr({0}, 1, 10), '-', '') AS INTEGER)"
+_DATE_TEXT = ("CASE WHEN {0} IS NULL THEN NULL "
+              "ELSE printf('%04d-%02d-%02d', {0} / 10000, {0} / 100 % 100, {0} % 100) END")
+
+# ثبت نماد جدید بدون اتکا به ON CONFLICT؛ در trigger سیاست تعارض دستور بیرونی
+# (مثلاً INSERT OR REPLACE) جایگزین سیاست دستورات داخلی می‌شود و شناسه را تغییر می‌دهد
+_REGISTER_SYMBOL = """
+    INSERT INTO symbol_ids (symbol)
+    SELECT {0} WHERE NOT EXISTS (SELECT 1 FROM symbol_ids WHERE symbol = {0});
+"""
+
+# بازسازی ردیف latest_quote یک نماد از جدول price_history
+_REFRESH_LATEST_QUOTE_V6 = """
+    DELETE FROM latest_quote
+    WHERE symbol = (SELECT symbol FROM symbol_ids WHERE id = {ref}.symbol_id);
+    INSERT INTO latest_quote (symbol, last_date, last_close, prev_date, prev_close, volume)
+    SELECT s.symbol, """ + _DATE_TEXT.format('p.date') + """, p.close,
+           """ + _DATE_TEXT.format('prev.date') + """, prev.close, p.volume
+    FROM price_history p
+    JOIN symbol_ids s ON s.id = p.symbol_id
+    LEFT JOIN price_history prev ON prev.symbol_id = p.symbol_id AND prev.date = (
+        SELECT MAX(date) FROM price_history
+        WHERE symbol_id = p.symbol_id AND date < p.date
+    )
+    WHERE p.symbol_id = {ref}.symbol_id
+    ORDER BY p.date DESC
+    LIMIT 1;
+"""
+
+_AFFECTS_LATEST_QUOTE_V6 = """
+    NOT EXISTS (
+        SELECT 1 FROM latest_quote q
+        JOIN symbol_ids s ON s.symbol = q.symbol
+        WHERE s.id = {ref}.symbol_id AND q.prev_date IS NOT NULL
+        AND {ref}.date < """ + _DATE_KEY.format('q.prev_date') + """
+    )
+"""
+
+
+def _integer_price_schema(conn):
+    """
+    نسخه 6: شناسه عددی نمادها و قیمت‌های عددی به ریال
+    - جدول symbol_ids نماد و کد ابزار TSETMC را به شناسه عددی نگاشت می‌کند
+    - جدول price_history با کلید (symbol_id, date) و WITHOUT ROWID
+      قیمت‌ها را به صورت INTEGER و تاریخ را به صورت YYYYMMDD نگه می‌دارد
+    - stock_prices به یک view سازگار با پرس‌وجوهای قبلی تبدیل می‌شود
+    conn: اتصال نویسنده
+    """
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS symbol_ids (
+            id INTEGER PRIMARY KEY,
+            symbol TEXT NOT NULL UNIQUE,
+            inscode TEXT
+        )
+    """)
+    conn.execute("""
+        CREATE INDEX IF NOT EXISTS idx_symbol_ids_inscode
+        ON symbol_ids (inscode)
+    """)
+
+    # ثبت نمادهای موجود (ابتدا لیست سهام برای حفظ کد ابزار)
+    conn.execute("""
+        INSERT OR IGNORE INTO symbol_ids (symbol, inscode)
+        SELECT symbol, code FROM stock_list WHERE symbol IS NOT NULL
+    """)
+    for table in ('stock_prices', 'portfolio', 'watchlist', 'alerts'):
+        conn.execute(f"""
+            INSERT OR IGNORE INTO symbol_ids (symbol)
+            SELECT DISTINCT symbol FROM {table} WHERE symbol IS NOT NULL
+        """)
+
+    # نمادهای جدید لیست سهام به صورت خودکار در فرهنگ نمادها ثبت می‌شوند
+    conn.execute("""
+        CREATE TRIGGER IF NOT EXISTS trg_symbol_ids_stock_list
+        AFTER INSERT ON stock_list
+        WHEN NEW.symbol IS NOT NULL
+        BEGIN
+            UPDATE symbol_ids SET inscode = NEW.code WHERE symbol = NEW.symbol;
+            INSERT INTO symbol_ids (symbol, inscode)
+            SELECT NEW.symbol, NEW.code
+            WHERE NOT EXISTS (SELECT 1 FROM symbol_ids WHERE symbol = NEW.symbol);
+        END
+    """)
+
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS price_history (
+            symbol_id INTEGER NOT NULL,
+            date INTEGER NOT NULL,
+            open INTEGER,
+            high INTEGER,
+            low INTEGER,
+            close INTEGER,
+            volume INTEGER,
+            PRIMARY KEY (symbol_id, date)
+        ) WITHOUT ROWID
+    """)
+    conn.execute(f"""
+        INSERT OR REPLACE INTO price_history
+        SELECT s.id, {_DATE_KEY.format('p.date')},
+               CAST(ROUND(p.open) AS INTEGER), CAST(ROUND(p.high) AS INTEGER),
+               CAST(ROUND(p.low) AS INTEGER), CAST(ROUND(p.close) AS INTEGER),
+               CAST(ROUND(p.volume) AS INTEGER)
+        FROM stock_prices p
+        JOIN symbol_ids s ON s.symbol = p.symbol
+    """)
+
+    # حذف جدول قدیمی همراه با ایندکس‌ها و triggerهای آن
+    conn.execute("DROP TABLE stock_prices")
+
+    # view سازگار با پرس‌وجوها و نوشتن‌های قبلی
+    conn.execute(f"""
+        CREATE VIEW stock_prices AS
+        SELECT s.symbol, {_DATE_TEXT.format('h.date')} AS date,
+               h.open, h.high, h.low, h.close, h.volume
+        FROM price_history h
+        JOIN symbol_ids s ON s.id = h.symbol_id
+    """)
+    conn.execute(f"""
+        CREATE TRIGGER trg_stock_prices_insert
+        INSTEAD OF INSERT ON stock_prices
+        BEGIN
+            {_REGISTER_SYMBOL.format('NEW.symbol')}
+            INSERT OR REPLACE INTO price_history
+            VALUES (
+                (SELECT id FROM symbol_ids WHERE symbol = NEW.symbol),
+                {_DATE_KEY.format('NEW.date')},
+                CAST(ROUND(NEW.open) AS INTEGER), CAST(ROUND(NEW.high) AS INTEGER),
+                CAST(ROUND(NEW.low) AS INTEGER), CAST(ROUND(NEW.close) AS INTEGER),
+                CAST(ROUND(NEW.volume) AS INTEGER)
+            );
+        END
+    """)
+    conn.execute(f"""
+        CREATE TRIGGER trg_stock_prices_update
+        INSTEAD OF UPDATE ON stock_prices
+        BEGIN
+            DELETE FROM price_history
+            WHERE symbol_id = (SELECT id FROM symbol_ids WHERE symbol = OLD.symbol)
+            AND date = {_DATE_KEY.format('OLD.date')};
+            {_REGISTER_SYMBOL.format('NEW.symbol')}
+            INSERT OR REPLACE INTO price_history
+            VALUES (
+                (SELECT id FROM symbol_ids WHERE symbol = NEW.symbol),
+                {_DATE_KEY.format('NEW.date')},
+                CAST(ROUND(NEW.open) AS INTEGER), CAST(ROUND(NEW.high) AS INTEGER),
+                CAST(ROUND(NEW.low) AS INTEGER), CAST(ROUND(NEW.close) AS INTEGER),
+                CAST(ROUND(NEW.volume) AS INTEGER)
+            );
+        END
+    """)
+    conn.execute(f"""
+        CREATE TRIGGER trg_stock_prices_delete
+        INSTEAD OF DELETE ON stock_prices
+        BEGIN
+            DELETE FROM price_history
+            WHERE symbol_id = (SELECT id FROM symbol_ids WHERE symbol = OLD.symbol)
+            AND date = {_DATE_KEY.format('OLD.date')};
+        END
+    """)
+
+    # latest_quote با قیمت‌های عددی از جدول جدید بازسازی می‌شود
+    conn.execute("DROP TABLE latest_quote")
+    conn.execute("""
+        CREATE TABLE latest_quote (
+            symbol TEXT PRIMARY KEY,
+            last_date TEXT,
+            last_close INTEGER,
+            prev_date TEXT,
+            prev_close INTEGER,
+            volume INTEGER
+        )
+    """)
+    conn.execute(f"""
+        INSERT INTO latest_quote (symbol, last_date, last_close, prev_date, prev_close, volume)
+        SELECT s.symbol, {_DATE_TEXT.format('p.date')}, p.close,
+               {_DATE_TEXT.format('prev.date')}, prev.close, p.volume
+        FROM (SELECT symbol_id, MAX(date) AS date FROM price_history GROUP BY symbol_id) last
+        JOIN price_history p ON p.symbol_id = last.symbol_id AND p.date = last.date
+        JOIN symbol_ids s ON s.id = p.symbol_id
+        LEFT JOIN price_history prev ON prev.symbol_id = p.symbol_id AND prev.date = (
+            SELECT MAX(date) FROM price_history
+            WHERE symbol_id = p.symbol_id AND date < p.date
+        )
+    """)
+
+    triggers = {
+        'insert': ('AFTER INSERT', ('NEW',), 'NEW', 'NEW'),
+        'update': ('AFTER UPDATE', ('OLD', 'NEW'), 'NEW', 'OLD'),
+        'delete': ('AFTER DELETE', ('OLD',), 'OLD', 'OLD'),
+    }
+    for name, (event, refs, ref, date_ref) in triggers.items():
+        condition = _AFFECTS_LATEST_QUOTE_V6.format(ref=date_ref)
+        if name == 'update':
+            condition = f"({condition}) OR ({_AFFECTS_LATEST_QUOTE_V6.format(ref='NEW')})"
+        conn.execute(f"""
+            CREATE TRIGGER trg_latest_quote_{name}
+            {event} ON price_history
+            WHEN {condition}
+            BEGIN
+                {_REFRESH_LATEST_QUOTE_V6.format(ref=ref)}
+            END
+        """)
+
+        # ثبت بخش‌های تغییر یافته برای پشتیبان افزایشی (حذف و درج برای شماره جدید)
+        body = "".join(f"""
+                DELETE FROM backup_changes
+                WHERE symbol = (SELECT symbol FROM symbol_ids WHERE id = {r}.symbol_id)
+                AND month = printf('%04d-%02d', {r}.date / 10000, {r}.date / 100 % 100);
+                INSERT INTO backup_changes (symbol, month)
+                VALUES (
+                    (SELECT symbol FROM symbol_ids WHERE id = {r}.symbol_id),
+                    printf('%04d-%02d', {r}.date / 10000, {r}.date / 100 % 100)
+                );""" for r in refs)
+        conn.execute(f"""
+            CREATE TRIGGER trg_backup_changes_{name}
+            {event} ON price_history
+            BEGIN{body}
+            END
+        """)
+
+    conn.execute("ANALYZE")
+
+
+def _favorites(conn):
+    """
+    نسخه 7: جدول سهام منتخب صفحه اصلی
+    conn: اتصال نویسنده
+    """
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS favorites (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            symbol TEXT NOT NULL UNIQUE,
+            code TEXT NOT NULL UNIQUE
+        )
+    """)
+
+
+# لیست مرتب مهاجرت‌ها: (نسخه، توضیح، تابع)
+MIGRATIONS: List[Tuple[int, str, Callable]] = [
+    (1, 'initial schema', _initial_schema),
+    (2, 'covering indexes for hot queries', _hot_query_indexes),
+    (3, 'latest_quote table maintained by triggers', _latest_quote),
+    (4, 'daily portfolio NAV snapshots', _portfolio_nav),
+    (5, 'changed price partitions for incremental backups', _backup_changes),
+    (6, 'integer symbol ids and integer rial prices', _integer_price_schema),
+    (7, 'favorites table', _favorites),
+]
+
+LATEST_VERSION = MIGRATIONS[-1][0]
+
+
+def get_schema_version(conn) -> int:
+    """
+    دریافت نسخه فعلی طرح پایگاه داده
+    conn: اتصال پایگاه داده
+    return: شماره نسخه (0 برای پایگاه داده بدون نسخه)
+    """
+    exists = conn.execute("""
+        SELECT 1 FROM sqlite_master
+        WHERE type = 'table' AND name = 'schema_version'
+    """).fetchone()
+    if not exists:
+        return 0
+    row = conn.execute("SELECT MAX(version) FROM schema_version").fetchone()
+    return row[0] or 0
+
+
+def apply_migrations(conn, target: Optional[int] = None) -> List[int]:
+    """
+    اجرای مهاجرت‌های اجرا نشده به ترتیب نسخه
+    هر مهاجرت همراه با ثبت نسخه آن در یک savepoint اجرا می‌شود
+    conn: اتصال نویسنده
+    target: آخرین نسخه‌ای که باید اعمال شود (پیش‌فرض: آخرین نسخه)
+    return: لیست نسخه‌های اعمال شده
+    """
+    target = LATEST_VERSION if target is None else target
+    current = get_schema_version(conn)
+    if current >= target:
+        return []
+
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS schema_version (
+            version INTEGER PRIMARY KEY,
+            description TEXT,
+            applied_at TIMESTAMP
+        )
+    """)
+
+    applied = []
+    for version, description, migrate in MIGRATIONS:
+        if version <= current or version > target:
+            continue
+        
+        # هر مهاجرت به صورت اتمی اعمال یا به طور کامل لغو می‌شود
+        conn.execute("SAVEPOINT migration")
+        try:
+            migrate(conn)
+            conn.execute("""
+                INSERT INTO schema_version (version, description, applied_at)
+                VALUES (?, ?, ?)
+            """, (version, description, datetime.now()))
+        except Exception:
+            conn.execute("ROLLBACK TO migration")
+            conn.execute("RELEASE migration")
+            raise
+        conn.execute("RELEASE migration")
+        applied.append(version)
+    return applied
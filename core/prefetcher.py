@@ -0,0 +1,179 @@
+"""
+این ماژول پیش‌بارگذاری داده‌های پرکاربرد در کش را مدیریت می‌کند.
+این ماژول امکانات زیر را فراهم می‌کند:
+- گرم کردن کش در شروع برنامه با نمادهای دیده‌بان، پرتفوی باز و نمودارهای اخیر
+- دریافت موازی قیمت لحظه‌ای و تاریخچه اخیر نمادها در پس‌زمینه
+- پیش‌بارگذاری تاریخچه یک نماد هنگام اشاره یا انتخاب آن در جدول
+- دسترسی کش شده به قیمت و تاریخچه برای صفحات برنامه
+"""
+
+import logging
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+import pandas as pd
+from .api_handler import StockAPI
+from .cache_manager import CacheManager
+from .config import Config
+from .database import get_database
+from .history_cache import HistoryRangeCache
+
+# کلید لیست نمادهای نمودارهای اخیر در کش
+RECENT_CHARTS_KEY = 'recent_charts'
+
+_shared_prefetcher = None
+_shared_prefetcher_lock = threading.Lock()
+
+
+def get_prefetcher():
+    """
+    دریافت نمونه مشترک Prefetcher برای کل برنامه
+    return: نمونه Prefetcher
+    """
+    global _shared_prefetcher
+    with _shared_prefetcher_lock:
+        if _shared_prefetcher is None:
+            _shared_prefetcher = Prefetcher(StockAPI())
+        return _shared_prefetcher
+
+
+class Prefetcher:
+    """کلاس پیش‌بارگذاری قیمت و تاریخچه نمادها در کش"""
+
+    def __init__(self, api, db=None, cache: Optional[CacheManager] = None):
+        """
+        سازنده کلاس Prefetcher
+        api: نمونه StockAPI برای دریافت داده‌ها
+        db: نمونه DatabaseManager (پیش‌فرض: نمونه مشترک)
+        cache: مدیر کش (پیش‌فرض: نمونه جدید روی پوشه کش برنامه)
+        """
+        config = Config()
+        self.api = api
+        self.db = db or get_database()
+        self.cache = cache or CacheManager()
+        self.history = HistoryRangeCache(self.cache)
+        self.history_days = config.get("cache", "prefetch_history_days") or 365
+        self.recent_limit = config.get("cache", "recent_charts") or 20
+        self.executor = ThreadPoolExecutor(
+            max_workers=config.get("cache", "prefetch_workers") or 4,
+            thread_name_prefix='prefetch'
+        )
+        self._pending: Dict[str, Future] = {}
+        self._lock = threading.Lock()
+
+    def get_quote(self, symbol: str) -> Optional[Dict]:
+        """
+        دریافت اطلاعات لحظه‌ای یک سهم از کش یا API
+        symbol: نماد سهم
+        return: دیکشنری اطلاعات سهم یا None
+        """
+        return self.cache.get_or_set(
+            f'price_{symbol}', lambda: self.api.get_stock_info(symbol), ttl=60, symbol=symbol
+        )
+
+    def get_history(self, symbol: str, start_date, end_date) -> pd.DataFrame:
+        """
+        دریافت تاریخچه قیمت یک سهم؛ فقط بازه‌های موجود نبودن در کش دریافت می‌شوند
+        symbol: نماد سهم
+        start_date: تاریخ شروع
+        end_date: تاریخ پایان
+        return: دیتافریم تاریخچه با ایندکس تاریخ
+        """
+        return self.history.get(symbol, start_date, end_date, self._fetch_history)
+
+    def _fetch_history(self, symbol: str, start_date: datetime, end_date: datetime) -> pd.DataFrame:
+        """
+        دریافت یک بازه تاریخچه از API
+        symbol: نماد سهم
+        start_date: تاریخ شروع
+        end_date: تاریخ پایان
+        return: دیتافریم تاریخچه با ایندکس تاریخ
+        """
+        rows = self.api.get_stock_history(
+            symbol, start_date.strftime('%Y-%m-%d'), end_date.strftime('%Y-%m-%d')
+        )
+        if rows is None:
+            # بازه دریافت نشده نباید پوشش داده شده ثبت شود
+            raise ConnectionError(f"دریافت تاریخچه {symbol} ناموفق بود")
+        frame = rows.assign(date=pd.to_datetime(rows['date']))
+        return frame.set_index('date')
+
+    def warm_up_symbols(self) -> List[str]:
+        """
+        نمادهای گرم کردن کش به ترتیب اولویت: نمودارهای اخیر، دیده‌بان و پرتفوی باز
+        return: لیست نمادها بدون تکرار
+        """
+        symbols = list(self.cache.get(RECENT_CHARTS_KEY) or [])
+        symbols.extend(self.db.get_prefetch_symbols())
+        return list(dict.fromkeys(symbol for symbol in symbols if symbol))
+
+    def warm_up(self) -> List[Future]:
+        """
+        شروع گرم کردن کش در پس‌زمینه (بدون انتظار)
+        return: لیست Future دریافت هر نماد
+        """
+        try:
+            symbols = self.warm_up_symbols()
+        except Exception as e:
+            logging.error(f"خطا در خواندن نمادهای پیش‌بارگذاری: {str(e)}")
+            return []
+        return [self.prefetch(symbol, quote=True) for symbol in symbols]
+
+    def prefetch(self, symbol: str, quote: bool = False) -> Future:
+        """
+        پیش‌بارگذاری تاریخچه اخیر یک نماد در پس‌زمینه
+        درخواست تکراری برای نمادی که در صف است همان Future قبلی را برمی‌گرداند
+        symbol: نماد سهم
+        quote: دریافت قیمت لحظه‌ای همراه با تاریخچه
+        return: Future پیش‌بارگذاری
+        """
+        with self._lock:
+            future = self._pending.get(symbol)
+            if future is not None:
+                return future
+            future = self.executor.submit(self._prefetch_symbol, symbol, quote)
+            self._pending[symbol] = future
+        future.add_done_callback(lambda done: self._finish(symbol, done))
+        return future
+
+    def _finish(self, symbol: str, future: Future):
+        """
+        حذف نماد از صف پیش‌بارگذاری
+        symbol: نماد سهم
+        future: Future تمام شده
+        """
+        with self._lock:
+            if self._pending.get(symbol) is future:
+                del self._pending[symbol]
+
+    def _prefetch_symbol(self, symbol: str, quote: bool):
+        """
+        دریافت تاریخچه اخیر و در صورت نیاز قیمت لحظه‌ای یک نماد
+        خطاها فقط ثبت می‌شوند؛ صفحه مربوط هنگام نمایش دوباره تلاش می‌کند
+        symbol: نماد سهم
+        quote: دریافت قیمت لحظه‌ای
+        """
+        try:
+            if quote:
+                self.get_quote(symbol)
+            end_date = datetime.now()
+            self.get_history(symbol, end_date - timedelta(days=self.history_days), end_date)
+        except Exception as e:
+            logging.error(f"خطا در پیش‌بارگذاری {symbol}: {str(e)}")
+
+    def record_view(self, symbol: str):
+        """
+        ثبت نماد در لیست نمودارهای اخیر برای گرم کردن کش در اجرای بعدی
+        symbol: نماد سهم
+        """
+        recent = [s for s in (self.cache.get(RECENT_CHARTS_KEY) or []) if s != symbol]
+        recent.insert(0, symbol)
+        self.cache.set(RECENT_CHARTS_KEY, recent[:self.recent_limit], ttl=30 * 86400)
+
+    def close(self):
+        """
+        لغو پیش‌بارگذاری‌های در صف و ثبت نوشتن‌های کش
+        """
+        self.executor.shutdown(wait=False, cancel_futures=True)
+        self.cache.close()
@@ -0,0 +1,454 @@
+"""
+این ماژول آرشیو ستونی قیمت‌های تاریخی را مدیریت می‌کند.
+این ماژول امکانات زیر را فراهم می‌کند:
+- نگهداری OHLCV هر نماد در فایل‌های ستونی NumPy با نوع ثابت
+  (تاریخ int32 به صورت YYYYMMDD، قیمت‌ها و حجم int64 به ریال)
+- خواندن بازه‌ای بدون کپی از طریق np.memmap
+- افزودن اتمی ردیف‌ها (ردیف‌ها فقط پس از ثبت فایل meta قابل مشاهده‌اند)
+- وارد کردن تاریخچه از جداول stock_prices یا daily_prices
+"""
+
+import json
+import os
+import sqlite3
+import threading
+from typing import Dict, Iterable, List, Optional, Tuple
+import numpy as np
+import pandas as pd
+from .exceptions import DatabaseError
+
+# نوع داده هر ستون
+ARCHIVE_COLUMNS: Dict[str, np.dtype] = {
+    'date': np.dtype(np.int32),
+    'open': np.dtype(np.int64),
+    'high': np.dtype(np.int64),
+    'low': np.dtype(np.int64),
+    'close': np.dtype(np.int64),
+    'volume': np.dtype(np.int64),
+}
+
+META_FILE = 'meta.json'
+
+
+def date_to_int(dates) -> np.ndarray:
+    """
+    تبدیل تاریخ‌ها به اعداد YYYYMMDD
+    dates: رشته‌های YYYY-MM-DD، datetime64 یا اعداد YYYYMMDD
+    return: آرایه int32
+    """
+    if isinstance(dates, (pd.Series, pd.Index)):
+        dates = dates.to_numpy()
+    array = np.asarray(dates)
+    if np.issubdtype(array.dtype, np.integer):
+        return array.astype(np.int32)
+    if not np.issubdtype(array.dtype, np.datetime64):
+        array = np.array([str(d)[:10] for d in array], dtype='datetime64[D]')
+    days = array.astype('datetime64[D]')
+    years = days.astype('datetime64[Y]')
+    months = days.astype('datetime64[M]')
+    year = years.astype(np.int64) + 1970
+    month = (months - years).astype(np.int64) + 1
+    day = (days - months).astype(np.int64) + 1
+    return (year * 10000 + month * 100 + day).astype(np.int32)
+
+
+def _date_key(value) -> int:
+    """
+    تبدیل یک تاریخ تکی به عدد YYYYMMDD
+    value: رشته، datetime، date یا عدد YYYYMMDD
+    return: عدد YYYYMMDD
+    """
+    if isinstance(value, (int, np.integer)):
+        return int(value)
+    if isinstance(value, str):
+        return int(value[:10].replace('-', ''))
+    if hasattr(value, 'year'):
+        return value.year * 10000 + value.month * 100 + value.day
+    return int(date_to_int([value])[0])
+
+
+def int_to_date(values: np.ndarray) -> np.ndarray:
+    """
+    تبدیل اعداد YYYYMMDD به datetime64
+    values: آرایه int32
+    return: آرایه datetime64[D]
+    """
+    values = np.asarray(values, dtype=np.int64)
+    years = (values // 10000 - 1970).astype('datetime64[Y]')
+    months = (years.astype('datetime64[M]')
+              + (values // 100 % 100 - 1).astype('timedelta64[M]'))
+    return months.astype('datetime64[D]') + (values % 100 - 1).astype('timedelta64[D]')
+
+
+class _SymbolColumns:
+    """نگاشت‌های memmap ستون‌های یک نماد در یک نسخه مشخص"""
+
+    def __init__(self, rows: int, generation: int, stamp: Tuple[int, int], columns: Dict[str, np.ndarray]):
+        self.rows = rows
+        self.generation = generation
+        self.stamp = stamp
+        self.columns = columns
+
+
+class PriceArchive:
+    """کلاس آرشیو ستونی قیمت‌های تاریخی"""
+
+    def __init__(self, root: str = 'data/archive'):
+        """
+        سازنده کلاس PriceArchive
+        root: پوشه اصلی آرشیو
+        """
+        self.root = root
+        self._open: Dict[str, _SymbolColumns] = {}
+        self._lock = threading.Lock()
+        # بازگشتی: _columns هنگام اولین باز شدن نماد (از جمله درون append) پاکسازی می‌کند
+        self._write_lock = threading.RLock()
+        # نمادهایی که فایل‌های نسخه‌های یتیم آن‌ها پاکسازی شده است
+        self._swept: set = set()
+        os.makedirs(root, exist_ok=True)
+
+    def _symbol_dir(self, symbol: str) -> str:
+        """
+        مسیر پوشه یک نماد
+        symbol: نماد سهم
+        return: مسیر پوشه
+        """
+        return os.path.join(self.root, symbol.replace(os.sep, '_').replace('/', '_'))
+
+    @staticmethod
+    def _column_path(directory: str, name: str, generation: int) -> str:
+        """
+        مسیر فایل یک ستون
+        directory: پوشه نماد
+        name: نام ستون
+        generation: شماره نسخه فایل‌ها
+        return: مسیر فایل
+        """
+        return os.path.join(directory, f"{name}.{generation}.bin")
+
+    @staticmethod
+    def _stamp(path: str) -> Tuple[int, int]:
+        """
+        شناسه نسخه فایل meta
+        هر ثبت با os.replace فایل جدیدی (inode جدید) ایجاد می‌کند
+        path: مسیر فایل meta
+        return: (inode، زمان تغییر)
+        """
+        stat = os.stat(path)
+        return stat.st_ino, stat.st_mtime_ns
+
+    def _read_meta(self, directory: str) -> Tuple[int, int, int]:
+        """
+        خواندن فایل meta یک نماد
+        directory: پوشه نماد
+        return: (تعداد ردیف‌ها، شماره نسخه، شناسه نسخه فایل meta)
+        """
+        path = os.path.join(directory, META_FILE)
+        try:
+            stamp = self._stamp(path)
+            with open(path, 'r', encoding='utf-8') as f:
+                meta = json.load(f)
+            return meta['rows'], meta['generation'], stamp
+        except FileNotFoundError:
+            return 0, 0, (0, 0)
+
+    @staticmethod
+    def _write_meta(directory: str, rows: int, generation: int):
+        """
+        ثبت اتمی فایل meta (نقطه commit افزودن ردیف‌ها)
+        directory: پوشه نماد
+        rows: تعداد ردیف‌های معتبر
+        generation: شماره نسخه فایل‌ها
+        """
+        path = os.path.join(directory, META_FILE)
+        temp_path = path + '.tmp'
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump({'rows': rows, 'generation': generation}, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_path, path)
+
+    def _columns(self, symbol: str) -> Optional[_SymbolColumns]:
+        """
+        دریافت نگاشت‌های memmap یک نماد
+        نگاشت‌ها تا تغییر فایل meta دوباره استفاده می‌شوند؛ در اولین باز شدن هر نماد
+        فایل‌های نسخه‌های یتیم حذف می‌شوند
+        symbol: نماد سهم
+        return: ستون‌های نماد یا None اگر نماد در آرشیو نباشد
+        """
+        directory = self._symbol_dir(symbol)
+        meta_path = os.path.join(directory, META_FILE)
+        try:
+            stamp = self._stamp(meta_path)
+        except FileNotFoundError:
+            return None
+
+        with self._lock:
+            cached = self._open.get(symbol)
+            if cached is not None and cached.stamp == stamp:
+                return cached
+            sweep = symbol not in self._swept
+        if sweep:
+            with self._write_lock:
+                self._sweep_generations(directory, self._read_meta(directory)[1])
+            with self._lock:
+                self._swept.add(symbol)
+
+        while True:
+            rows, generation, stamp = self._read_meta(directory)
+            try:
+                columns = self._map_columns(directory, rows, generation)
+                break
+            except FileNotFoundError:
+                # نسخه خوانده شده بین خواندن meta و نگاشت با نسخه جدید جایگزین شده است
+                if self._read_meta(directory)[1] == generation:
+                    raise
+        opened = _SymbolColumns(rows, generation, stamp, columns)
+        with self._lock:
+            self._open[symbol] = opened
+        return opened
+
+    def _map_columns(self, directory: str, rows: int, generation: int) -> Dict[str, np.ndarray]:
+        """
+        نگاشت فایل‌های ستونی یک نسخه
+        directory: پوشه نماد
+        rows: تعداد ردیف‌های معتبر
+        generation: شماره نسخه فایل‌ها
+        return: دیکشنری نام ستون به آرایه
+        """
+        columns = {}
+        for name, dtype in ARCHIVE_COLUMNS.items():
+            if rows == 0:
+                columns[name] = np.empty(0, dtype=dtype)
+            else:
+                # نمای ndarray روی memmap برای برش سریع‌تر بدون کپی
+                columns[name] = np.memmap(
+                    self._column_path(directory, name, generation),
+                    dtype=dtype, mode='r', shape=(rows,)
+                ).view(np.ndarray)
+        return columns
+
+    def has(self, symbol: str) -> bool:
+        """
+        بررسی وجود نماد در آرشیو
+        symbol: نماد سهم
+        return: True اگر نماد حداقل یک ردیف داشته باشد
+        """
+        opened = self._columns(symbol)
+        return opened is not None and opened.rows > 0
+
+    def symbols(self) -> List[str]:
+        """
+        دریافت لیست نمادهای آرشیو
+        return: لیست نام پوشه‌های نمادها
+        """
+        return sorted(
+            name for name in os.listdir(self.root)
+            if os.path.exists(os.path.join(self.root, name, META_FILE))
+        )
+
+    def last_date(self, symbol: str) -> Optional[int]:
+        """
+        دریافت آخرین تاریخ ذخیره شده یک نماد
+        symbol: نماد سهم
+        return: تاریخ به صورت YYYYMMDD یا None
+        """
+        opened = self._columns(symbol)
+        if opened is None or opened.rows == 0:
+            return None
+        return int(opened.columns['date'][-1])
+
+    def read(self, symbol: str, start_date=None, end_date=None) -> Dict[str, np.ndarray]:
+        """
+        خواندن بازه‌ای از قیمت‌های یک نماد بدون کپی
+        آرایه‌های برگشتی برش‌هایی از memmap و فقط خواندنی هستند
+        symbol: نماد سهم
+        start_date: تاریخ شروع (رشته، datetime یا YYYYMMDD)
+        end_date: تاریخ پایان (رشته، datetime یا YYYYMMDD)
+        return: دیکشنری نام ستون به آرایه
+        """
+        opened = self._columns(symbol)
+        if opened is None:
+            return {name: np.empty(0, dtype=dtype) for name, dtype in ARCHIVE_COLUMNS.items()}
+
+        dates = opened.columns['date']
+        first = 0 if start_date is None else int(
+            dates.searchsorted(_date_key(start_date), side='left'))
+        last = opened.rows if end_date is None else int(
+            dates.searchsorted(_date_key(end_date), side='right'))
+        return {name: column[first:last] for name, column in opened.columns.items()}
+
+    def read_frame(self, symbol: str, start_date=None, end_date=None) -> pd.DataFrame:
+        """
+        خواندن بازه‌ای از قیمت‌های یک نماد به صورت دیتافریم
+        ستون‌ها و نوع‌ها مانند خروجی SQL در get_stock_data هستند
+        (تاریخ رشته YYYY-MM-DD، قیمت‌ها float64 و حجم int64)
+        symbol: نماد سهم
+        start_date: تاریخ شروع
+        end_date: تاریخ پایان
+        return: دیتافریم date و OHLCV
+        """
+        columns = self.read(symbol, start_date, end_date)
+        dates = np.datetime_as_string(int_to_date(columns['date']), unit='D').astype(object)
+        frame = {'date': dates}
+        for name in ('open', 'high', 'low', 'close'):
+            frame[name] = columns[name].astype(np.float64)
+        frame['volume'] = columns['volume'].astype(np.int64)
+        return pd.DataFrame(frame)
+
+    def append(self, symbol: str, data) -> int:
+        """
+        افزودن اتمی ردیف‌های جدید به آرشیو یک نماد
+        ردیف‌هایی که تاریخ آن‌ها از آخرین تاریخ موجود کمتر یا مساوی است
+        جایگزین انتهای تاریخچه می‌شوند (در فایل‌های نسخه جدید تا خوانندگان
+        فعلی تحت تأثیر قرار نگیرند)
+        symbol: نماد سهم
+        data: دیتافریم یا دیکشنری ستونی با کلیدهای date و OHLCV
+        return: تعداد ردیف‌های نوشته شده
+        """
+        if isinstance(data, pd.DataFrame) and 'date' not in data:
+            data = data.reset_index()
+
+        dates = date_to_int(data['date'])
+        if len(dates) == 0:
+            return 0
+        order = np.argsort(dates, kind='stable')
+        new_columns = {'date': dates[order]}
+        for name in ('open', 'high', 'low', 'close', 'volume'):
+            values = np.asarray(data[name], dtype=np.float64)
+            if len(values) != len(dates):
+                raise DatabaseError(f"طول ستون {name} با ستون date برابر نیست")
+            new_columns[name] = np.rint(np.nan_to_num(values[order])).astype(np.int64)
+
+        # حذف تاریخ‌های تکراری داخل داده جدید (آخرین مقدار معتبر است)
+        keep = np.append(new_columns['date'][1:] != new_columns['date'][:-1], True)
+        new_columns = {name: column[keep] for name, column in new_columns.items()}
+
+        directory = self._symbol_dir(symbol)
+        os.makedirs(directory, exist_ok=True)
+
+        with self._write_lock:
+            rows, generation, _ = self._read_meta(directory)
+            old_generation = generation
+            existing = self._columns(symbol) if rows else None
+            split = rows
+            if existing is not None:
+                split = int(np.searchsorted(
+                    existing.columns['date'], new_columns['date'][0], side='left'))
+
+            if split == rows:
+                # افزودن ساده به انتهای فایل‌های نسخه فعلی
+                for name, column in new_columns.items():
+                    self._write_column(directory, name, generation, rows, column)
+            else:
+                # بازنویسی انتهای تاریخچه در نسخه جدید فایل‌ها
+                generation += 1
+                for name, column in new_columns.items():
+                    prefix = np.asarray(existing.columns[name][:split])
+                    self._write_column(directory, name, generation, 0,
+                                       np.concatenate([prefix, column]))
+
+            self._write_meta(directory, split + len(new_columns['date']), generation)
+            with self._lock:
+                self._open.pop(symbol, None)
+            # فایل‌های نسخه قبلی فقط پس از ثبت meta حذف می‌شوند؛ خراب شدن برنامه پیش از این
+            # نقطه فقط فایل یتیم باقی می‌گذارد که هنگام باز شدن بعدی نماد پاکسازی می‌شود
+            if generation != old_generation:
+                self._remove_generation(directory, old_generation)
+        return len(new_columns['date'])
+
+    def _write_column(self, directory: str, name: str, generation: int,
+                      offset_rows: int, column: np.ndarray):
+        """
+        نوشتن مقادیر یک ستون از یک ردیف مشخص
+        بایت‌های بعد از آخرین ردیف معتبر (از افزودن ناتمام قبلی) بازنویسی می‌شوند
+        directory: پوشه نماد
+        name: نام ستون
+        generation: شماره نسخه فایل‌ها
+        offset_rows: ردیف شروع نوشتن
+        column: مقادیر ستون
+        """
+        dtype = ARCHIVE_COLUMNS[name]
+        path = self._column_path(directory, name, generation)
+        with open(path, 'r+b' if os.path.exists(path) else 'w+b') as f:
+            f.seek(offset_rows * dtype.itemsize)
+            f.write(np.ascontiguousarray(column, dtype=dtype).tobytes())
+            f.truncate()
+            f.flush()
+            os.fsync(f.fileno())
+
+    def _remove_generation(self, directory: str, generation: int):
+        """
+        حذف فایل‌های یک نسخه قدیمی
+        اگر فایل هنوز توسط خواننده‌ای نگاشت شده باشد (ویندوز) حذف نادیده گرفته می‌شود
+        directory: پوشه نماد
+        generation: شماره نسخه
+        """
+        for name in ARCHIVE_COLUMNS:
+            try:
+                os.remove(self._column_path(directory, name, generation))
+            except OSError:
+                pass
+
+    def _sweep_generations(self, directory: str, generation: int):
+        """
+        حذف فایل‌های ستونی نسخه‌های دیگر (یتیم‌های بازنویسی ناتمام یا حذف نشده)
+        باید درون قفل نوشتن فراخوانی شود
+        directory: پوشه نماد
+        generation: شماره نسخه ثبت شده در meta
+        """
+        try:
+            names = os.listdir(directory)
+        except FileNotFoundError:
+            return
+        for file_name in names:
+            parts = file_name.split('.')
+            if (len(parts) == 3 and parts[0] in ARCHIVE_COLUMNS and parts[2] == 'bin'
+                    and parts[1].isdigit() and int(parts[1]) != generation):
+                try:
+                    os.remove(os.path.join(directory, file_name))
+                except OSError:
+                    pass
+
+    def import_from_sqlite(self, db_path: str, table: str = 'stock_prices',
+                           symbols: Optional[Iterable[str]] = None) -> Dict:
+        """
+        وارد کردن تاریخچه قیمت‌ها از جدول stock_prices یا daily_prices
+        db_path: مسیر فایل پایگاه داده
+        table: نام جدول قیمت‌ها
+        symbols: لیست نمادها (None برای همه نمادها)
+        return: دیکشنری آمار (symbols, rows)
+        """
+        if table not in ('stock_prices', 'daily_prices'):
+            raise DatabaseError(f"جدول {table} پشتیبانی نمی‌شود")
+
+        conn = sqlite3.connect(db_path)
+        try:
+            if symbols is None:
+                symbols = [row[0] for row in conn.execute(
+                    f"SELECT DISTINCT symbol FROM {table} ORDER BY symbol")]
+
+            total_rows = 0
+            imported = 0
+            for symbol in symbols:
+                rows = conn.execute(f"""
+                    SELECT date, open, high, low, close, volume
+                    FROM {table}
+                    WHERE symbol = ?
+                    ORDER BY date
+                """, (symbol,)).fetchall()
+                if not rows:
+                    continue
+
+                dates, *values = zip(*rows)
+                columns = {'date': dates}
+                for name, column in zip(('open', 'high', 'low', 'close', 'volume'), values):
+                    columns[name] = np.array(column, dtype=np.float64)
+                total_rows += self.append(symbol, columns)
+                imported += 1
+
+            return {'symbols': imported, 'rows': total_rows}
+        except sqlite3.Error as e:
+            raise DatabaseError(f"خطا در وارد کردن تاریخچه قیمت‌ها: {str(e)}")
+        finally:
+            conn.close()
@@ -0,0 +1,179 @@
+"""
+این ماژول پنل قیمت چند نماد (ماتریس تاریخ × نماد) را فراهم می‌کند.
+این ماژول امکانات زیر را فراهم می‌کند:
+- چیدمان هم‌تراز قیمت‌های چند نماد روی یک تقویم معاملاتی مشترک
+- آرایه‌های float64 پیوسته برای هر فیلد OHLCV
+- پر کردن روزهای بدون معامله با آخرین قیمت (حجم صفر)
+- تبدیل به دیتافریم‌های پانداس برای ماژول‌های تحلیل
+"""
+
+from typing import Dict, Iterable, List, Optional, Sequence
+import numpy as np
+import pandas as pd
+from .exceptions import ValidationError
+from .price_archive import date_to_int, int_to_date
+
+PANEL_FIELDS = ('open', 'high', 'low', 'close', 'volume')
+
+
+def normalize_fields(fields) -> List[str]:
+    """
+    بررسی و تبدیل فیلدهای درخواستی به لیست
+    fields: نام یک فیلد یا لیست فیلدها
+    return: لیست فیلدها
+    """
+    if isinstance(fields, str):
+        fields = [fields]
+    fields = list(fields)
+    for field in fields:
+        if field not in PANEL_FIELDS:
+            raise ValidationError(f"فیلد {field} معتبر نیست")
+    return fields
+
+
+class PricePanel:
+    """کلاس پنل قیمت هم‌تراز چند نماد"""
+
+    def __init__(self, dates: np.ndarray, symbols: Sequence[str], values: Dict[str, np.ndarray]):
+        """
+        سازنده کلاس PricePanel
+        dates: تاریخ‌های سطرها به صورت YYYYMMDD
+        symbols: نمادهای ستون‌ها
+        values: دیکشنری فیلد به ماتریس (تاریخ × نماد)
+        """
+        self.date_keys = np.asarray(dates, dtype=np.int32)
+        self.dates = int_to_date(self.date_keys)
+        self.symbols = list(symbols)
+        self.values = values
+        self._columns = {symbol: i for i, symbol in enumerate(self.symbols)}
+
+    @property
+    def fields(self) -> List[str]:
+        """لیست فیلدهای موجود در پنل"""
+        return list(self.values)
+
+    @property
+    def shape(self):
+        """ابعاد پنل (تعداد تاریخ‌ها، تعداد نمادها)"""
+        return len(self.date_keys), len(self.symbols)
+
+    def __getitem__(self, field: str) -> np.ndarray:
+        """
+        دریافت ماتریس یک فیلد
+        field: نام فیلد
+        return: آرایه float64 پیوسته (تاریخ × نماد)
+        """
+        return self.values[field]
+
+    def column(self, symbol: str, field: str = 'close') -> np.ndarray:
+        """
+        دریافت سری یک نماد
+        symbol: نماد سهم
+        field: نام فیلد
+        return: آرایه مقادیر نماد روی تمام تاریخ‌ها
+        """
+        return self.values[field][:, self._columns[symbol]]
+
+    def frame(self, field: str = 'close') -> pd.DataFrame:
+        """
+        تبدیل یک فیلد به دیتافریم با ایندکس تاریخ و ستون نمادها
+        field: نام فیلد
+        return: دیتافریم (تاریخ × نماد)
+        """
+        return pd.DataFrame(self.values[field], index=pd.DatetimeIndex(self.dates, name='date'),
+                            columns=self.symbols, copy=False)
+
+    def to_frames(self) -> Dict[str, pd.DataFrame]:
+        """
+        تبدیل پنل به دیتافریم OHLCV هر نماد
+        مناسب ورودی analyze_risk و گزارش مقایسه‌ای
+        return: دیکشنری نماد به دیتافریم
+        """
+        index = pd.DatetimeIndex(self.dates, name='date')
+        return {
+            symbol: pd.DataFrame(
+                {field: matrix[:, i] for field, matrix in self.values.items()},
+                index=index
+            )
+            for i, symbol in enumerate(self.symbols)
+        }
+
+    @classmethod
+    def from_rows(cls, symbols: Sequence[str], row_symbols: np.ndarray, row_dates: np.ndarray,
+                  columns: Dict[str, np.ndarray], calendar: Optional[Iterable] = None,
+                  fill: Optional[str] = 'ffill') -> 'PricePanel':
+        """
+        ساخت پنل از ردیف‌های (نماد، تاریخ، مقادیر)
+        symbols: نمادهای ستون‌ها به ترتیب دلخواه خروجی
+        row_symbols: اندیس ستون هر ردیف در symbols
+        row_dates: تاریخ هر ردیف به صورت YYYYMMDD
+        columns: دیکشنری فیلد به مقادیر ردیف‌ها
+        calendar: روزهای معاملاتی سطرها (پیش‌فرض: اجتماع تاریخ‌های موجود)
+        fill: 'ffill' برای پر کردن روزهای بدون معامله یا None برای NaN
+        return: نمونه PricePanel
+        """
+        row_symbols = np.asarray(row_symbols, dtype=np.int64)
+        row_dates = np.asarray(row_dates, dtype=np.int32)
+
+        if calendar is None:
+            dates = np.unique(row_dates)
+        else:
+            dates = np.unique(date_to_int(list(calendar)))
+
+        # نگاشت تاریخ هر ردیف به سطر پنل؛ ردیف‌های خارج از تقویم حذف می‌شوند
+        rows = np.searchsorted(dates, row_dates)
+        inside = rows < len(dates)
+        inside[inside] = dates[rows[inside]] == row_dates[inside]
+        rows, cols = rows[inside], row_symbols[inside]
+
+        values = {}
+        for field, data in columns.items():
+            matrix = np.full((len(dates), len(symbols)), np.nan)
+            matrix[rows, cols] = np.asarray(data, dtype=np.float64)[inside]
+            if fill == 'ffill':
+                matrix = cls._forward_fill(matrix) if field != 'volume' else np.nan_to_num(matrix)
+            values[field] = np.ascontiguousarray(matrix)
+
+        return cls(dates, symbols, values)
+
+    @classmethod
+    def from_archive(cls, archive, symbols: Sequence[str], start_date=None, end_date=None,
+                     fields='close', calendar: Optional[Iterable] = None,
+                     fill: Optional[str] = 'ffill') -> 'PricePanel':
+        """
+        ساخت پنل از آرشیو ستونی قیمت‌ها
+        archive: نمونه PriceArchive
+        symbols: لیست نمادها
+        start_date: تاریخ شروع
+        end_date: تاریخ پایان
+        fields: نام یک فیلد یا لیست فیلدها
+        calendar: روزهای معاملاتی سطرها (اختیاری)
+        fill: 'ffill' یا None
+        return: نمونه PricePanel
+        """
+        fields = normalize_fields(fields)
+        symbols = list(dict.fromkeys(symbols))
+        parts = [archive.read(symbol, start_date, end_date) for symbol in symbols]
+
+        row_symbols = np.repeat(np.arange(len(symbols)), [len(part['date']) for part in parts])
+        row_dates = np.concatenate([part['date'] for part in parts]) if parts else np.empty(0, np.int32)
+        columns = {
+            field: np.concatenate([part[field] for part in parts]) if parts else np.empty(0)
+            for field in fields
+        }
+        return cls.from_rows(symbols, row_symbols, row_dates, columns, calendar, fill)
+
+    @staticmethod
+    def _forward_fill(matrix: np.ndarray) -> np.ndarray:
+        """
+        پر کردن مقادیر NaN هر ستون با آخرین مقدار معتبر قبلی
+        matrix: ماتریس (تاریخ × نماد)
+        return: ماتریس پر شده
+        """
+        valid = ~np.isnan(matrix)
+        index = np.where(valid, np.arange(matrix.shape[0])[:, None], 0)
+        np.maximum.accumulate(index, axis=0, out=index)
+        filled = matrix[index, np.arange(matrix.shape[1])]
+        # مقادیر قبل از اولین معامله هر نماد NaN باقی می‌مانند
+        filled[~np.maximum.accumulate(valid, axis=0)] = np.nan
+        return filled
@@ -0,0 +1,268 @@
+"""
+این ماژول محدودسازی نرخ درخواست‌ها به سرورهای داده بازار را فراهم می‌کند.
+این ماژول امکانات زیر را فراهم می‌کند:
+- سطل توکن (token bucket) برای سقف نرخ درخواست هر میزبان
+- سقف هم‌زمانی تطبیقی (AIMD): افزایش تدریجی در پاسخ‌های سالم و کاهش ضربی
+  با افزایش تأخیر، خطای اتصال یا پاسخ 429/503
+- توقف موقت درخواست‌ها طبق سرآیند Retry-After
+- نمونه مشترک برای هر میزبان بین تمام کلاینت‌های برنامه
+"""
+
+import threading
+import time
+from typing import Dict, Optional
+from urllib.parse import urlparse
+from .config import Config
+
+# کدهای وضعیتی که نشانه محدودسازی از سمت سرور هستند
+THROTTLE_STATUS = (429, 503)
+
+
+class TokenBucket:
+    """کلاس سطل توکن با پر شدن پیوسته"""
+
+    def __init__(self, rate: float, burst: int):
+        """
+        سازنده کلاس TokenBucket
+        rate: تعداد توکن در ثانیه (0 برای بدون محدودیت)
+        burst: ظرفیت سطل (حداکثر درخواست‌های پشت سر هم)
+        """
+        self.rate = rate
+        self.burst = max(1, burst)
+        self._tokens = float(self.burst)
+        self._updated = time.monotonic()
+        self._paused_until = 0.0
+        self._lock = threading.Lock()
+
+    def _refill(self, now: float):
+        """
+        افزودن توکن‌های تولید شده از آخرین به‌روزرسانی (باید درون قفل فراخوانی شود)
+        now: زمان فعلی (monotonic)
+        """
+        self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def acquire(self, timeout: Optional[float] = None) -> bool:
+        """
+        برداشتن یک توکن و انتظار در صورت خالی بودن سطل
+        timeout: حداکثر زمان انتظار به ثانیه (None برای نامحدود)
+        return: True در صورت دریافت توکن
+        """
+        if not self.rate:
+            return True
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._refill(now)
+                if now >= self._paused_until and self._tokens >= 1:
+                    self._tokens -= 1
+                    return True
+                wait = max(self._paused_until - now, (1 - self._tokens) / self.rate)
+            if deadline is not None:
+                if now + wait > deadline:
+                    return False
+            time.sleep(wait)
+
+    def pause(self, seconds: float):
+        """
+        توقف صدور توکن برای مدت مشخص (مثلاً طبق Retry-After)
+        seconds: مدت توقف به ثانیه
+        """
+        with self._lock:
+            self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+            self._tokens = 0.0
+
+
+class AdaptiveConcurrency:
+    """کلاس سقف هم‌زمانی تطبیقی با افزایش جمعی و کاهش ضربی (AIMD)"""
+
+    def __init__(self, initial: int = 4, minimum: int = 1, maximum: int = 8,
+                 latency_tolerance: float = 2.0, backoff: float = 0.5):
+        """
+        سازنده کلاس AdaptiveConcurrency
+        initial: سقف اولیه درخواست‌های هم‌زمان
+        minimum: کمترین سقف
+        maximum: بیشترین سقف
+        latency_tolerance: نسبت مجاز میانگین تأخیر به کمترین تأخیر مشاهده شده
+        backoff: ضریب کاهش سقف در زمان فشار
+        """
+        self.minimum = max(1, minimum)
+        self.maximum = max(self.minimum, maximum)
+        self.limit = float(min(max(initial, self.minimum), self.maximum))
+        self.latency_tolerance = latency_tolerance
+        self.backoff = backoff
+        self.in_flight = 0
+        self.base_latency: Optional[float] = None
+        self.avg_latency: Optional[float] = None
+        self.decreases = 0
+        self._last_decrease = 0.0
+        self._condition = threading.Condition()
+
+    def acquire(self):
+        """
+        انتظار تا کمتر بودن درخواست‌های در جریان از سقف فعلی
+        """
+        with self._condition:
+            while self.in_flight >= int(self.limit):
+                self._condition.wait()
+            self.in_flight += 1
+
+    def release(self, latency: float, throttled: bool = False, failed: bool = False):
+        """
+        ثبت پایان یک درخواست و تنظیم سقف
+        latency: مدت درخواست به ثانیه
+        throttled: پاسخ 429/503 دریافت شده
+        failed: خطای اتصال یا مهلت
+        """
+        with self._condition:
+            self.in_flight -= 1
+            if not (throttled or failed):
+                self._observe(latency)
+            now = time.monotonic()
+            congested = throttled or failed or (
+                self.avg_latency is not None
+                and self.avg_latency > self.base_latency * self.latency_tolerance
+            )
+            if congested:
+                # حداکثر یک کاهش در هر رفت و برگشت تا یک موج پاسخ کند سقف را صفر نکند
+                if now - self._last_decrease >= (self.avg_latency or latency):
+                    self.limit = max(self.minimum, self.limit * self.backoff)
+                    self._last_decrease = now
+                    self.decreases += 1
+                    if self.avg_latency is not None and not (throttled or failed):
+                        self.avg_latency = self.base_latency
+            else:
+                # حدود یک واحد افزایش به ازای هر سقف کامل پاسخ سالم
+                self.limit = min(self.maximum, self.limit + 1 / self.limit)
+            self._condition.notify_all()
+
+    def _observe(self, latency: float):
+        """
+        به‌روزرسانی میانگین و کمترین تأخیر (باید درون قفل فراخوانی شود)
+        کمترین تأخیر کم‌کم بالا می‌رود تا تغییر پایدار شبکه را دنبال کند
+        latency: مدت درخواست به ثانیه
+        """
+        if self.base_latency is None:
+            self.base_latency = self.avg_latency = latency
+            return
+        self.avg_latency += 0.2 * (latency - self.avg_latency)
+        if latency < self.base_latency:
+            self.base_latency = latency
+        else:
+            self.base_latency += 0.01 * (latency - self.base_latency)
+
+
+class RequestSlot:
+    """کلاس مجوز یک درخواست (context manager) برای ثبت نتیجه آن در محدودکننده"""
+
+    def __init__(self, limiter: 'HostLimiter'):
+        """
+        سازنده کلاس RequestSlot
+        limiter: محدودکننده میزبان
+        """
+        self.limiter = limiter
+        self.status: Optional[int] = None
+        self.retry_after: Optional[float] = None
+        self._started = 0.0
+
+    def __enter__(self) -> 'RequestSlot':
+        self.limiter.concurrency.acquire()
+        try:
+            self.limiter.bucket.acquire()
+        except BaseException:
+            self.limiter.concurrency.release(0.0)
+            raise
+        self._started = time.monotonic()
+        return self
+
+    def record(self, response):
+        """
+        ثبت پاسخ دریافت شده
+        response: پاسخ requests
+        """
+        self.status = response.status_code
+        retry_after = response.headers.get('Retry-After')
+        if retry_after:
+            try:
+                self.retry_after = float(retry_after)
+            except ValueError:
+                pass
+
+    def __exit__(self, exc_type, exc, tb):
+        latency = time.monotonic() - self._started
+        throttled = self.status in THROTTLE_STATUS
+        if throttled and self.retry_after:
+            self.limiter.bucket.pause(self.retry_after)
+        self.limiter.concurrency.release(latency, throttled=throttled, failed=exc_type is not None)
+        return False
+
+
+class HostLimiter:
+    """کلاس محدودکننده نرخ و هم‌زمانی درخواست‌های یک میزبان"""
+
+    def __init__(self, host: str, rate: float, burst: int, concurrency: AdaptiveConcurrency):
+        """
+        سازنده کلاس HostLimiter
+        host: نام میزبان
+        rate: سقف درخواست در ثانیه
+        burst: حداکثر درخواست‌های پشت سر هم
+        concurrency: سقف هم‌زمانی تطبیقی
+        """
+        self.host = host
+        self.bucket = TokenBucket(rate, burst)
+        self.concurrency = concurrency
+
+    def slot(self) -> RequestSlot:
+        """
+        دریافت مجوز ارسال یک درخواست
+        استفاده: with limiter.slot() as slot: response = ...; slot.record(response)
+        return: RequestSlot
+        """
+        return RequestSlot(self)
+
+    def get_stats(self) -> Dict:
+        """
+        دریافت وضعیت فعلی محدودکننده
+        return: دیکشنری سقف هم‌زمانی، درخواست‌های در جریان و تأخیرها
+        """
+        concurrency = self.concurrency
+        return {
+            'host': self.host,
+            'rate': self.bucket.rate,
+            'concurrency_limit': int(concurrency.limit),
+            'in_flight': concurrency.in_flight,
+            'base_latency': concurrency.base_latency,
+            'avg_latency': concurrency.avg_latency,
+            'decreases': concurrency.decreases
+        }
+
+
+_limiters: Dict[str, HostLimiter] = {}
+_limiters_lock = threading.Lock()
+
+
+def get_limiter(url: str) -> HostLimiter:
+    """
+    دریافت محدودکننده مشترک میزبان یک آدرس
+    تنظیمات از بخش api: rate_limit، rate_burst، max_concurrency و latency_tolerance
+    url: آدرس درخواست
+    return: نمونه HostLimiter
+    """
+    host = urlparse(url).netloc or url
+    with _limiters_lock:
+        limiter = _limiters.get(host)
+        if limiter is None:
+            config = Config()
+            maximum = config.get("api", "max_concurrency") or 8
+            limiter = _limiters[host] = HostLimiter(
+                host,
+                rate=config.get("api", "rate_limit") or 0,
+                burst=config.get("api", "rate_burst") or 1,
+                concurrency=AdaptiveConcurrency(
+                    initial=max(1, maximum // 2),
+                    maximum=maximum,
+                    latency_tolerance=config.get("api", "latency_tolerance") or 2.0
+                )
+            )
+        return limiter
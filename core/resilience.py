@@ -0,0 +1,298 @@
+"""
+این ماژول لایه مشترک پایداری درخواست‌های HTTP را فراهم می‌کند.
+این ماژول امکانات زیر را فراهم می‌کند:
+- تلاش مجدد با تأخیر نمایی و jitter (با رعایت سرآیند Retry-After)
+- سقف تلاش‌های مجدد (retry budget) برای هر میزبان تا قطعی سرور با موج تلاش مجدد تشدید نشود
+- قطع‌کننده مدار (circuit breaker) برای هر نقطه پایانی که در زمان باز بودن فوراً خطا می‌دهد
+- وضعیت کلی اتصال برای نمایش در نوار وضعیت
+"""
+
+import random
+import threading
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+from urllib.parse import urlparse
+import requests
+from .config import Config
+from .exceptions import APIError, CircuitOpenError
+from .rate_limiter import THROTTLE_STATUS, get_limiter
+
+# وضعیت‌های قطع‌کننده مدار
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+
+# وضعیت‌های کلی اتصال
+CONNECTED = 'connected'
+DEGRADED = 'degraded'
+DISCONNECTED = 'disconnected'
+
+
+class Backoff:
+    """کلاس محاسبه تأخیر تلاش مجدد نمایی با jitter کامل"""
+
+    def __init__(self, base: float = 0.5, cap: float = 30.0):
+        """
+        سازنده کلاس Backoff
+        base: تأخیر پایه به ثانیه
+        cap: بیشترین تأخیر به ثانیه
+        """
+        self.base = base
+        self.cap = cap
+
+    def delay(self, attempt: int, retry_after: Optional[float] = None) -> float:
+        """
+        تأخیر پیش از تلاش مجدد
+        attempt: شماره تلاش ناموفق (از 0)
+        retry_after: تأخیر درخواستی سرور (در صورت وجود حداقل تأخیر است)
+        return: تأخیر به ثانیه
+        """
+        delay = random.uniform(0, min(self.cap, self.base * 2 ** attempt))
+        if retry_after:
+            delay = max(delay, min(retry_after, self.cap))
+        return delay
+
+
+class RetryBudget:
+    """کلاس سقف تلاش‌های مجدد نسبت به درخواست‌های اصلی"""
+
+    def __init__(self, ratio: float = 0.2, min_per_second: float = 1.0, max_tokens: float = 10.0):
+        """
+        سازنده کلاس RetryBudget
+        ratio: سهم تلاش مجدد به ازای هر درخواست اصلی
+        min_per_second: حداقل تلاش مجدد مجاز در ثانیه در ترافیک کم
+        max_tokens: بیشترین تلاش مجدد انباشته
+        """
+        self.ratio = ratio
+        self.min_per_second = min_per_second
+        self.max_tokens = max_tokens
+        self._tokens = max_tokens
+        self._updated = time.monotonic()
+        self.rejected = 0
+        self._lock = threading.Lock()
+
+    def deposit(self):
+        """
+        ثبت یک درخواست اصلی
+        """
+        with self._lock:
+            self._tokens = min(self.max_tokens, self._tokens + self.ratio)
+
+    def withdraw(self) -> bool:
+        """
+        دریافت مجوز یک تلاش مجدد
+        return: True اگر سقف اجازه دهد
+        """
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.max_tokens,
+                               self._tokens + (now - self._updated) * self.min_per_second)
+            self._updated = now
+            if self._tokens >= 1:
+                self._tokens -= 1
+                return True
+            self.rejected += 1
+            return False
+
+
+class CircuitBreaker:
+    """کلاس قطع‌کننده مدار یک نقطه پایانی"""
+
+    def __init__(self, name: str, failure_threshold: int = 5, reset_timeout: float = 30.0):
+        """
+        سازنده کلاس CircuitBreaker
+        name: نام نقطه پایانی
+        failure_threshold: تعداد خطاهای پیاپی برای باز شدن مدار
+        reset_timeout: مدت باز ماندن مدار پیش از درخواست آزمایشی (ثانیه)
+        """
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self._probe = False
+        self._lock = threading.Lock()
+
+    def allow(self) -> bool:
+        """
+        بررسی مجاز بودن ارسال درخواست
+        پس از reset_timeout فقط یک درخواست آزمایشی اجازه ارسال دارد
+        return: True اگر درخواست مجاز باشد
+        """
+        with self._lock:
+            if self.state == CLOSED:
+                return True
+            if self.state == OPEN and time.monotonic() - self.opened_at >= self.reset_timeout:
+                self.state = HALF_OPEN
+                self._probe = False
+            if self.state == HALF_OPEN and not self._probe:
+                self._probe = True
+                return True
+            return False
+
+    def retry_in(self) -> float:
+        """
+        زمان باقی‌مانده تا درخواست آزمایشی بعدی
+        return: ثانیه
+        """
+        with self._lock:
+            if self.state != OPEN:
+                return 0.0
+            return max(0.0, self.reset_timeout - (time.monotonic() - self.opened_at))
+
+    def record_success(self):
+        """
+        ثبت پاسخ موفق و بستن مدار
+        """
+        with self._lock:
+            self.state = CLOSED
+            self.failures = 0
+            self._probe = False
+
+    def record_failure(self):
+        """
+        ثبت خطا؛ مدار پس از failure_threshold خطای پیاپی یا شکست درخواست آزمایشی باز می‌شود
+        """
+        with self._lock:
+            self.failures += 1
+            if self.state == HALF_OPEN or self.failures >= self.failure_threshold:
+                self.state = OPEN
+                self.opened_at = time.monotonic()
+                self._probe = False
+
+
+class HostPolicy:
+    """کلاس سیاست پایداری درخواست‌های یک میزبان"""
+
+    def __init__(self, host: str, config: Config):
+        """
+        سازنده کلاس HostPolicy
+        host: نام میزبان
+        config: تنظیمات برنامه (بخش api)
+        """
+        self.host = host
+        self.backoff = Backoff(
+            base=config.get("api", "backoff_base") or 0.5,
+            cap=config.get("api", "backoff_cap") or 30.0
+        )
+        self.budget = RetryBudget(ratio=config.get("api", "retry_budget_ratio") or 0.2)
+        self.failure_threshold = config.get("api", "breaker_threshold") or 5
+        self.reset_timeout = config.get("api", "breaker_reset") or 30.0
+        self.breakers: Dict[str, CircuitBreaker] = {}
+        self._lock = threading.Lock()
+
+    def breaker(self, endpoint: str) -> CircuitBreaker:
+        """
+        دریافت قطع‌کننده مدار یک نقطه پایانی
+        endpoint: نام نقطه پایانی
+        return: نمونه CircuitBreaker
+        """
+        with self._lock:
+            breaker = self.breakers.get(endpoint)
+            if breaker is None:
+                breaker = self.breakers[endpoint] = CircuitBreaker(
+                    f"{self.host}/{endpoint}", self.failure_threshold, self.reset_timeout
+                )
+            return breaker
+
+
+_policies: Dict[str, HostPolicy] = {}
+_policies_lock = threading.Lock()
+
+
+def get_policy(url: str) -> HostPolicy:
+    """
+    دریافت سیاست مشترک پایداری میزبان یک آدرس
+    url: آدرس درخواست
+    return: نمونه HostPolicy
+    """
+    host = urlparse(url).netloc or url
+    with _policies_lock:
+        policy = _policies.get(host)
+        if policy is None:
+            policy = _policies[host] = HostPolicy(host, Config())
+        return policy
+
+
+def _retry_after(response) -> Optional[float]:
+    """
+    خواندن سرآیند Retry-After (فقط مقدار عددی)
+    response: پاسخ requests
+    return: ثانیه یا None
+    """
+    value = response.headers.get('Retry-After')
+    try:
+        return float(value) if value else None
+    except ValueError:
+        return None
+
+
+def call(url: str, endpoint: str, send: Callable[[], requests.Response],
+         attempts: int = 3) -> requests.Response:
+    """
+    ارسال درخواست با محدودکننده نرخ، قطع‌کننده مدار و تلاش مجدد
+    خطاهای اتصال، پاسخ‌های 5xx و 429 تلاش مجدد می‌شوند؛ بقیه پاسخ‌ها بدون تغییر برگردانده می‌شوند
+    url: آدرس درخواست (برای تعیین میزبان)
+    endpoint: نام نقطه پایانی برای قطع‌کننده مدار (مثلاً history)
+    send: تابع ارسال یک درخواست با خروجی پاسخ requests
+    attempts: حداکثر تعداد تلاش
+    return: پاسخ سرور
+    """
+    policy = get_policy(url)
+    breaker = policy.breaker(endpoint)
+    limiter = get_limiter(url)
+    policy.budget.deposit()
+    error = None
+
+    for attempt in range(max(1, attempts)):
+        if not breaker.allow():
+            raise CircuitOpenError(
+                f"ارتباط با {breaker.name} موقتاً قطع است "
+                f"(تلاش مجدد تا {breaker.retry_in():.0f} ثانیه دیگر)"
+            )
+
+        retry_after = None
+        try:
+            with limiter.slot() as slot:
+                response = send()
+                slot.record(response)
+        except requests.exceptions.RequestException as e:
+            breaker.record_failure()
+            error = f"{type(e).__name__}: {str(e)}"
+        except Exception:
+            # آزاد کردن درخواست آزمایشی در خطاهای غیرشبکه‌ای
+            breaker.record_failure()
+            raise
+        else:
+            if response.status_code >= 500:
+                breaker.record_failure()
+            else:
+                # 429 نشانه فشار است نه قطعی سرور
+                breaker.record_success()
+            if response.status_code not in THROTTLE_STATUS and response.status_code < 500:
+                return response
+            error = f"HTTP {response.status_code}"
+            retry_after = _retry_after(response)
+
+        if attempt == attempts - 1 or not policy.budget.withdraw():
+            break
+        time.sleep(policy.backoff.delay(attempt, retry_after))
+
+    raise APIError(f"درخواست {breaker.name} پس از {attempt + 1} تلاش ناموفق بود: {error}")
+
+
+def connection_status() -> Tuple[str, List[str]]:
+    """
+    وضعیت کلی اتصال بر اساس قطع‌کننده‌های مدار
+    return: (connected، degraded یا disconnected، لیست نقاط پایانی قطع)
+    """
+    with _policies_lock:
+        breakers = [breaker for policy in _policies.values()
+                    for breaker in list(policy.breakers.values())]
+    down = [breaker.name for breaker in breakers if breaker.state != CLOSED]
+    if not down:
+        return CONNECTED, []
+    if len(down) == len(breakers):
+        return DISCONNECTED, down
+    return DEGRADED, down
@@ -0,0 +1,65 @@
+"""
+این ماژول ادغام درخواست‌های هم‌زمان یکسان (single-flight) را فراهم می‌کند.
+این ماژول امکانات زیر را فراهم می‌کند:
+- اجرای فقط یک دریافت برای هر کلید در هر لحظه
+- انتظار فراخواننده‌های هم‌زمان روی همان دریافت و دریافت همان نتیجه یا خطا
+- آمار تعداد اجراها و درخواست‌های ادغام شده
+"""
+
+import threading
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, Hashable
+
+
+class SingleFlight:
+    """کلاس ادغام دریافت‌های هم‌زمان یک کلید"""
+
+    def __init__(self):
+        """
+        سازنده کلاس SingleFlight
+        """
+        self._calls: Dict[Hashable, Future] = {}
+        self._lock = threading.Lock()
+        self.executed = 0
+        self.shared = 0
+
+    def do(self, key: Hashable, func: Callable[[], Any]) -> Any:
+        """
+        اجرای func برای کلید یا انتظار برای اجرای در جریان همان کلید
+        key: کلید درخواست
+        func: تابع دریافت بدون ورودی
+        return: نتیجه func (خطای آن برای همه فراخواننده‌ها تکرار می‌شود)
+        """
+        with self._lock:
+            future = self._calls.get(key)
+            leader = future is None
+            if leader:
+                future = Future()
+                self._calls[key] = future
+                self.executed += 1
+            else:
+                self.shared += 1
+
+        if not leader:
+            return future.result()
+
+        try:
+            result = func()
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+
+    def in_flight(self, key: Hashable) -> bool:
+        """
+        بررسی در جریان بودن دریافت یک کلید
+        key: کلید درخواست
+        return: True اگر دریافت در جریان باشد
+        """
+        with self._lock:
+            return key in self._calls
@@ -0,0 +1,157 @@
+"""
+این ماژول تبدیل پاسخ‌های متنی TSETMC به داده‌های ستونی را فراهم می‌کند.
+این ماژول امکانات زیر را فراهم می‌کند:
+- تبدیل یکجای متن (ردیف‌ها با ';' و ستون‌ها با ',') به دیتافریم با ستون‌های نوع‌دار
+- تبدیل دسته‌ای هر ستون به آرایه NumPy بدون ساخت دیکشنری برای هر ردیف
+  (پاسخ‌های دارای ردیف خراب با پارسر C پانداس خوانده می‌شوند)
+- کنار گذاشتن ردیف‌های ناقص یا دارای مقدار عددی نامعتبر
+"""
+
+import csv
+import io
+from operator import methodcaller
+from typing import List, Optional, Sequence, Tuple
+import numpy as np
+import pandas as pd
+
+# ستون‌ها و نوع داده هر پاسخ (ستون‌های اضافه در انتهای ردیف نادیده گرفته می‌شوند)
+HISTORY_COLUMNS = (
+    ('date', str),
+    ('open', float),
+    ('high', float),
+    ('low', float),
+    ('close', float),
+    ('volume', int),
+    ('value', float),
+)
+MARKET_WATCH_COLUMNS = (
+    ('symbol', str),
+    ('name', str),
+    ('last_price', float),
+    ('change', float),
+    ('volume', int),
+)
+STOCK_LIST_COLUMNS = (
+    ('symbol', str),
+    ('name', str),
+    ('code', str),
+    ('category', str),
+)
+
+
+def empty_frame(columns: Sequence[Tuple[str, type]]) -> pd.DataFrame:
+    """
+    دیتافریم خالی با ستون‌ها و نوع‌های مشخص
+    columns: لیست (نام ستون، نوع)
+    return: دیتافریم بدون ردیف
+    """
+    return pd.DataFrame({
+        name: np.array([], dtype=np.int64 if kind is int else np.float64 if kind is float else object)
+        for name, kind in columns
+    })
+
+
+def _parse_uniform(rows: List[str], columns: Sequence[Tuple[str, type]],
+                   field_sep: str) -> Optional[pd.DataFrame]:
+    """
+    مسیر سریع برای پاسخ‌های سالم که همه ردیف‌ها دقیقاً به تعداد ستون‌ها مقدار دارند
+    (حالت معمول پاسخ‌های TSETMC): یک split برای کل متن و تبدیل هر ستون با map در C
+    rows: ردیف‌های غیرخالی با تعداد ستون برابر
+    columns: لیست (نام ستون، نوع)
+    field_sep: جداکننده ستون‌ها
+    return: دیتافریم یا None اگر مقدار عددی نامعتبر وجود داشته باشد
+    """
+    width = len(columns)
+    fields = field_sep.join(rows).split(field_sep)
+    data = {}
+    try:
+        for i, (name, kind) in enumerate(columns):
+            values = fields[i::width]
+            if kind is str:
+                data[name] = np.array(values, dtype=object)
+            else:
+                numbers = np.array(list(map(float, values)), dtype=np.float64)
+                # nan و inf (مانند "inf" که در تبدیل به int64 به کمترین مقدار تبدیل می‌شود)
+                if not np.isfinite(numbers).all():
+                    return None
+                data[name] = numbers.astype(np.int64) if kind is int else numbers
+    except ValueError:
+        return None
+    return pd.DataFrame(data)
+
+
+def parse_table(text: str, columns: Sequence[Tuple[str, type]],
+                row_sep: str = ';', field_sep: str = ',') -> pd.DataFrame:
+    """
+    تبدیل متن پاسخ به دیتافریم
+    ردیف‌های با ستون کمتر یا مقدار عددی خالی، نامعتبر یا نامتناهی حذف و تعدادشان در
+    attrs['malformed'] ثبت می‌شود؛ متن خالی در ستون‌های متنی معتبر است
+    text: متن پاسخ
+    columns: لیست (نام ستون، نوع) به ترتیب ستون‌های هر ردیف؛ نوع str، int یا float
+    row_sep: جداکننده ردیف‌ها
+    field_sep: جداکننده ستون‌ها
+    return: دیتافریم با ستون‌های نوع‌دار
+    """
+    if not text or not text.strip(row_sep + ' \r\n'):
+        frame = empty_frame(columns)
+        frame.attrs['malformed'] = 0
+        return frame
+
+    # ردیف‌های خالی نادیده گرفته و ردیف‌های کوتاه پیش از تبدیل کنار گذاشته می‌شوند
+    rows = [row for row in text.split(row_sep) if row.strip()]
+    counts = list(map(methodcaller('count', field_sep), rows))
+    width = len(columns)
+    if all(count == width - 1 for count in counts):
+        frame = _parse_uniform(rows, columns, field_sep)
+        if frame is not None:
+            frame.attrs['malformed'] = 0
+            return frame
+    complete = [row for row, count in zip(rows, counts) if count >= width - 1]
+    short = len(rows) - len(complete)
+    if not complete:
+        frame = empty_frame(columns)
+        frame.attrs['malformed'] = short
+        return frame
+    text = row_sep.join(complete)
+
+    names = [name for name, _ in columns]
+    strings = {name: str for name, kind in columns if kind is str}
+    numeric = [name for name, kind in columns if kind is not str]
+    options = dict(
+        sep=field_sep,
+        lineterminator=row_sep,
+        header=None,
+        names=names,
+        usecols=range(len(names)),
+        quoting=csv.QUOTE_NONE,
+        keep_default_na=False,
+        # فقط مقدار خالی ستون‌های عددی نامعتبر است؛ متن خالی (مثلاً نام) مقدار معتبری است
+        na_values={name: [''] for name in numeric},
+        skip_blank_lines=True,
+        engine='c'
+    )
+    try:
+        # مسیر سریع: ستون‌های عددی مستقیماً float64 خوانده می‌شوند
+        frame = pd.read_csv(io.StringIO(text), dtype={**strings, **dict.fromkeys(numeric, np.float64)},
+                            **options)
+    except pd.errors.EmptyDataError:
+        frame = empty_frame(columns)
+        frame.attrs['malformed'] = short
+        return frame
+    except ValueError:
+        # مقدار غیرعددی در یک ستون؛ ستون‌های عددی جداگانه تبدیل و مقادیر نامعتبر NaN می‌شوند
+        frame = pd.read_csv(io.StringIO(text), dtype=strings, **options)
+        for name in numeric:
+            frame[name] = pd.to_numeric(frame[name], errors='coerce')
+
+    # ستون عددی با مقدار خالی، نامعتبر یا نامتناهی
+    valid = np.isfinite(frame[numeric].to_numpy(dtype=np.float64)).all(axis=1)
+    malformed = short + int(len(frame) - valid.sum())
+    if not valid.all():
+        frame = frame[valid].reset_index(drop=True)
+
+    # نوع ستون‌ها همانند مسیر سریع (متن به صورت object)
+    frame = frame.astype({name: np.int64 if kind is int else np.float64 if kind is float else object
+                          for name, kind in columns})
+    frame.attrs['malformed'] = malformed
+    return frame
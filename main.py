@@ -3,6 +3,7 @@
 """
 
 import tkinter as tk
+from core.db_service import DatabaseService
 from ui.main_window import MainWindow
 
 def main():
@@ -17,6 +18,12 @@ def main():
     
     # اجرای حلقه اصلی برنامه
     root.mainloop()
+    
+    # توقف کارهای پس‌زمینه پنجره اصلی
+    app.close()
+    
+    # اجرای نوشتن‌های باقی‌مانده و بستن اتصال‌های پایگاه داده
+    DatabaseService.close_all()
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -8,8 +8,10 @@
 
 import tkinter as tk
 from tkinter import ttk, messagebox
-from core.database import DatabaseManager
+from core.database import get_database
 from core.api_handler import StockAPI
+from core.prefetcher import get_prefetcher
+from core import resilience
 from ui.widgets.dashboard import Dashboard
 from ui.widgets.portfolio_manager import PortfolioManager
 from ui.widgets.technical_analysis import TechnicalAnalysis
@@ -33,9 +35,11 @@ class MainWindow:
         """
         self.root = root
         self.setup_window()  # تنظیمات اولیه پنجره
-        self.db = DatabaseManager()  # راه‌اندازی دیتابیس
+        self.db = get_database()  # راه‌اندازی دیتابیس
         self.api = StockAPI()  # راه‌اندازی API
         self.load_stock_data()  # بارگذاری اطلاعات سهام
+        self.prefetcher = get_prefetcher()
+        self.prefetcher.warm_up()  # گرم کردن کش در پس‌زمینه هم‌زمان با ساخت رابط کاربری
         self.setup_ui()  # راه‌اندازی رابط کاربری
         self.update_clock()  # شروع به‌روزرسانی ساعت
         
@@ -74,16 +78,18 @@ class MainWindow:
         ذخیره لیست سهام در دیتابیس
         این متد لیست کامل سهام را در جدول stock_list ذخیره می‌کند
         """
-        try:
+        def replace_stock_list(conn):
             # پاک کردن رکوردهای قبلی
-            self.db.cursor.execute('DELETE FROM stock_list')
+            conn.execute('DELETE FROM stock_list')
             # درج رکوردهای جدید
-            for symbol, data in self.all_stocks.items():
-                self.db.cursor.execute('''
-                    INSERT INTO stock_list (symbol, name, code, sector, market, last_update) 
-                    VALUES (?, ?, ?, ?, ?, ?)
-                ''', (symbol, data['name'], data['code'], data['sector'], data['market'], datetime.now()))
-            self.db.conn.commit()
+            conn.executemany('''
+                INSERT INTO stock_list (symbol, name, code, sector, market, last_update) 
+                VALUES (?, ?, ?, ?, ?, ?)
+            ''', [(symbol, data['name'], data['code'], data['sector'], data['market'], datetime.now())
+                  for symbol, data in self.all_stocks.items()])
+            
+        try:
+            self.db.transaction(replace_stock_list)
         except Exception as e:
             print(f"Error saving stock list: {str(e)}")
     
@@ -190,11 +196,23 @@ class MainWindow:
         self.clock_label.pack(side=tk.RIGHT, padx=5)
         
     def update_clock(self):
-        """به‌روزرسانی ساعت"""
+        """به‌روزرسانی ساعت و وضعیت اتصال"""
         current_time = datetime.now().strftime("%H:%M:%S")
         self.clock_label.config(text=current_time)
+        self.update_connection_status()
         self.root.after(1000, self.update_clock)
 
+    def update_connection_status(self):
+        """نمایش وضعیت اتصال بر اساس قطع‌کننده‌های مدار درخواست‌ها"""
+        status, down = resilience.connection_status()
+        if status == resilience.CONNECTED:
+            text = "وضعیت اتصال: متصل"
+        elif status == resilience.DEGRADED:
+            text = f"وضعیت اتصال: اختلال ({len(down)} سرویس)"
+        else:
+            text = "وضعیت اتصال: قطع"
+        self.connection_label.config(text=text)
+
     def setup_download_tab(self):
         """راه‌اندازی تب دانلود"""
         download_frame = ttk.Frame(self.main_tabs)
@@ -202,4 +220,8 @@ class MainWindow:
         
         # ایجاد صفحه دانلود
         self.download_page = DownloadPage(download_frame)
-        self.download_page.pack(fill="both", expand=True) 
\ No newline at end of file
+        self.download_page.pack(fill="both", expand=True)
+        
+    def close(self):
+        """توقف پیش‌بارگذاری و ثبت نوشتن‌های کش هنگام خروج"""
+        self.prefetcher.close() 
\ No newline at end of file
@@ -128,6 +128,7 @@ class TabManager:
             columns=("code", "symbol"),
             column_names=("کد معاملاتی", "نماد"),
             selectmode='extended',
+            prefetch=self.main_window.prefetcher.prefetch,
             height=10  # محدود کردن تعداد ردیف‌های قابل نمایش
         )
         
@@ -184,6 +185,7 @@ class TabManager:
             columns=("code", "symbol"),
             column_names=("کد معاملاتی", "نماد"),
             selectmode='extended',
+            prefetch=self.main_window.prefetcher.prefetch,
             height=10  # محدود کردن تعداد ردیف‌های قابل نمایش
         )
         
@@ -240,6 +242,7 @@ class TabManager:
             columns=("code", "symbol"),
             column_names=("کد معاملاتی", "نماد"),
             selectmode='extended',
+            prefetch=self.main_window.prefetcher.prefetch,
             height=10  # محدود کردن تعداد ردیف‌های قابل نمایش
         )
         
@@ -337,18 +340,8 @@ class TabManager:
         بارگذاری لیست سهام منتخب از دیتابیس
         """
         try:
-            # ایجاد جدول favorites اگر وجود نداشته باشد
-            self.main_window.db.cursor.execute('''
-                CREATE TABLE IF NOT EXISTS favorites (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    symbol TEXT NOT NULL UNIQUE,
-                    code TEXT NOT NULL UNIQUE
-                )
-            ''')
-            
-            # خواندن رکوردها از دیتابیس
-            self.main_window.db.cursor.execute('SELECT symbol, code FROM favorites')
-            rows = self.main_window.db.cursor.fetchall()
+            # خواندن رکوردها از دیتابیس (جدول در مهاجرت نسخه 7 ساخته می‌شود)
+            rows = self.main_window.db.query('SELECT symbol, code FROM favorites')
             
             # ذخیره در دیکشنری سهام منتخب
             self.selected_stocks = {symbol: code for symbol, code in rows}
@@ -385,18 +378,14 @@ class TabManager:
         ذخیره لیست سهام منتخب در دیتابیس
         """
         try:
-            # پاک کردن رکوردهای قبلی
-            self.main_window.db.cursor.execute('DELETE FROM favorites')
-            
-            # درج رکوردهای جدید
-            for symbol, code in self.selected_stocks.items():
-                self.main_window.db.cursor.execute(
-                    'INSERT INTO favorites (symbol, code) VALUES (?, ?)', 
-                    (symbol, code)
-                )
+            rows = list(self.selected_stocks.items())
             
-            # ذخیره تغییرات
-            self.main_window.db.conn.commit()
+            def replace_favorites(conn):
+                # پاک کردن رکوردهای قبلی و درج رکوردهای جدید در یک تراکنش
+                conn.execute('DELETE FROM favorites')
+                conn.executemany('INSERT INTO favorites (symbol, code) VALUES (?, ?)', rows)
+                
+            self.main_window.db.transaction(replace_favorites)
             
         except Exception as e:
             print(f"Error saving favorites: {str(e)}")
@@ -8,7 +8,7 @@
 
 import tkinter as tk
 from tkinter import ttk, messagebox
-from core.database import DatabaseManager
+from core.database import get_database
 from core.api_handler import StockAPI
 from datetime import datetime, timedelta
 import matplotlib
@@ -26,7 +26,7 @@ class Dashboard(ttk.Frame):
         parent: والد ویجت (فریم اصلی)
         """
         super().__init__(parent)
-        self.db = DatabaseManager()
+        self.db = get_database()
         self.api = StockAPI()
         
         # تنظیمات اولیه
@@ -140,7 +140,8 @@ class Dashboard(ttk.Frame):
             portfolio_data = self.db.get_portfolio_summary()
             self.update_summary(portfolio_data)
             
-            # دریافت تاریخچه ارزش پورتفوی
+            # ثبت ارزش روزهای جدید و دریافت تاریخچه ارزش پورتفوی
+            self.db.update_portfolio_nav()
             history_data = self.db.get_portfolio_history()
             self.update_portfolio_chart(history_data)
             
@@ -7,7 +7,7 @@
 
 import tkinter as tk
 from tkinter import ttk, messagebox
-from core.database import DatabaseManager
+from core.database import get_database
 from core.api_handler import StockAPI
 from datetime import datetime
 import threading
@@ -19,7 +19,7 @@ class DownloadPage(ttk.Frame):
         parent: والد ویجت (فریم اصلی)
         """
         super().__init__(parent)
-        self.db = DatabaseManager()
+        self.db = get_database()
         self.api = StockAPI()
         
         # تنظیمات اولیه
@@ -195,17 +195,17 @@ class DownloadPage(ttk.Frame):
             messagebox.showerror("خطا", f"خطا در دانلود داده‌ها: {str(e)}")
             
     def download_stocks_data(self, symbols):
-        """دانلود اطلاعات سهام در thread جداگانه"""
-        for symbol in symbols:
-            try:
-                # دانلود اطلاعات
-                data = self.api.get_stock_data(symbol)
-                
+        """
+        دانلود اطلاعات سهام در thread جداگانه
+        درخواست‌ها به صورت هم‌زمان ارسال و هر نتیجه به محض دریافت نمایش داده می‌شود
+        """
+        try:
+            for symbol, data, error in self.api.get_stocks_history(symbols):
                 # به‌روزرسانی جدول در thread اصلی
-                self.after(0, self.add_download_item, symbol, data)
+                self.after(0, self.add_download_item, symbol, data, error)
                 
-            except Exception as e:
-                self.after(0, self.add_download_item, symbol, None, str(e))
+        except Exception as e:
+            self.after(0, messagebox.showerror, "خطا", f"خطا در دانلود داده‌ها: {str(e)}")
                 
     def add_download_item(self, symbol, data, error=None):
         """اضافه کردن آیتم به جدول دانلودها"""
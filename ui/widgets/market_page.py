@@ -8,7 +8,7 @@
 
 import tkinter as tk
 from tkinter import ttk, messagebox
-from core.database import DatabaseManager
+from core.database import get_database
 from core.api_handler import StockAPI
 from datetime import datetime
 import threading
@@ -21,7 +21,7 @@ class MarketPage(ttk.Frame):
         parent: والد ویجت (فریم اصلی)
         """
         super().__init__(parent)
-        self.db = DatabaseManager()
+        self.db = get_database()
         self.api = StockAPI()
         self.master = parent.winfo_toplevel()  # Store the master window reference
         
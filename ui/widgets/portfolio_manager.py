@@ -8,7 +8,7 @@
 
 import tkinter as tk
 from tkinter import ttk, messagebox
-from core.database import DatabaseManager
+from core.database import get_database
 from core.api_handler import StockAPI
 from datetime import datetime
 import threading
@@ -21,7 +21,7 @@ class PortfolioManager(ttk.Frame):
         parent: والد ویجت (فریم اصلی)
         """
         super().__init__(parent)
-        self.db = DatabaseManager()
+        self.db = get_database()
         self.api = StockAPI()
         
         # تنظیمات اولیه
@@ -181,7 +181,7 @@ class PortfolioManager(ttk.Frame):
         """بارگذاری داده‌های پورتفوی"""
         try:
             # دریافت اطلاعات از دیتابیس
-            self.db.cursor.execute('''
+            rows = self.db.query('''
                 SELECT 
                     symbol,
                     quantity,
@@ -190,7 +190,6 @@ class PortfolioManager(ttk.Frame):
                     last_update
                 FROM portfolio
             ''')
-            rows = self.db.cursor.fetchall()
             
             # تبدیل به لیست دیکشنری
             data = []
@@ -281,33 +280,33 @@ class PortfolioManager(ttk.Frame):
             # محاسبه ارزش کل
             total_value = quantity * price
             
-            # بررسی وجود سهم در پورتفوی
-            self.db.cursor.execute('SELECT quantity, avg_price FROM portfolio WHERE symbol = ?', (symbol,))
-            row = self.db.cursor.fetchone()
-            
-            if row:
-                # به‌روزرسانی سهم موجود
-                old_quantity = row[0]
-                old_avg_price = row[1]
-                new_quantity = old_quantity + quantity
-                new_avg_price = ((old_quantity * old_avg_price) + total_value) / new_quantity
+            def apply_trade(conn):
+                # بررسی وجود سهم در پورتفوی
+                row = conn.execute('SELECT quantity, avg_price FROM portfolio WHERE symbol = ?', (symbol,)).fetchone()
                 
-                self.db.cursor.execute('''
-                    UPDATE portfolio 
-                    SET quantity = ?, avg_price = ?, total_value = ?, last_update = ?
-                    WHERE symbol = ?
-                ''', (new_quantity, new_avg_price, new_quantity * new_avg_price, 
-                      datetime.now().strftime('%Y-%m-%d %H:%M:%S'), symbol))
-            else:
-                # اضافه کردن سهم جدید
-                self.db.cursor.execute('''
-                    INSERT INTO portfolio (symbol, quantity, avg_price, total_value, last_update)
-                    VALUES (?, ?, ?, ?, ?)
-                ''', (symbol, quantity, price, total_value, 
-                      datetime.now().strftime('%Y-%m-%d %H:%M:%S')))
+                if row:
+                    # به‌روزرسانی سهم موجود
+                    old_quantity = row[0]
+                    old_avg_price = row[1]
+                    new_quantity = old_quantity + quantity
+                    new_avg_price = ((old_quantity * old_avg_price) + total_value) / new_quantity
+                    
+                    conn.execute('''
+                        UPDATE portfolio 
+                        SET quantity = ?, avg_price = ?, total_value = ?, last_update = ?
+                        WHERE symbol = ?
+                    ''', (new_quantity, new_avg_price, new_quantity * new_avg_price, 
+                          datetime.now().strftime('%Y-%m-%d %H:%M:%S'), symbol))
+                else:
+                    # اضافه کردن سهم جدید
+                    conn.execute('''
+                        INSERT INTO portfolio (symbol, quantity, avg_price, total_value, last_update)
+                        VALUES (?, ?, ?, ?, ?)
+                    ''', (symbol, quantity, price, total_value, 
+                          datetime.now().strftime('%Y-%m-%d %H:%M:%S')))
             
-            # ذخیره تغییرات
-            self.db.conn.commit()
+            # ثبت معامله در یک تراکنش
+            self.db.transaction(apply_trade)
             
             # به‌روزرسانی داده‌ها
             self.load_data()
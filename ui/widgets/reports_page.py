@@ -8,7 +8,7 @@
 
 import tkinter as tk
 from tkinter import ttk, messagebox
-from core.database import DatabaseManager
+from core.database import get_database
 from datetime import datetime, timedelta
 import threading
 import time
@@ -20,7 +20,7 @@ class ReportsPage(ttk.Frame):
         parent: والد ویجت (فریم اصلی)
         """
         super().__init__(parent)
-        self.db = DatabaseManager()
+        self.db = get_database()
         
         # تنظیمات اولیه
         self.setup_ui()
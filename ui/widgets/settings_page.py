@@ -8,7 +8,7 @@
 
 import tkinter as tk
 from tkinter import ttk, messagebox, filedialog
-from core.database import DatabaseManager
+from core.database import get_database
 from core.config import Config
 from core.api_handler import StockAPI
 import json
@@ -21,7 +21,7 @@ class SettingsPage(ttk.Frame):
         parent: والد ویجت (فریم اصلی)
         """
         super().__init__(parent)
-        self.db = DatabaseManager()
+        self.db = get_database()
         self.config = Config()
         self.api = StockAPI()
         
@@ -72,8 +72,7 @@ class SettingsPage(ttk.Frame):
     def load_settings(self):
         """بارگذاری تنظیمات"""
         try:
-            self.db.cursor.execute('SELECT * FROM settings WHERE id = 1')
-            settings = self.db.cursor.fetchone()
+            settings = self.db.query_one('SELECT * FROM settings WHERE id = 1')
             
             if settings:
                 self.basic_info_url.insert(0, settings[1] or '')
@@ -87,7 +86,7 @@ class SettingsPage(ttk.Frame):
     def save_settings(self):
         """ذخیره تنظیمات"""
         try:
-            self.db.cursor.execute('''
+            self.db.execute('''
                 INSERT OR REPLACE INTO settings 
                 (id, basic_info_url, ratios_url, statements_url, profitability_url)
                 VALUES (1, ?, ?, ?, ?)
@@ -98,7 +97,6 @@ class SettingsPage(ttk.Frame):
                 self.profitability_url.get()
             ))
             
-            self.db.conn.commit()
             self.status_label.config(text="تنظیمات با موفقیت ذخیره شد")
             
         except Exception as e:
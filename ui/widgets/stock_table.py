@@ -6,19 +6,26 @@
 - اسکرول عمودی و افقی
 - امکان انتخاب تک یا چند سهم
 - تغییر رنگ ردیف‌ها برای نمایش وضعیت‌های مختلف
+- پیش‌بارگذاری داده‌های نماد هنگام اشاره یا انتخاب ردیف
 """
 
 import tkinter as tk
 from tkinter import ttk
 
 class StockTable(ttk.Treeview):
-    def __init__(self, parent, columns, column_names, selectmode='browse', **kwargs):
+    # تأخیر پیش‌بارگذاری هنگام اشاره (میلی‌ثانیه) تا عبور سریع ماوس درخواستی نفرستد
+    HOVER_DELAY = 150
+    
+    def __init__(self, parent, columns, column_names, selectmode='browse', prefetch=None,
+                 symbol_column='symbol', **kwargs):
         """
         سازنده کلاس StockTable
         parent: فریم والد که جدول در آن قرار می‌گیرد
         columns: لیست نام‌های ستون‌ها
         column_names: لیست عناوین نمایشی ستون‌ها
         selectmode: نوع انتخاب ('browse' یا 'extended')
+        prefetch: تابع پیش‌بارگذاری با ورودی نماد (اختیاری)
+        symbol_column: نام ستون نماد برای پیش‌بارگذاری
         """
         # ایجاد فریم کانتینر برای جدول و اسکرول‌بارها
         self.container = ttk.Frame(parent)
@@ -53,6 +60,16 @@ class StockTable(ttk.Treeview):
         # متغیرهای مرتب‌سازی
         self._sort_column = None
         self._sort_reverse = False
+        
+        # پیش‌بارگذاری داده‌های نماد ردیف زیر ماوس یا انتخاب شده
+        self.prefetch = prefetch
+        self.symbol_column = symbol_column
+        self._hover_row = None
+        self._hover_job = None
+        if prefetch is not None and symbol_column in columns:
+            self.bind('<Motion>', self._handle_hover, add='+')
+            self.bind('<Leave>', self._cancel_hover, add='+')
+            self.bind('<<TreeviewSelect>>', self._handle_select, add='+')
     
     def insert_item(self, values, tags=None):
         """
@@ -85,6 +102,41 @@ class StockTable(ttk.Treeview):
         """
         self.item(item_id, tags=(color_tag,))
     
+    def _prefetch_row(self, row):
+        """
+        پیش‌بارگذاری داده‌های نماد یک ردیف
+        row: شناسه ردیف
+        """
+        symbol = self.set(row, self.symbol_column)
+        if symbol:
+            self.prefetch(symbol)
+    
+    def _handle_hover(self, event):
+        """
+        مدیریت حرکت ماوس روی ردیف‌ها
+        پیش‌بارگذاری فقط پس از توقف کوتاه روی یک ردیف انجام می‌شود
+        """
+        row = self.identify_row(event.y)
+        if row == self._hover_row:
+            return
+        self._cancel_hover()
+        self._hover_row = row
+        if row:
+            self._hover_job = self.after(self.HOVER_DELAY, self._prefetch_row, row)
+    
+    def _cancel_hover(self, event=None):
+        """لغو پیش‌بارگذاری در انتظار ردیف زیر ماوس"""
+        if self._hover_job is not None:
+            self.after_cancel(self._hover_job)
+            self._hover_job = None
+        self._hover_row = None
+    
+    def _handle_select(self, event):
+        """مدیریت انتخاب ردیف‌ها و پیش‌بارگذاری فوری نماد ردیف فعال"""
+        row = self.focus()
+        if row and row in self.selection():
+            self._prefetch_row(row)
+    
     def _handle_double_click(self, event):
         """
         مدیریت رویداد دبل کلیک روی عنوان ستون‌ها
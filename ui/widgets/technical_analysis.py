@@ -9,16 +9,15 @@
 
 import tkinter as tk
 from tkinter import ttk, messagebox
-from core.database import DatabaseManager
+from core.database import get_database
 from core.api_handler import StockAPI
+from core.prefetcher import get_prefetcher
 from datetime import datetime, timedelta
 import matplotlib
 matplotlib.use('TkAgg')
 import matplotlib.pyplot as plt
 from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
 from matplotlib.figure import Figure
-import numpy as np
-import pandas as pd
 from tkcalendar import DateEntry
 import threading
 import time
@@ -30,8 +29,9 @@ class TechnicalAnalysis(ttk.Frame):
         parent: والد ویجت (فریم اصلی)
         """
         super().__init__(parent)
-        self.db = DatabaseManager()
+        self.db = get_database()
         self.api = StockAPI()
+        self.prefetcher = get_prefetcher()
         
         # تنظیمات اولیه
         self.setup_ui()
@@ -145,6 +145,7 @@ class TechnicalAnalysis(ttk.Frame):
             
     def on_symbol_selected(self, event):
         """رویداد انتخاب سهم"""
+        self.prefetcher.record_view(self.symbol_var.get())
         self.update_chart()
         
     def update_chart(self):
@@ -154,19 +155,14 @@ class TechnicalAnalysis(ttk.Frame):
             if not symbol:
                 return
                 
-            # دریافت داده‌های قیمت
+            # دریافت داده‌های قیمت از کش (بازه‌های پیش‌بارگذاری شده بدون درخواست جدید)
             start_date = self.start_date.get_date()
             end_date = self.end_date.get_date()
-            data = self.api.get_stock_history(symbol, start_date, end_date)
+            df = self.prefetcher.get_history(symbol, start_date, end_date)
             
-            if not data:
+            if df.empty:
                 messagebox.showwarning("هشدار", "داده‌ای برای نمایش وجود ندارد")
                 return
-                
-            # تبدیل داده‌ها به DataFrame
-            df = pd.DataFrame(data)
-            df["date"] = pd.to_datetime(df["date"])
-            df.set_index("date", inplace=True)
             
             # رسم نمودار قیمت
             self.price_ax.clear()
@@ -8,7 +8,7 @@
 
 import tkinter as tk
 from tkinter import ttk, messagebox
-from core.database import DatabaseManager
+from core.database import get_database
 from core.api_handler import StockAPI
 from datetime import datetime
 import threading
@@ -21,7 +21,7 @@ class WatchlistPage(ttk.Frame):
         parent: والد ویجت (فریم اصلی)
         """
         super().__init__(parent)
-        self.db = DatabaseManager()
+        self.db = get_database()
         self.api = StockAPI()
         self.master = parent.winfo_toplevel()  # Store the master window reference
         
@@ -182,9 +182,9 @@ class WatchlistPage(ttk.Frame):
                     self.format_change(stock["change"]),
                     self.format_number(stock["volume"]),
                     self.format_number(stock["value"]),
-                    self.format_number(stock["count"]),
-                    self.format_number(stock["min_price"]),
-                    self.format_number(stock["max_price"]),
+                    self.format_number(stock.get("count", 0)),
+                    self.format_number(stock.get("min_price", 0)),
+                    self.format_number(stock.get("max_price", 0)),
                     self.check_alerts(stock)
                 ), tags=("increase" if stock["change"] > 0 else "decrease" if stock["change"] < 0 else ""))
             